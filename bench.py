@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-Benchmarks für den Text- und Payload-Hot-Path.
+
+Misst je Funktion × Corpus die Zeit pro Aufruf (ns/op, bester von N Läufen) und die
+Spitzen-Allokation pro Aufruf (tracemalloc). Corpora sind deterministisch generiert
+(Generatoren aus parser_check.py): kurzer Chat, große Multi-Field-Embeds, jedes
+Signal-Format und adversariale Texte gegen Backtracking (z.B. viele "Coin:" ohne
+"Direction:" für HDR_COIN_DIR mit re.S). Für das Decoding ganze Discord-Seiten (JSON,
+50 Messages mit Author, Attachments, Components, Reactions): Dict-Pfad vs. MessageRecord.
+
+    python bench.py                         # messen, mit Baseline vergleichen (falls vorhanden)
+    python bench.py --save-baseline         # Ergebnis als Baseline speichern
+    python bench.py --threshold 25          # Exit 1, wenn eine Funktion > 25% langsamer ist
+    python bench.py --filter parse          # nur Funktionen/Corpora, die "parse" enthalten
+"""
+
+import sys, json, time, random, argparse, tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import main
+from parser_check import BASES, CHATTER, gen_signal_text, gen_chatter
+
+HERE = Path(__file__).resolve().parent
+BASELINE_FILE = HERE / "bench_baseline.json"
+
+# =========================
+# Corpora (deterministisch)
+# =========================
+def _msg(content: str = "", embeds: list = None) -> dict:
+    return {"id": "1", "channel_id": "1", "content": content, "embeds": embeds or [], "author": {"id": "1"}}
+
+def _markdown(rnd: random.Random, txt: str) -> str:
+    """Discord-Markdown wie in echten Posts: Fett, Links, Entities, Leerraum."""
+    out = []
+    for line in txt.split("\n"):
+        r = rnd.random()
+        if r < 0.3:
+            line = f"**{line}**"
+        elif r < 0.4:
+            line = f"[{line}](https://example.com/x/{rnd.randint(1, 999)})"
+        elif r < 0.5:
+            line = f"  {line} &amp;  "
+        out.append(line)
+    return "\r\n".join(out)
+
+def _large_embed(rnd: random.Random, with_signal: bool) -> dict:
+    fields = [{"name": rnd.choice(CHATTER)[:40], "value": gen_chatter(rnd, 4)} for _ in range(25)]
+    if with_signal:
+        fields.insert(rnd.randint(0, len(fields)), {"name": "Signal", "value": gen_signal_text(rnd)})
+    return _msg("", [{"title": rnd.choice(CHATTER), "description": gen_chatter(rnd, 20),
+                      "fields": fields, "footer": {"text": "provider bot"}}])
+
+def _adversarial() -> List[str]:
+    """~4000 Zeichen je Text (Discord: Content bis 4000, Embeds bis 6000 gesamt)."""
+    return [
+        # HDR_COIN_DIR (re.S, .*?): jeder "Coin:"-Treffer läuft bis zum Textende
+        "Coin: BTC\n" * 400 + "no direction here",
+        # HDR_SLASH_PAIR: viele Slash-Paare, aber kein LONG/SHORT
+        " ".join(f"{b}/USDT" for b in BASES) * 40,
+        # Anchor-Dichte: "tp"/"dca"/"entry" ohne Doppelpunkt/Zahl
+        "tp dca entry signal coin / " * 150,
+        # NUM-Pattern: sehr lange Ziffern-/Komma-Folgen hinter gültigen Labels
+        "Entry: " + "1," * 1500 + "\nTP1: " + "9" * 1000,
+        # Lookback-Fenster: langer Lauf erlaubter Zeichen vor dem Anchor
+        "A" * 4000 + "/USDT",
+    ]
+
+def _discord_fields(rnd: random.Random, m: dict) -> dict:
+    """Felder, die die echte API mitliefert, die Pipeline aber nicht liest."""
+    uid = str(rnd.randint(10**17, 10**18))
+    m.update({
+        "type": 0, "tts": False, "pinned": False, "mention_everyone": False, "flags": 0,
+        "timestamp": "2024-05-01T12:00:00.000000+00:00", "edited_timestamp": None,
+        "author": {"id": uid, "username": f"user{uid[-4:]}", "global_name": None, "avatar": "a" * 32,
+                   "discriminator": "0", "public_flags": 0, "bot": rnd.random() < 0.5},
+        "mentions": [], "mention_roles": [],
+        "attachments": [{"id": uid, "filename": "chart.png", "size": rnd.randint(10**4, 10**6),
+                         "url": f"https://cdn.discordapp.com/attachments/{uid}/chart.png",
+                         "proxy_url": f"https://media.discordapp.net/attachments/{uid}/chart.png",
+                         "width": 1280, "height": 720, "content_type": "image/png"}] * rnd.randint(0, 2),
+        "components": [{"type": 1, "components": [{"type": 2, "style": 5, "label": "Open",
+                                                   "url": "https://example.com/trade"}]}],
+        "reactions": [{"emoji": {"id": None, "name": e}, "count": rnd.randint(1, 40), "me": False}
+                      for e in ("🚀", "🔥", "👍")],
+    })
+    return m
+
+def _pages(rnd: random.Random, msgs: List[dict], size: int = 50) -> List[bytes]:
+    full = [_discord_fields(rnd, dict(m, id=str(10**18 + i))) for i, m in enumerate(msgs)]
+    return [json.dumps(full[i:i + size]).encode("utf-8") for i in range(0, len(full), size)]
+
+def build_corpora(seed: int = 7) -> Dict[str, List[dict]]:
+    """Corpus -> Liste von Discord-Message-Dicts."""
+    rnd = random.Random(seed)
+    corpora = {
+        "short_chat": [_msg(gen_chatter(rnd, rnd.randint(1, 3))) for _ in range(200)],
+        "large_embed": [_large_embed(rnd, False) for _ in range(10)],
+        "large_embed_signal": [_large_embed(rnd, True) for _ in range(10)],
+        "adversarial": [_msg(t) for t in _adversarial()],
+    }
+    for fmt in ("slash", "old", "coin"):
+        corpora[f"signal_{fmt}"] = [_msg(_markdown(rnd, gen_signal_text(rnd, fmt))) for _ in range(100)]
+    return corpora
+
+# =========================
+# Funktionen
+# =========================
+def _prepare(corpora: Dict[str, List[dict]]) -> Dict[str, Dict[str, list]]:
+    """Eingaben je Funktion: Rohtext, Message-Dict, bereinigter Text, geparstes Signal."""
+    raw = {k: ["\n".join(main.message_parts(m)) for m in msgs] for k, msgs in corpora.items()}
+    clean = {k: [main.clean_markdown(t) for t in texts] for k, texts in raw.items()}
+    sigs = {k: [s for s in map(main.parse_signal_from_text, texts) if s] for k, texts in clean.items()}
+    rnd = random.Random(11)
+    pages = {k: _pages(rnd, msgs * max(1, 50 // len(msgs))) for k, msgs in corpora.items() if k != "adversarial"}
+    return {"msg": corpora, "raw": raw, "clean": clean, "sig": {k: v for k, v in sigs.items() if v}, "page": pages}
+
+def _open_payload(sig: dict) -> dict:
+    return main.build_altrady_open_payload(sig, "BYBI", "key", "secret", 5)
+
+def _page_dicts(body: bytes) -> list:
+    """Bisheriger Pfad: komplette Seite als Dicts, Textteile je Message."""
+    msgs = json.loads(body)
+    return [(m, main.message_parts(m)) for m in msgs]
+
+def _page_records(body: bytes) -> list:
+    return [main.MessageRecord.from_dict(m) for m in main._iter_json_array(body)]
+
+FUNCTIONS: List[Tuple[str, Callable, str]] = [
+    ("clean_markdown", main.clean_markdown, "raw"),
+    ("message_text", main.message_text, "msg"),
+    ("find_base_side", main.find_base_side, "clean"),
+    ("find_entry", main.find_entry, "clean"),
+    ("find_tp_dca", main.find_tp_dca, "clean"),
+    ("parse_signal_from_text", main.parse_signal_from_text, "clean"),
+    ("build_altrady_open_payload", _open_payload, "sig"),
+    ("decode_page_dicts", _page_dicts, "page"),
+    ("decode_page_records", _page_records, "page"),
+    ("decode_page_records_json", lambda body: main.decode_messages(body, json.loads), "page"),
+]
+if main.orjson is not None:
+    FUNCTIONS.append(("decode_page_records_orjson", lambda body: main.decode_messages(body, main.orjson.loads), "page"))
+
+# =========================
+# Messung
+# =========================
+def time_ns_per_op(fn: Callable, items: list, min_time: float, repeats: int) -> float:
+    """Bester Lauf von `repeats`; jeder Lauf wiederholt den Corpus, bis min_time erreicht ist."""
+    loops = 1
+    while True:
+        t0 = time.perf_counter_ns()
+        for _ in range(loops):
+            for x in items:
+                fn(x)
+        dt = time.perf_counter_ns() - t0
+        if dt >= min_time * 1e9 or loops >= 1 << 20:
+            break
+        loops *= 2
+    best = dt
+    for _ in range(repeats - 1):
+        t0 = time.perf_counter_ns()
+        for _ in range(loops):
+            for x in items:
+                fn(x)
+        best = min(best, time.perf_counter_ns() - t0)
+    return best / (loops * len(items))
+
+def alloc_per_op(fn: Callable, items: list) -> Tuple[float, int]:
+    """(Ø Spitzen-Allokation in Bytes, Ø Anzahl überlebender Blöcke) pro Aufruf."""
+    tracemalloc.start()
+    try:
+        peak_sum = blocks = 0
+        for x in items:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            result = fn(x)
+            peak_sum += tracemalloc.get_traced_memory()[1] - base
+            blocks += sum(s.count_diff for s in tracemalloc.take_snapshot().compare_to(before, "filename") if s.count_diff > 0)
+            del result
+    finally:
+        tracemalloc.stop()
+    return peak_sum / len(items), round(blocks / len(items))
+
+def run(filter_: str = "", min_time: float = 0.05, repeats: int = 5, alloc_items: int = 20) -> Dict[str, dict]:
+    inputs = _prepare(build_corpora())
+    results = {}
+    for name, fn, kind in FUNCTIONS:
+        for corpus, items in inputs[kind].items():
+            key = f"{name}/{corpus}"
+            if filter_ and filter_ not in key:
+                continue
+            ns = time_ns_per_op(fn, items, min_time, repeats)
+            peak, blocks = alloc_per_op(fn, items[:alloc_items])
+            results[key] = {"ns_per_op": round(ns, 1), "alloc_peak_bytes": round(peak), "alloc_blocks": blocks}
+            print(f"{key:48s} {ns:14,.0f} ns/op {peak:12,.0f} B/op {blocks:6d} Blöcke", flush=True)
+    return results
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold_pct: float) -> List[str]:
+    """Funktionen, die mehr als threshold_pct langsamer als die Baseline sind."""
+    regressions = []
+    print(f"\n{'Vergleich mit Baseline':48s} {'alt ns':>12s} {'neu ns':>12s} {'Δ':>8s}")
+    for key, r in results.items():
+        old = baseline.get(key)
+        if not old:
+            continue
+        delta = (r["ns_per_op"] / old["ns_per_op"] - 1.0) * 100.0 if old["ns_per_op"] else 0.0
+        flag = ""
+        if delta > threshold_pct:
+            regressions.append(key)
+            flag = "  ❌"
+        print(f"{key:48s} {old['ns_per_op']:12,.0f} {r['ns_per_op']:12,.0f} {delta:+7.1f}%{flag}")
+    return regressions
+
+def main_cli():
+    ap = argparse.ArgumentParser(description="Micro-Benchmarks Text-/Payload-Hot-Path")
+    ap.add_argument("--filter", default="", help="nur Einträge 'funktion/corpus', die den Text enthalten")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_FILE, help=f"Baseline-Datei (Default {BASELINE_FILE.name})")
+    ap.add_argument("--save-baseline", action="store_true", help="Ergebnis als Baseline speichern")
+    ap.add_argument("--threshold", type=float, default=25.0, help="erlaubte Verlangsamung in %% (Default 25)")
+    ap.add_argument("--min-time", type=float, default=0.05, help="Mindestdauer pro Lauf in s")
+    ap.add_argument("--repeats", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'Funktion/Corpus':48s} {'Zeit':>17s} {'Allokation':>15s}")
+    results = run(args.filter, args.min_time, max(1, args.repeats))
+
+    if args.save_baseline:
+        stored = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+        stored.update(results)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\n💾 Baseline gespeichert: {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"\nKeine Baseline ({args.baseline}) – mit --save-baseline anlegen")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} Regression(en) über {args.threshold:g}%: {', '.join(regressions)}")
+        return 1
+    print(f"\n✅ Keine Regression über {args.threshold:g}%")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
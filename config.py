@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tuning des Bots (TP-Splits, DCA, Stop, Entry, Hebel, Poll-Timing) als unveränderliches,
+validiertes Objekt – im laufenden Worker neu ladbar, ohne Neustart.
+
+    cfg = TradingConfig.from_env(config_env(Path(".env")))
+    problems = cfg.problems()          # [] = gültig
+    cfg.diff(old)                      # {"TP1_PCT": (30.0, 25.0), ...}
+
+Neu laden per SIGHUP oder sobald sich eine beobachtete Datei (CONFIG_FILE, Accounts) ändert:
+
+    kill -HUP <pid>
+
+Wie bei load_dotenv gewinnt die Prozess-ENV über die Dateien; ein Reload ändert also nur
+Werte, die nicht als Prozess-Variable gesetzt sind. Mit `override=True` (CONFIG_OVERRIDE)
+gehen die Dateien vor. Ungültige Konfigurationen werden mit allen Fehlern abgelehnt, die
+bisherige bleibt aktiv. Übernommen wird nur an Zyklusgrenzen der
+Hauptschleife – ein Signal sieht immer genau eine Konfiguration.
+"""
+
+import os, time, signal
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from dotenv import dotenv_values
+
+from log import LOG
+
+# (Name, Typ, Default) – Typ: int | float | bool | str (Großbuchstaben)
+FIELDS: Tuple[Tuple[str, type, str], ...] = (
+    ("QUOTE",                      str,   "USDT"),
+    # getrennte Hebel je Webhook (#1 / #2, weitere per LEVERAGE_<n> bzw. Accounts-Datei)
+    ("LEVERAGE_1",                 int,   "5"),
+    ("LEVERAGE_2",                 int,   "10"),
+    # TP-Split (30/30/30) + Runner (10% via SL/Trail abgesichert)
+    ("TP1_PCT",                    float, "30"),
+    ("TP2_PCT",                    float, "30"),
+    ("TP3_PCT",                    float, "30"),
+    ("RUNNER_PCT",                 float, "10"),
+    ("RUNNER_TRAILING_DIST",       float, "1.5"),
+    ("RUNNER_TP_MULTIPLIER",       float, "1.5"),
+    # Stop-Loss: DCA1 (Default) / DCA2 = Distanz Entry->DCA + SL_BUFFER_PCT, FIXED = STOP_FIXED_PERCENTAGE
+    ("STOP_PROTECTION_TYPE",       str,   "FOLLOW_TAKE_PROFIT"),
+    ("BASE_STOP_MODE",             str,   "DCA1"),
+    ("SL_BUFFER_PCT",              float, "4.0"),
+    ("STOP_FIXED_PERCENTAGE",      float, "9.0"),
+    ("STOP_LOSS_ORDER_TYPE",       str,   "STOP_LOSS_MARKET"),
+    # DCA-Größen (% der Start-Positionsgröße), Default: DCA1-only
+    ("DCA1_QTY_PCT",               float, "150"),
+    ("DCA2_QTY_PCT",               float, "0"),
+    ("DCA3_QTY_PCT",               float, "0"),
+    # Fallback DCA-Distanzen (vom Entry, in %)
+    ("DCA1_DIST_PCT",              float, "5"),
+    ("DCA2_DIST_PCT",              float, "10"),
+    ("DCA3_DIST_PCT",              float, "20"),
+    # Entry: Ablauf (Zeit), Zeit-Bedingung (0 = keine), Trigger-Puffer, vorzeitiges Expire nach Preis
+    ("ENTRY_EXPIRATION_MIN",       int,   "180"),
+    ("ENTRY_WAIT_MINUTES",         int,   "0"),
+    ("ENTRY_TRIGGER_BUFFER_PCT",   float, "0.0"),
+    ("ENTRY_EXPIRATION_PRICE_PCT", float, "0.0"),
+    ("TEST_MODE",                  bool,  "false"),
+    # Poll-Steuerung: adaptiv zwischen POLL_MIN_SECONDS und POLL_MAX_SECONDS
+    ("POLL_BASE_SECONDS",          int,   "60"),
+    ("POLL_OFFSET_SECONDS",        int,   "3"),
+    ("POLL_JITTER_MAX",            int,   "7"),
+    ("POLL_ACTIVITY_DECAY",        float, "0.8"),    # Gewicht alter Aktivität je Poll
+    ("POLL_MIN_SECONDS",           float, ""),       # Default: min(15, POLL_BASE_SECONDS)
+    ("POLL_MAX_SECONDS",           float, ""),       # Default: POLL_BASE_SECONDS
+    ("POLL_SHRINK_FACTOR",         float, "0.5"),
+    ("POLL_BACKOFF_FACTOR",        float, "1.25"),
+    ("POLL_MIN_HEADROOM",          float, "0.5"),    # Anteil Rest-Budget, ab dem geschrumpft wird
+    # Cooldown nach Order-Open, 0 = aus
+    ("COOLDOWN_SECONDS",           int,   "0"),
+    # Deadline je Signal (0 = nur Entry-Expiry) / Nachholen: ältere Messages überspringen (0 = alle)
+    ("SIGNAL_MAX_AGE_SECONDS",     int,   "300"),
+    ("MAX_MESSAGE_AGE_SECONDS",    int,   ""),       # Default: max(SIGNAL_MAX_AGE_SECONDS, 2 × POLL_MAX_SECONDS)
+    ("STATS_LOG_SECONDS",          int,   "900"),    # 0 = aus
+)
+# Defaults, die aus früheren Feldern abgeleitet werden
+_DERIVED_DEFAULTS: Dict[str, Callable[[dict], object]] = {
+    "POLL_MIN_SECONDS":        lambda v: min(15, v["POLL_BASE_SECONDS"]),
+    "POLL_MAX_SECONDS":        lambda v: v["POLL_BASE_SECONDS"],
+    # über der längsten Poll-Pause, sonst verstößt der Default gegen problems(); 0 (aus) bleibt aus
+    "MAX_MESSAGE_AGE_SECONDS": lambda v: v["SIGNAL_MAX_AGE_SECONDS"] and
+                                         int(max(v["SIGNAL_MAX_AGE_SECONDS"], 2 * v["POLL_MAX_SECONDS"])),
+}
+
+BASE_STOP_MODES = ("DCA1", "DCA2", "FIXED")
+
+
+def _convert(kind: type, raw: str):
+    raw = raw.strip()
+    if kind is bool:
+        return raw.lower() == "true"
+    if kind is str:
+        return raw.upper()
+    return kind(raw)
+
+
+class TradingConfig:
+    """Unveränderlich: ein Reload erzeugt ein neues Objekt, das als Ganzes ausgetauscht wird."""
+    __slots__ = tuple(name for name, _, _ in FIELDS) + ("errors", "env")
+
+    def __init__(self, values: Mapping[str, object], errors: Optional[List[str]] = None,
+                 env: Optional[Mapping[str, str]] = None):
+        for name, _, _ in FIELDS:
+            object.__setattr__(self, name, values[name])
+        object.__setattr__(self, "errors", list(errors or []))
+        # Quelle des Objekts – für Schlüssel außerhalb von FIELDS (LEVERAGE_<n>, Webhooks <n>)
+        object.__setattr__(self, "env", MappingProxyType(dict(env or {})))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TradingConfig ist unveränderlich")
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "TradingConfig":
+        """Nicht parsebare Werte fallen auf den Default zurück und stehen in `problems()`."""
+        values, errors = {}, []
+        for name, kind, default in FIELDS:
+            if name in _DERIVED_DEFAULTS:
+                default = str(_DERIVED_DEFAULTS[name](values))
+            raw = env.get(name, default)
+            try:
+                values[name] = _convert(kind, raw)
+            except ValueError:
+                errors.append(f"{name}={raw!r} ist kein {kind.__name__}")
+                values[name] = _convert(kind, default)
+        return cls(values, errors, env)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name, _, _ in FIELDS}
+
+    def diff(self, old: "TradingConfig") -> Dict[str, Tuple[object, object]]:
+        """Geänderte Felder: Name -> (alt, neu)."""
+        return {name: (getattr(old, name), getattr(self, name))
+                for name, _, _ in FIELDS if getattr(old, name) != getattr(self, name)}
+
+    def problems(self) -> List[str]:
+        """Parse- und Plausibilitätsfehler; leer = gültig."""
+        p = list(self.errors)
+        def check(ok: bool, msg: str):
+            if not ok:
+                p.append(msg)
+
+        for name in ("TP1_PCT", "TP2_PCT", "TP3_PCT", "RUNNER_PCT", "RUNNER_TRAILING_DIST", "SL_BUFFER_PCT",
+                     "DCA1_QTY_PCT", "DCA2_QTY_PCT", "DCA3_QTY_PCT", "ENTRY_EXPIRATION_MIN", "ENTRY_WAIT_MINUTES",
+                     "POLL_OFFSET_SECONDS", "POLL_JITTER_MAX", "COOLDOWN_SECONDS", "SIGNAL_MAX_AGE_SECONDS",
+                     "MAX_MESSAGE_AGE_SECONDS", "STATS_LOG_SECONDS"):
+            check(getattr(self, name) >= 0, f"{name} darf nicht negativ sein")
+        split = self.TP1_PCT + self.TP2_PCT + self.TP3_PCT + self.RUNNER_PCT
+        check(0 < split <= 100, f"TP1_PCT+TP2_PCT+TP3_PCT+RUNNER_PCT = {split:g}%, erlaubt (0, 100]")
+        check(self.RUNNER_TP_MULTIPLIER >= 1, "RUNNER_TP_MULTIPLIER muss >= 1 sein (Runner liegt hinter TP3)")
+        check(self.LEVERAGE_1 >= 1 and self.LEVERAGE_2 >= 1, "LEVERAGE_1/LEVERAGE_2 müssen >= 1 sein")
+        check(bool(self.QUOTE), "QUOTE fehlt")
+        check(self.BASE_STOP_MODE in BASE_STOP_MODES, f"BASE_STOP_MODE={self.BASE_STOP_MODE!r}, erlaubt {'|'.join(BASE_STOP_MODES)}")
+        if self.BASE_STOP_MODE == "FIXED":
+            check(0 < self.STOP_FIXED_PERCENTAGE < 100, "STOP_FIXED_PERCENTAGE muss bei FIXED in (0, 100) liegen")
+        check(bool(self.STOP_LOSS_ORDER_TYPE) and bool(self.STOP_PROTECTION_TYPE),
+              "STOP_LOSS_ORDER_TYPE/STOP_PROTECTION_TYPE fehlen")
+        for name in ("DCA1_DIST_PCT", "DCA2_DIST_PCT", "DCA3_DIST_PCT"):
+            check(0 < getattr(self, name) < 100, f"{name} muss in (0, 100) liegen")
+        for name in ("ENTRY_TRIGGER_BUFFER_PCT", "ENTRY_EXPIRATION_PRICE_PCT"):
+            check(0 <= getattr(self, name) < 100, f"{name} muss in [0, 100) liegen")
+        check(self.POLL_BASE_SECONDS >= 1, "POLL_BASE_SECONDS muss >= 1 sein")
+        check(0 < self.POLL_MIN_SECONDS <= self.POLL_BASE_SECONDS <= self.POLL_MAX_SECONDS,
+              f"Poll-Intervall: 0 < POLL_MIN_SECONDS ({self.POLL_MIN_SECONDS:g}) <= POLL_BASE_SECONDS "
+              f"({self.POLL_BASE_SECONDS}) <= POLL_MAX_SECONDS ({self.POLL_MAX_SECONDS:g}) verletzt")
+        check(self.MAX_MESSAGE_AGE_SECONDS == 0 or self.MAX_MESSAGE_AGE_SECONDS > self.POLL_MAX_SECONDS,
+              f"MAX_MESSAGE_AGE_SECONDS ({self.MAX_MESSAGE_AGE_SECONDS}) muss > POLL_MAX_SECONDS "
+              f"({self.POLL_MAX_SECONDS:g}) sein (0 = aus), sonst fallen Messages zwischen zwei Polls weg")
+        check(0 < self.POLL_SHRINK_FACTOR <= 1, "POLL_SHRINK_FACTOR muss in (0, 1] liegen")
+        check(self.POLL_BACKOFF_FACTOR >= 1, "POLL_BACKOFF_FACTOR muss >= 1 sein")
+        check(0 <= self.POLL_ACTIVITY_DECAY <= 1, "POLL_ACTIVITY_DECAY muss in [0, 1] liegen")
+        check(0 <= self.POLL_MIN_HEADROOM <= 1, "POLL_MIN_HEADROOM muss in [0, 1] liegen")
+        return p
+
+
+def config_env(*paths: Optional[Path], base: Optional[Mapping[str, str]] = None,
+               override: bool = False) -> Dict[str, str]:
+    """
+    Werte aus `paths` (dotenv-Format, spätere überschreiben frühere, fehlende werden
+    übersprungen), darüber `base` (Default: Prozess-ENV) – wie load_dotenv. Mit
+    `override` gehen die Dateien der Prozess-ENV vor.
+    """
+    files: Dict[str, str] = {}
+    for path in paths:
+        if path is not None and Path(path).exists():
+            files.update({k: v for k, v in dotenv_values(path).items() if v is not None})
+    env = dict(os.environ if base is None else base)
+    return {**env, **files} if override else {**files, **env}
+
+
+class ConfigReloader:
+    """
+    Beobachtet Dateien (mtime, höchstens ein stat() je Sekunde) und SIGHUP. `tick()` an der
+    Zyklusgrenze der Hauptschleife aufrufen: lädt neu und übergibt das geprüfte Objekt an
+    `apply`; wirft `apply`, bleibt die bisherige Konfiguration aktiv.
+    """
+
+    def __init__(self, load: Callable[[], TradingConfig], apply: Callable[[TradingConfig], None],
+                 paths: List[Path]):
+        self.load = load
+        self.apply = apply
+        self.paths = [Path(p) for p in paths]
+        self._mtimes = self._stat()
+        self._requested = False
+        self._next_check = 0.0
+
+    def _stat(self) -> Dict[Path, Optional[float]]:
+        out = {}
+        for p in self.paths:
+            try:
+                out[p] = p.stat().st_mtime
+            except OSError:
+                out[p] = None
+        return out
+
+    def install(self):
+        """SIGHUP -> Reload beim nächsten Tick (nur im Haupt-Thread, nur wo es SIGHUP gibt)."""
+        sig = getattr(signal, "SIGHUP", None)
+        if sig is not None:
+            signal.signal(sig, lambda *_: self.request())
+
+    def request(self):
+        self._requested = True
+
+    def tick(self) -> bool:
+        """True, wenn eine neue Konfiguration übernommen wurde."""
+        now = time.monotonic()
+        if self.paths and now >= self._next_check:
+            self._next_check = now + 1.0
+            mtimes = self._stat()
+            if mtimes != self._mtimes:
+                self._mtimes = mtimes
+                self._requested = True
+        if not self._requested:
+            return False
+        self._requested = False
+        try:
+            cfg = self.load()
+            problems = cfg.problems()
+            if problems:
+                LOG.error("❌ Konfiguration ungültig – bisherige bleibt aktiv", problems=problems)
+                return False
+            self.apply(cfg)
+        except Exception as e:
+            LOG.error("❌ Konfiguration nicht neu geladen – bisherige bleibt aktiv", error=str(e))
+            return False
+        return True
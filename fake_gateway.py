@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lokaler Stand-in für das Discord Gateway – zum Testen des Gateway-Modus ohne Netz.
+
+Spricht genug vom Protokoll für `gateway.DiscordGateway`: HELLO, IDENTIFY/READY,
+RESUME/RESUMED (inkl. Replay verpasster Events), Heartbeat-ACK, Reconnect und
+Invalid Session. Messages werden per `push_message()` (oder stdin im CLI) erzeugt.
+
+    python fake_gateway.py --port 8765 --channel 123
+    INGEST_MODE=gateway DISCORD_GATEWAY_URL=ws://127.0.0.1:8765/?v=10&encoding=json python main.py
+"""
+
+import sys, json, time, uuid, socket, argparse, threading, socketserver
+from typing import Optional
+
+from gateway import (
+    ws_accept_key, ws_send_frame, ws_read_frame, close_payload, WebSocketClosed,
+    OP_TEXT, OP_CLOSE, OP_PING, OP_PONG,
+    GW_DISPATCH, GW_HEARTBEAT, GW_IDENTIFY, GW_RESUME,
+    GW_RECONNECT, GW_INVALID_SESSION, GW_HELLO, GW_HEARTBEAT_ACK,
+)
+from metrics import time_snowflake
+
+
+def make_snowflake(ts: Optional[float] = None, counter: int = 0) -> str:
+    return str(time_snowflake(ts if ts is not None else time.time()) | (counter & 0xFFF))
+
+
+class _Session:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.seq = 0
+        self.buffer = []     # [(seq, paket)] für Resume-Replay
+        self.conn = None     # aktive _Conn oder None
+
+    def next_packet(self, t: str, d: dict) -> dict:
+        self.seq += 1
+        pkt = {"op": GW_DISPATCH, "s": self.seq, "t": t, "d": d}
+        self.buffer.append((self.seq, pkt))
+        del self.buffer[:-1000]
+        return pkt
+
+
+class _Conn:
+    def __init__(self, sock, rfile):
+        self.sock = sock
+        self.rfile = rfile
+        self.lock = threading.Lock()
+        self.heartbeats = 0
+
+    def send(self, obj: dict):
+        with self.lock:
+            ws_send_frame(self.sock, OP_TEXT, json.dumps(obj).encode("utf-8"), mask=False)
+
+    def close(self, code: int = 1000, reason: str = ""):
+        try:
+            with self.lock:
+                ws_send_frame(self.sock, OP_CLOSE, close_payload(code, reason), mask=False)
+        except Exception:
+            pass
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except Exception:
+            pass
+
+
+class FakeGateway:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, heartbeat_interval_ms: int = 41250,
+                 ack_heartbeats: bool = True):
+        self.heartbeat_interval_ms = heartbeat_interval_ms
+        self.ack_heartbeats = ack_heartbeats
+        self.sessions = {}
+        self.identifies = 0
+        self.resumes = 0
+        self._lock = threading.Lock()
+        self._counter = 0
+        gw = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                gw._handle(self.connection, self.rfile)
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server((host, port), Handler)
+        self.host, self.port = self._server.server_address[:2]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/?v=10&encoding=json"
+
+    def start(self) -> "FakeGateway":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-gateway", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.disconnect_all(1001)
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ---------- Steuerung ----------
+    def push_message(self, channel_id: str, content: str = "", embeds: Optional[list] = None,
+                     msg_id: Optional[str] = None, **extra) -> dict:
+        with self._lock:
+            self._counter += 1
+            msg = {
+                "id": msg_id or make_snowflake(counter=self._counter),
+                "channel_id": str(channel_id),
+                "content": content,
+                "embeds": embeds or [],
+                "author": {"id": "1", "username": "fake"},
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+            }
+            msg.update(extra)
+            for s in self.sessions.values():
+                pkt = s.next_packet("MESSAGE_CREATE", msg)
+                if s.conn:
+                    try:
+                        s.conn.send(pkt)
+                    except Exception:
+                        s.conn = None
+        return msg
+
+    def disconnect_all(self, code: int = 4000):
+        """Trennt alle Verbindungen (Sessions bleiben resumable)."""
+        with self._lock:
+            conns = [s.conn for s in self.sessions.values() if s.conn]
+        for c in conns:
+            c.close(code)
+
+    def request_reconnect(self):
+        with self._lock:
+            conns = [s.conn for s in self.sessions.values() if s.conn]
+        for c in conns:
+            c.send({"op": GW_RECONNECT, "d": None})
+
+    def invalidate_sessions(self, resumable: bool = False):
+        with self._lock:
+            conns = [s.conn for s in self.sessions.values() if s.conn]
+            if not resumable:
+                self.sessions.clear()
+        for c in conns:
+            c.send({"op": GW_INVALID_SESSION, "d": resumable})
+
+    @property
+    def connected_count(self) -> int:
+        with self._lock:
+            return sum(1 for s in self.sessions.values() if s.conn)
+
+    # ---------- Verbindung ----------
+    def _handshake(self, sock, rfile) -> bool:
+        line = rfile.readline()
+        if not line:
+            return False
+        key = None
+        while True:
+            h = rfile.readline().decode("latin-1").strip()
+            if not h:
+                break
+            k, _, v = h.partition(":")
+            if k.strip().lower() == "sec-websocket-key":
+                key = v.strip()
+        if not key:
+            sock.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return False
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {ws_accept_key(key)}\r\n\r\n"
+        ).encode())
+        return True
+
+    def _recv(self, conn: _Conn) -> Optional[dict]:
+        while True:
+            fin, opcode, payload = ws_read_frame(conn.rfile)
+            if opcode == OP_PING:
+                with conn.lock:
+                    ws_send_frame(conn.sock, OP_PONG, payload, mask=False)
+                continue
+            if opcode == OP_CLOSE:
+                return None
+            if opcode == OP_TEXT:
+                return json.loads(payload.decode("utf-8"))
+
+    def _handle(self, sock, rfile):
+        if not self._handshake(sock, rfile):
+            return
+        conn = _Conn(sock, rfile)
+        session: Optional[_Session] = None
+        try:
+            conn.send({"op": GW_HELLO, "d": {"heartbeat_interval": self.heartbeat_interval_ms}})
+            while True:
+                pkt = self._recv(conn)
+                if pkt is None:
+                    return
+                op = pkt.get("op")
+                if op == GW_HEARTBEAT:
+                    conn.heartbeats += 1
+                    if self.ack_heartbeats:
+                        conn.send({"op": GW_HEARTBEAT_ACK})
+                elif op == GW_IDENTIFY:
+                    with self._lock:
+                        self.identifies += 1
+                        session = _Session(uuid.uuid4().hex)
+                        self.sessions[session.session_id] = session
+                        session.conn = conn
+                        conn.send(session.next_packet("READY", {
+                            "session_id": session.session_id,
+                            "resume_gateway_url": f"ws://{self.host}:{self.port}",
+                            "user": {"id": "0", "username": "fake-bot"},
+                        }))
+                elif op == GW_RESUME:
+                    d = pkt.get("d") or {}
+                    with self._lock:
+                        session = self.sessions.get(d.get("session_id"))
+                        if session is None:
+                            conn.send({"op": GW_INVALID_SESSION, "d": False})
+                            continue
+                        self.resumes += 1
+                        session.conn = conn
+                        last = int(d.get("seq") or 0)
+                        for seq, p in session.buffer:
+                            if seq > last:
+                                conn.send(p)
+                        conn.send(session.next_packet("RESUMED", {}))
+        except (WebSocketClosed, OSError, ValueError):
+            pass
+        finally:
+            with self._lock:
+                if session is not None and session.conn is conn:
+                    session.conn = None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Lokaler Discord Gateway Stand-in")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--channel", default="123", help="channel_id für gepushte Messages")
+    ap.add_argument("--heartbeat-ms", type=int, default=41250)
+    args = ap.parse_args()
+
+    gw = FakeGateway(args.host, args.port, args.heartbeat_ms).start()
+    print(f"🧪 Fake Gateway läuft: {gw.url}")
+    print("Eingabe: Text -> MESSAGE_CREATE ('\\n' = Zeilenumbruch) | /drop | /reconnect | /invalidate | /quit")
+    try:
+        for line in sys.stdin:
+            line = line.rstrip("\n")
+            if line == "/quit":
+                break
+            if line == "/drop":
+                gw.disconnect_all()
+            elif line == "/reconnect":
+                gw.request_reconnect()
+            elif line == "/invalidate":
+                gw.invalidate_sessions()
+            elif line:
+                m = gw.push_message(args.channel, line.replace("\\n", "\n"))
+                print(f"→ gesendet id={m['id']} an {gw.connected_count} Verbindung(en)")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gw.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lokale Stand-ins für die Discord REST-API und den Altrady-Webhook – für Last- und
+Fehlertests ohne Netz (siehe loadtest.py).
+
+FakeDiscord:  GET /api/v10/channels/{id}/messages mit `after`/`limit`-Paging wie die echte
+              API (neueste zuerst), Bucket-Header X-RateLimit-* und 429 bei leerem Bucket
+              bzw. mit einstellbarer Zufallsquote.
+FakeAltrady:  POST auf beliebige Pfade mit einstellbarer Latenz (+Jitter) und Status-Mix
+              (z.B. 204/429/500); HEAD für Keep-Warm/Circuit-Probe. Jeder Post wird mit
+              Empfangszeit protokolliert.
+
+    python fake_servers.py --discord-port 8780 --altrady-port 8781 --channel 123 --status-mix 204:0.9,500:0.1
+    DISCORD_API_BASE=http://127.0.0.1:8780/api/v10 ALTRADY_WEBHOOK_URL=http://127.0.0.1:8781/hook python main.py
+"""
+
+import sys, json, time, random, argparse, threading
+from bisect import bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from fake_gateway import make_snowflake
+
+
+def parse_status_mix(spec: str) -> List[Tuple[int, float]]:
+    """"204:0.9,429:0.05,500:0.05" -> [(204, 0.9), (429, 0.05), (500, 0.05)]"""
+    mix = []
+    for part in spec.split(","):
+        if part.strip():
+            code, _, weight = part.partition(":")
+            mix.append((int(code), float(weight or 1)))
+    return mix or [(204, 1.0)]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Base:
+    def __init__(self, handler, host: str, port: int, name: str):
+        self._server = _Server((host, port), handler)
+        self.host, self.port = self._server.server_address[:2]
+        self._name = name
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=self._name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _reply(h: BaseHTTPRequestHandler, status: int, body: Optional[dict] = None, headers: Optional[dict] = None):
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    h.send_response(status)
+    for k, v in (headers or {}).items():
+        h.send_header(k, str(v))
+    if body is not None:
+        h.send_header("Content-Type", "application/json")
+    h.send_header("Content-Length", str(len(data)))
+    h.end_headers()
+    if data and h.command != "HEAD":
+        h.wfile.write(data)
+
+
+# =========================
+# Discord
+# =========================
+class FakeDiscord(_Base):
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, bucket_limit: int = 5,
+                 bucket_reset: float = 5.0, rate_429: float = 0.0, seed: Optional[int] = None):
+        self.bucket_limit = bucket_limit      # Requests je Bucket-Fenster (0 = unbegrenzt)
+        self.bucket_reset = bucket_reset      # Fensterlänge in s
+        self.rate_429 = rate_429              # zusätzliche zufällige 429 (0..1)
+        self.requests = 0
+        self.served_429 = 0
+        self._rnd = random.Random(seed)
+        self._ids: Dict[str, List[int]] = {}        # channel -> IDs aufsteigend
+        self._messages: Dict[str, List[dict]] = {}  # channel -> Messages in gleicher Reihenfolge
+        self._buckets: Dict[str, Tuple[float, int]] = {}          # channel -> (Fenster-Ende, Rest)
+        self._lock = threading.Lock()
+        self._counter = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake._handle_get(self)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(Handler, host, port, "fake-discord")
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/v10"
+
+    # ---------- Steuerung ----------
+    def push_message(self, channel_id: str, content: str = "", embeds: Optional[list] = None,
+                     msg_id: Optional[str] = None, **extra) -> dict:
+        with self._lock:
+            self._counter += 1
+            msg = {
+                "id": msg_id or make_snowflake(counter=self._counter),
+                "channel_id": str(channel_id),
+                "content": content,
+                "embeds": embeds or [],
+                "author": {"id": "1", "username": "fake"},
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+            }
+            msg.update(extra)
+            ids = self._ids.setdefault(str(channel_id), [])
+            i = bisect_right(ids, int(msg["id"]))
+            ids.insert(i, int(msg["id"]))
+            self._messages.setdefault(str(channel_id), []).insert(i, msg)
+        return msg
+
+    # ---------- HTTP ----------
+    def _rate_limit(self, channel_id: str) -> Tuple[bool, dict]:
+        """(erlaubt, Header) – ein Bucket je Channel wie bei der echten Route."""
+        now = time.time()
+        with self._lock:
+            self.requests += 1
+            reset_at, remaining = self._buckets.get(channel_id, (0.0, self.bucket_limit))
+            if now >= reset_at:
+                reset_at, remaining = now + self.bucket_reset, self.bucket_limit
+            allowed = self.bucket_limit <= 0 or remaining > 0
+            if allowed and self.bucket_limit > 0:
+                remaining -= 1
+            if allowed and self.rate_429 > 0 and self._rnd.random() < self.rate_429:
+                allowed = False
+            self._buckets[channel_id] = (reset_at, remaining)
+            if not allowed:
+                self.served_429 += 1
+        headers = {}
+        if self.bucket_limit > 0:
+            headers = {
+                "X-RateLimit-Limit": self.bucket_limit,
+                "X-RateLimit-Remaining": remaining,
+                "X-RateLimit-Reset": f"{reset_at:.3f}",
+                "X-RateLimit-Reset-After": f"{max(0.0, reset_at - now):.3f}",
+                "X-RateLimit-Bucket": f"fake-{channel_id}",
+            }
+        if not allowed:
+            headers["X-RateLimit-Scope"] = "user"
+            exhausted = self.bucket_limit > 0 and remaining <= 0
+            headers["Retry-After"] = f"{max(0.0, reset_at - now):.3f}" if exhausted else "0.2"
+        return allowed, headers
+
+    def _handle_get(self, h: BaseHTTPRequestHandler):
+        u = urlsplit(h.path)
+        parts = u.path.strip("/").split("/")   # api, v10, channels, {id}, messages
+        if len(parts) != 5 or parts[2] != "channels" or parts[4] != "messages":
+            _reply(h, 404, {"message": "404: Not Found", "code": 0})
+            return
+        channel_id = parts[3]
+        allowed, headers = self._rate_limit(channel_id)
+        if not allowed:
+            _reply(h, 429, {"message": "You are being rate limited.", "global": False,
+                            "retry_after": float(headers["Retry-After"])}, headers)
+            return
+        q = parse_qs(u.query)
+        limit = max(1, min(int((q.get("limit") or ["50"])[0]), 100))
+        after = q.get("after")
+        with self._lock:
+            msgs = self._messages.get(channel_id, [])
+            if after:
+                i = bisect_right(self._ids.get(channel_id, []), int(after[0]))
+                page = msgs[i:i + limit]       # älteste nach `after` ...
+            else:
+                page = msgs[-limit:]           # ... bzw. die neuesten
+            body = page[::-1]                  # Discord liefert neueste zuerst
+        _reply(h, 200, body, headers)
+
+
+# =========================
+# Altrady
+# =========================
+class FakeAltrady(_Base):
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 50.0,
+                 jitter_ms: float = 0.0, status_mix: str = "204:1", seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.status_mix = parse_status_mix(status_mix)
+        self.orders: List[dict] = []   # {"received_at", "responded_at", "path", "status", "payload"}
+        self.heads = 0
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # Keep-Alive wie beim echten Endpoint
+
+            def do_POST(self):
+                fake._handle_post(self)
+
+            def do_HEAD(self):
+                with fake._lock:
+                    fake.heads += 1
+                _reply(self, 200)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(Handler, host, port, "fake-altrady")
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _pick(self) -> Tuple[int, float]:
+        with self._lock:
+            codes, weights = zip(*self.status_mix)
+            status = self._rnd.choices(codes, weights)[0]
+            delay = max(0.0, self.latency_ms + self._rnd.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+        return status, delay
+
+    def _handle_post(self, h: BaseHTTPRequestHandler):
+        received = time.time()
+        raw = h.rfile.read(int(h.headers.get("Content-Length") or 0))
+        try:
+            payload = json.loads(raw or b"null")
+        except ValueError:
+            payload = None
+        status, delay = self._pick()
+        time.sleep(delay)
+        with self._lock:
+            self.orders.append({"received_at": received, "responded_at": time.time(), "path": h.path,
+                                "status": status, "payload": payload})
+        if status == 429:
+            _reply(h, 429, {"retry_after": 0.5})
+        elif status == 204:
+            _reply(h, 204)
+        elif status < 300:
+            _reply(h, status, {"status": "ok"})
+        else:
+            _reply(h, status, {"error": f"fake {status}"})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Lokale Stand-ins: Discord REST + Altrady-Webhook")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--discord-port", type=int, default=8780)
+    ap.add_argument("--altrady-port", type=int, default=8781)
+    ap.add_argument("--channel", default="123", help="channel_id für Messages aus stdin")
+    ap.add_argument("--bucket-limit", type=int, default=5, help="Discord: Requests je Bucket-Fenster (0 = unbegrenzt)")
+    ap.add_argument("--bucket-reset", type=float, default=5.0, help="Discord: Fensterlänge in s")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="Discord: zusätzliche zufällige 429-Quote")
+    ap.add_argument("--latency-ms", type=float, default=50.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--status-mix", default="204:1", help="Altrady: z.B. 204:0.9,429:0.05,500:0.05")
+    args = ap.parse_args()
+
+    discord = FakeDiscord(args.host, args.discord_port, args.bucket_limit, args.bucket_reset, args.rate_429).start()
+    altrady = FakeAltrady(args.host, args.altrady_port, args.latency_ms, args.jitter_ms, args.status_mix).start()
+    print(f"🧪 Fake Discord: DISCORD_API_BASE={discord.base_url}")
+    print(f"🧪 Fake Altrady: ALTRADY_WEBHOOK_URL={altrady.base_url}/hook")
+    print("Eingabe: Text -> Message in --channel ('\\n' = Zeilenumbruch) | /orders | /quit")
+    try:
+        for line in sys.stdin:
+            line = line.rstrip("\n")
+            if line == "/quit":
+                break
+            if line == "/orders":
+                for o in altrady.orders[-20:]:
+                    print(f"  {o['status']} {o['path']} {json.dumps(o['payload'])[:120]}")
+            elif line:
+                m = discord.push_message(args.channel, line.replace("\\n", "\n"))
+                print(f"→ Message id={m['id']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        discord.stop()
+        altrady.stop()
+
+
+if __name__ == "__main__":
+    main()
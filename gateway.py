@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Discord Gateway (Websocket) Client – event-getriebene Alternative zum REST-Poll.
+
+Nur Standardbibliothek: minimaler RFC-6455 Client (Text-Frames, Ping/Pong,
+Close) plus Gateway-Protokoll mit Heartbeat, Identify, Resume und Reconnect.
+MESSAGE_CREATE Events der beobachteten Channels landen in `DiscordGateway.events`.
+"""
+
+import os, sys, ssl, json, time, base64, struct, random, socket, hashlib, threading, queue
+from typing import Optional, Iterable
+from urllib.parse import urlsplit
+
+from log import LOG
+
+DEFAULT_GATEWAY_URL = "wss://gateway.discord.gg/?v=10&encoding=json"
+
+# GUILDS | GUILD_MESSAGES | MESSAGE_CONTENT
+DEFAULT_INTENTS = (1 << 0) | (1 << 9) | (1 << 15)
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG, OP_CONT = 0x1, 0x2, 0x8, 0x9, 0xA, 0x0
+
+# Gateway Opcodes
+GW_DISPATCH, GW_HEARTBEAT, GW_IDENTIFY, GW_RESUME = 0, 1, 2, 6
+GW_RECONNECT, GW_INVALID_SESSION, GW_HELLO, GW_HEARTBEAT_ACK = 7, 9, 10, 11
+
+# Close-Codes, bei denen ein Reconnect sinnlos ist (Token/Intents falsch)
+FATAL_CLOSE_CODES = {4004, 4010, 4011, 4012, 4013, 4014}
+# Close-Codes, nach denen die Session nicht mehr resumed werden kann
+NO_RESUME_CLOSE_CODES = {4007, 4009}
+
+
+class WebSocketClosed(Exception):
+    def __init__(self, code: Optional[int] = None, reason: str = ""):
+        super().__init__(f"closed ({code}) {reason}".strip())
+        self.code = code
+        self.reason = reason
+
+
+# =========================
+# Websocket Framing
+# =========================
+def ws_accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+def ws_send_frame(sock, opcode: int, payload: bytes, mask: bool):
+    head = bytes([0x80 | opcode])
+    n = len(payload)
+    mbit = 0x80 if mask else 0
+    if n < 126:
+        head += bytes([mbit | n])
+    elif n < 65536:
+        head += bytes([mbit | 126]) + struct.pack("!H", n)
+    else:
+        head += bytes([mbit | 127]) + struct.pack("!Q", n)
+    if mask:
+        key = os.urandom(4)
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+        head += key
+    sock.sendall(head + payload)
+
+def _read_exact(rfile, n: int) -> bytes:
+    data = rfile.read(n)
+    if data is None or len(data) < n:
+        raise WebSocketClosed(None, "EOF")
+    return data
+
+def ws_read_frame(rfile):
+    """Liest einen Frame -> (fin, opcode, payload). Maskierte Frames werden entmaskiert."""
+    b1, b2 = _read_exact(rfile, 2)
+    fin, opcode = bool(b1 & 0x80), b1 & 0x0F
+    masked, n = bool(b2 & 0x80), b2 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", _read_exact(rfile, 2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", _read_exact(rfile, 8))[0]
+    key = _read_exact(rfile, 4) if masked else None
+    payload = _read_exact(rfile, n) if n else b""
+    if key:
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return fin, opcode, payload
+
+def close_payload(code: int, reason: str = "") -> bytes:
+    return struct.pack("!H", code) + reason.encode("utf-8")
+
+
+class WebSocket:
+    """Minimaler Websocket-Client (ws:// und wss://), thread-sicheres Senden."""
+
+    def __init__(self, sock, rfile):
+        self.sock = sock
+        self.rfile = rfile
+        self._send_lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, url: str, timeout: float = 15.0) -> "WebSocket":
+        u = urlsplit(url)
+        secure = u.scheme == "wss"
+        port = u.port or (443 if secure else 80)
+        sock = socket.create_connection((u.hostname, port), timeout=timeout)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=u.hostname)
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        req = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {u.hostname}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        sock.sendall(req.encode())
+        rfile = sock.makefile("rb")
+        status = rfile.readline().decode("latin-1")
+        headers = {}
+        while True:
+            line = rfile.readline().decode("latin-1").strip()
+            if not line:
+                break
+            k, _, v = line.partition(":")
+            headers[k.strip().lower()] = v.strip()
+        if " 101 " not in status or headers.get("sec-websocket-accept") != ws_accept_key(key):
+            sock.close()
+            raise ConnectionError(f"Websocket-Handshake fehlgeschlagen: {status.strip()}")
+        return cls(sock, rfile)
+
+    def settimeout(self, timeout: Optional[float]):
+        self.sock.settimeout(timeout)
+
+    def send_text(self, text: str):
+        with self._send_lock:
+            ws_send_frame(self.sock, OP_TEXT, text.encode("utf-8"), mask=True)
+
+    def send_json(self, obj: dict):
+        self.send_text(json.dumps(obj))
+
+    def recv_text(self) -> str:
+        buf, first_op = b"", None
+        while True:
+            fin, opcode, payload = ws_read_frame(self.rfile)
+            if opcode == OP_PING:
+                with self._send_lock:
+                    ws_send_frame(self.sock, OP_PONG, payload, mask=True)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                code = struct.unpack("!H", payload[:2])[0] if len(payload) >= 2 else None
+                raise WebSocketClosed(code, payload[2:].decode("utf-8", "replace"))
+            if opcode != OP_CONT:
+                first_op = opcode
+            buf += payload
+            if fin:
+                if first_op == OP_BINARY:
+                    raise WebSocketClosed(None, "binary frames (compression) nicht unterstützt")
+                return buf.decode("utf-8")
+
+    def recv_json(self) -> dict:
+        return json.loads(self.recv_text())
+
+    def close(self, code: int = 1000):
+        try:
+            with self._send_lock:
+                ws_send_frame(self.sock, OP_CLOSE, close_payload(code), mask=True)
+        except Exception:
+            pass
+        try:
+            self.sock.close()
+        except Exception:
+            pass
+
+
+# =========================
+# Discord Gateway
+# =========================
+class DiscordGateway:
+    """
+    Hält eine Gateway-Verbindung offen (Thread) und legt MESSAGE_CREATE Events
+    der beobachteten Channels in `events` ab. Nach jedem (Re)Connect wird
+    `consume_resync()` einmal True -> Aufrufer holt Lücken per REST ab `last_id` nach.
+    """
+
+    def __init__(self, token: str, channel_ids: Iterable[str], url: str = DEFAULT_GATEWAY_URL,
+                 intents: int = DEFAULT_INTENTS, connect_timeout: float = 15.0):
+        self.token = token
+        self.channel_ids = {str(c) for c in channel_ids}
+        self.url = url
+        self.intents = intents
+        self.connect_timeout = connect_timeout
+        self.events: "queue.Queue[dict]" = queue.Queue()
+        self.connected = False
+        self.session_id: Optional[str] = None
+        self.resume_url: Optional[str] = None
+        self.seq: Optional[int] = None
+        self._ws: Optional[WebSocket] = None
+        self._stop = threading.Event()
+        self._resync = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fatal: Optional[str] = None
+
+    # ---------- Public ----------
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="discord-gateway", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws:
+            ws.close(1000)
+
+    def consume_resync(self) -> bool:
+        if self._resync.is_set():
+            self._resync.clear()
+            return True
+        return False
+
+    @property
+    def fatal_error(self) -> Optional[str]:
+        return self._fatal
+
+    # ---------- Intern ----------
+    def _identify_token(self) -> str:
+        t = self.token
+        for prefix in ("Bot ", "Bearer "):
+            if t.startswith(prefix):
+                return t[len(prefix):]
+        return t
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                self._serve_once()
+                backoff = 1.0
+            except WebSocketClosed as e:
+                if e.code in FATAL_CLOSE_CODES:
+                    self._fatal = f"Gateway Close {e.code}: {e.reason}"
+                    LOG.error("❌ Gateway deaktiviert, REST-Fallback", error=self._fatal)
+                    self.connected = False
+                    return
+                if e.code in NO_RESUME_CLOSE_CODES:
+                    self.session_id = None
+                if not self._stop.is_set():
+                    LOG.warning("⚠️ Gateway getrennt", error=str(e))
+            except Exception as e:
+                if not self._stop.is_set():
+                    LOG.warning("⚠️ Gateway getrennt", error=str(e))
+            finally:
+                self.connected = False
+                if self._ws:
+                    self._ws.close(4000)
+                    self._ws = None
+            if self._stop.wait(backoff + random.uniform(0, 1)):
+                break
+            backoff = min(backoff * 2, 60.0)
+
+    def _connect_url(self) -> str:
+        if self.session_id and self.resume_url:
+            query = urlsplit(self.url).query
+            return self.resume_url.rstrip("/") + "/" + (f"?{query}" if query else "")
+        return self.url
+
+    def _serve_once(self):
+        ws = WebSocket.connect(self._connect_url(), timeout=self.connect_timeout)
+        self._ws = ws
+        hello = ws.recv_json()
+        if hello.get("op") != GW_HELLO:
+            raise ConnectionError(f"Unerwartetes erstes Paket: op={hello.get('op')}")
+        interval = hello["d"]["heartbeat_interval"] / 1000.0
+        # Zombie-Erkennung: ohne Traffic über 2 Heartbeats gilt die Verbindung als tot
+        ws.settimeout(interval * 2 + 5)
+
+        acked = threading.Event()
+        acked.set()
+        alive = threading.Event()
+        alive.set()
+        hb = threading.Thread(target=self._heartbeat_loop, args=(ws, interval, acked, alive),
+                              name="discord-heartbeat", daemon=True)
+        hb.start()
+
+        try:
+            if self.session_id and self.seq is not None:
+                ws.send_json({"op": GW_RESUME, "d": {
+                    "token": self._identify_token(), "session_id": self.session_id, "seq": self.seq}})
+            else:
+                ws.send_json({"op": GW_IDENTIFY, "d": {
+                    "token": self._identify_token(),
+                    "intents": self.intents,
+                    "properties": {"os": sys.platform, "browser": "DiscordToAltrady", "device": "DiscordToAltrady"},
+                }})
+
+            while not self._stop.is_set():
+                pkt = ws.recv_json()
+                op = pkt.get("op")
+                if op == GW_DISPATCH:
+                    if pkt.get("s") is not None:
+                        self.seq = pkt["s"]
+                    self._on_dispatch(pkt.get("t"), pkt.get("d") or {})
+                elif op == GW_HEARTBEAT:
+                    ws.send_json({"op": GW_HEARTBEAT, "d": self.seq})
+                elif op == GW_HEARTBEAT_ACK:
+                    acked.set()
+                elif op == GW_RECONNECT:
+                    raise WebSocketClosed(4000, "reconnect angefordert")
+                elif op == GW_INVALID_SESSION:
+                    if not pkt.get("d"):
+                        self.session_id, self.seq = None, None
+                    alive.clear()
+                    time.sleep(random.uniform(1, 5))
+                    raise WebSocketClosed(4000, "invalid session")
+        finally:
+            alive.clear()
+
+    def _heartbeat_loop(self, ws: WebSocket, interval: float, acked: threading.Event, alive: threading.Event):
+        wait = interval * random.random()
+        while alive.is_set() and not self._stop.wait(wait):
+            if not alive.is_set():
+                return
+            if not acked.is_set():
+                LOG.warning("⚠️ Gateway: kein Heartbeat-ACK – Verbindung wird neu aufgebaut")
+                ws.close(4000)
+                return
+            acked.clear()
+            try:
+                ws.send_json({"op": GW_HEARTBEAT, "d": self.seq})
+            except Exception:
+                return
+            wait = interval
+
+    def _on_dispatch(self, t: Optional[str], d: dict):
+        if t == "READY":
+            self.session_id = d.get("session_id")
+            self.resume_url = d.get("resume_gateway_url")
+            self.connected = True
+            self._resync.set()
+            LOG.info("🔌 Gateway verbunden (READY)")
+        elif t == "RESUMED":
+            self.connected = True
+            self._resync.set()
+            LOG.info("🔌 Gateway fortgesetzt (RESUMED)")
+        elif t == "MESSAGE_CREATE":
+            if str(d.get("channel_id")) in self.channel_ids:
+                d["_received_at"] = time.time()
+                self.events.put(d)
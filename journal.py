@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dauerhaftes Journal (SQLite im WAL-Modus) für verarbeitete Messages, Signale und
+Dispatch-Ergebnisse je Account – Grundlage für Exactly-once-Dispatch über Restarts.
+
+Ablauf je Signal:
+  1. record_signal()   Message + Signal + je Account eine 'pending'-Zeile; wird SOFORT
+                       committet (fsync), bevor irgendein Webhook gepostet wird
+  2. record_outcome()  Ergebnis je Account ('ok' / 'failed' / 'stale' / 'circuit_open'), gepuffert
+  3. flush()           ein Commit (fsync) für alle gepufferten Zeilen: Ergebnisse,
+                       übersprungene Messages, State (Cursor, Cooldown)
+
+Nicht-Signale und State werden gesammelt und erst ab `batch_size` Zeilen bzw. nach
+`flush_seconds` geschrieben – ein Verlust beim Crash ist harmlos (Message wird erneut
+geprüft). Bleiben nach einem Crash 'pending'-Zeilen übrig, ist unklar, ob der Post raus
+ist: `pending()` liefert sie für die Recovery; Paare mit Status 'ok' werden nie erneut
+gesendet. Payloads (mit API-Secrets) landen nicht im Journal, nur das Signal.
+"""
+
+import json, time, sqlite3, threading
+from pathlib import Path
+from typing import Optional, List, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    message_id INTEGER PRIMARY KEY,
+    channel_id TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    signal     TEXT,
+    ts         REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dispatches (
+    message_id  INTEGER NOT NULL,
+    account     TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    http_status INTEGER,
+    error       TEXT,
+    ts          REAL NOT NULL,
+    PRIMARY KEY (message_id, account)
+);
+CREATE INDEX IF NOT EXISTS dispatches_status ON dispatches(status);
+CREATE INDEX IF NOT EXISTS messages_ts ON messages(ts);
+CREATE TABLE IF NOT EXISTS kv (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class Journal:
+    def __init__(self, path: Path, batch_size: int = 100, flush_seconds: float = 2.0,
+                 retention_seconds: float = 7 * 86400, compact_seconds: float = 3600):
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.retention_seconds = retention_seconds
+        self.compact_seconds = compact_seconds
+        self._lock = threading.RLock()
+        self._buffer: List[Tuple[str, tuple]] = []
+        self._buffered_ids = set()
+        self._buffered_since = 0.0
+        self._last_compact = time.time()
+        self.commits = 0
+
+        self._db = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        # auto_vacuum greift nur für neue Dateien (vor dem ersten CREATE TABLE)
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")   # jeder Commit = fsync des WAL
+        self._db.executescript(SCHEMA)
+
+    # ---------- Schreiben ----------
+    def _queue(self, sql: str, params: tuple):
+        if not self._buffer:
+            self._buffered_since = time.time()
+        self._buffer.append((sql, params))
+
+    def _commit(self, extra: List[Tuple[str, tuple]] = ()):
+        ops = self._buffer + list(extra)
+        if not ops:
+            return
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in ops:
+                self._db.execute(sql, params)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._buffer = []
+        self._buffered_ids.clear()
+        self.commits += 1
+
+    def record_message(self, message_id: int, channel_id: str, status: str):
+        """Verarbeitete Message ohne Dispatch (Cooldown, Pre-Filter, kein Signal) – gepuffert."""
+        with self._lock:
+            self._buffered_ids.add(int(message_id))
+            self._queue("INSERT OR IGNORE INTO messages(message_id, channel_id, status, signal, ts) VALUES (?,?,?,?,?)",
+                        (int(message_id), str(channel_id), status, None, time.time()))
+
+    def record_signal(self, message_id: int, channel_id: str, sig: dict, accounts: List[str]):
+        """Signal + 'pending' je Account, sofort committet – muss VOR dem Dispatch stehen."""
+        now = time.time()
+        ops = [("INSERT OR IGNORE INTO messages(message_id, channel_id, status, signal, ts) VALUES (?,?,?,?,?)",
+                (int(message_id), str(channel_id), "signal", json.dumps(sig), now))]
+        ops += [("INSERT OR IGNORE INTO dispatches(message_id, account, status, ts) VALUES (?,?,?,?)",
+                 (int(message_id), acc, "pending", now)) for acc in accounts]
+        with self._lock:
+            self._commit(ops)
+
+    def record_outcome(self, message_id: int, account: str, status: str,
+                       http_status: Optional[int] = None, error: Optional[str] = None):
+        with self._lock:
+            self._queue("UPDATE dispatches SET status=?, http_status=?, error=?, ts=? WHERE message_id=? AND account=?",
+                        (status, http_status, error, time.time(), int(message_id), account))
+
+    def put_state(self, state: dict):
+        with self._lock:
+            self._queue("INSERT OR REPLACE INTO kv(key, value) VALUES ('state', ?)", (json.dumps(state),))
+
+    def flush(self):
+        with self._lock:
+            self._commit()
+            if self.compact_seconds > 0 and time.time() - self._last_compact >= self.compact_seconds:
+                self.compact()
+
+    def maybe_flush(self):
+        with self._lock:
+            if self._buffer and (len(self._buffer) >= self.batch_size
+                                 or time.time() - self._buffered_since >= self.flush_seconds):
+                self.flush()
+
+    # ---------- Lesen / Recovery ----------
+    def seen(self, message_id: int) -> bool:
+        """Message schon verarbeitet (committet oder im Puffer)?"""
+        with self._lock:
+            if int(message_id) in self._buffered_ids:
+                return True
+            return self._db.execute("SELECT 1 FROM messages WHERE message_id=?", (int(message_id),)).fetchone() is not None
+
+    def load_state(self) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM kv WHERE key='state'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pending(self) -> List[Tuple[int, str, dict, List[str]]]:
+        """(message_id, channel_id, signal, [accounts]) mit offenem Dispatch-Ergebnis."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT m.message_id, m.channel_id, m.signal, d.account FROM dispatches d "
+                "JOIN messages m ON m.message_id = d.message_id WHERE d.status='pending' ORDER BY m.message_id"
+            ).fetchall()
+        out = {}
+        for mid, cid, sig, acc in rows:
+            out.setdefault(mid, (mid, cid, json.loads(sig or "{}"), []))[3].append(acc)
+        return list(out.values())
+
+    def recent_signals(self, since: float) -> List[Tuple[float, dict]]:
+        """(ts, signal) aller Signale seit `since` mit mindestens einem 'ok'-Dispatch, älteste zuerst.
+
+        Signale, die auf keinem Account durchgingen, zählen wie im Live-Betrieb nicht als Duplikat."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT m.ts, m.signal FROM messages m WHERE m.status='signal' AND m.ts >= ? AND EXISTS "
+                "(SELECT 1 FROM dispatches d WHERE d.message_id = m.message_id AND d.status='ok') ORDER BY m.ts",
+                (since,)
+            ).fetchall()
+        return [(ts, json.loads(sig)) for ts, sig in rows if sig]
+
+    def buffered(self) -> int:
+        """Anzahl gepufferter, noch nicht committeter Zeilen."""
+        with self._lock:
+            return len(self._buffer)
+
+    def counts(self) -> dict:
+        with self._lock:
+            msgs = self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+            disp = dict(self._db.execute("SELECT status, COUNT(*) FROM dispatches GROUP BY status").fetchall())
+        return {"messages": msgs, "dispatches": disp, "buffered": len(self._buffer), "commits": self.commits}
+
+    # ---------- Compaction ----------
+    def compact(self):
+        """Löscht abgeschlossene Einträge älter als die Retention und gibt WAL/Seiten frei."""
+        with self._lock:
+            self._commit()
+            cutoff = time.time() - self.retention_seconds
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute(
+                "DELETE FROM messages WHERE ts < ? AND message_id NOT IN "
+                "(SELECT message_id FROM dispatches WHERE status='pending')", (cutoff,))
+            self._db.execute("DELETE FROM dispatches WHERE message_id NOT IN (SELECT message_id FROM messages)")
+            self._db.execute("COMMIT")
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._db.execute("PRAGMA incremental_vacuum")
+            self._last_compact = time.time()
+
+    def close(self):
+        with self._lock:
+            self._commit()
+            self._db.close()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lasttest: startet FakeDiscord + FakeAltrady (fake_servers.py), den Bot (main.py) als
+eigenen Prozess dagegen und speist Messages mit fester Rate ein.
+
+    python loadtest.py --rate 5 --duration 30 --accounts 2
+    python loadtest.py --rate 20 --status-mix 204:0.9,429:0.05,500:0.05 --rate-429 0.05 --max-dropped 5
+    python loadtest.py --rate 10 --max-p99-ms 3000      # CI: Exit 1 bei p99 über 3 s
+
+Erwartete Orders = Signale (gleiche Pipeline wie replay.py, mit derselben ENV wie der Bot
+inkl. --env/CONFIG_FILE) × Accounts. Eine Order zählt
+als angenommen, wenn FakeAltrady mit 2xx geantwortet hat; Zuordnung zur Message über
+(Base, signal_price). Bericht: Ende-zu-Ende-Latenz (Discord-Post laut Snowflake bis Antwort
+des Webhooks) als Perzentile, fehlende und doppelte Orders, 429/5xx-Zählung.
+Exit 1 bei doppelten/unerwarteten Orders, mehr fehlenden als --max-dropped oder p99 über --max-p99-ms.
+"""
+
+import os, sys, json, time, random, signal, argparse, tempfile, subprocess
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fake_servers import FakeDiscord, FakeAltrady
+from metrics import snowflake_time
+from parser_check import gen_signal_text, gen_chatter
+
+HERE = Path(__file__).resolve().parent
+CHANNEL = "900000000000000001"
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, int(round(q / 100.0 * len(s) + 0.5)) - 1))]
+
+def bot_env(tmp: Path, discord: FakeDiscord, poll_seconds: int, extra: Dict[str, str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DISCORD_TOKEN": "loadtest", "CHANNEL_ID": CHANNEL, "CHANNEL_IDS": "",
+        "DISCORD_API_BASE": discord.base_url, "INGEST_MODE": "poll",
+        "ACCOUNTS_FILE": str(tmp / "accounts.json"),
+        "JOURNAL_FILE": str(tmp / "journal.db"), "STATE_FILE": str(tmp / "state.json"),
+        "POLL_BASE_SECONDS": str(poll_seconds), "POLL_MIN_SECONDS": str(poll_seconds),
+        "POLL_MAX_SECONDS": str(poll_seconds), "POLL_OFFSET_SECONDS": "0", "POLL_JITTER_MAX": "0",
+        # Jede Message ist ein eigenes Signal: Dedup/Cooldown würden erwartete Orders verschlucken
+        "DEDUP_WINDOW_SECONDS": "0", "COOLDOWN_SECONDS": "0",
+        "METRICS_PORT": "0", "LOG_FORMAT": "json", "PYTHONUNBUFFERED": "1",
+    })
+    # Pfade relativ zum Aufrufer – der Bot läuft in `tmp`
+    env.update({k: str(Path(v).resolve()) if k.endswith("_FILE") and v and not Path(v).is_absolute() else v
+                for k, v in extra.items()})
+    return env
+
+def load_pipeline(env: Dict[str, str]):
+    """replay (und damit main) mit genau der ENV des Bots importieren: Erwartungen aus derselben Konfiguration."""
+    os.environ.update(env)
+    import replay
+    return replay.process_message
+
+def write_accounts(path: Path, altrady: FakeAltrady, n: int):
+    accounts = [{"name": f"load{i}", "webhook_url": f"{altrady.base_url}/hook/{i}", "api_key": f"load{i}",
+                 "api_secret": "secret", "exchange": "BYBI", "leverage": 5} for i in range(1, n + 1)]
+    path.write_text(json.dumps({"accounts": accounts}, indent=2), encoding="utf-8")
+
+def wait_for(cond, timeout: float, step: float = 0.05) -> bool:
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(step)
+    return cond()
+
+# =========================
+# Einspeisen
+# =========================
+def publish(discord: FakeDiscord, process_message, rate: float, duration: float, signal_ratio: float,
+            seed: int) -> Dict[Tuple[str, float], List[int]]:
+    """Messages mit fester Rate; Rückgabe: (Base, Entry) -> [Message-IDs] der erwarteten Signale."""
+    rnd = random.Random(seed)
+    expected: Dict[Tuple[str, float], List[int]] = defaultdict(list)
+    n = int(rate * duration)
+    t0 = time.time()
+    for i in range(n):
+        time.sleep(max(0.0, t0 + i / rate - time.time()))
+        text = gen_signal_text(rnd) if rnd.random() < signal_ratio else gen_chatter(rnd, rnd.randint(1, 3))
+        m = discord.push_message(CHANNEL, text)
+        sig, _ = process_message(m)
+        if sig:
+            expected[(sig["base"], sig["entry"])].append(int(m["id"]))
+    return expected
+
+# =========================
+# Auswertung
+# =========================
+def evaluate(expected: Dict[Tuple[str, float], List[int]], orders: List[dict], accounts: int) -> dict:
+    accepted: Dict[Tuple[int, str], List[float]] = defaultdict(list)
+    statuses = Counter()
+    unexpected = 0
+    for o in orders:
+        statuses[o["status"]] += 1
+        if not 200 <= o["status"] < 300:
+            continue
+        p = o["payload"] or {}
+        key = (str(p.get("symbol", "")).rsplit("_", 1)[-1], p.get("signal_price"))
+        mids = expected.get(key)
+        if not mids:
+            unexpected += 1
+            continue
+        acc = p.get("api_key")
+        # Gleicher Key bei mehreren Messages (selten): erste Message ohne Order dieses Accounts
+        mid = next((m for m in mids if not accepted.get((m, acc))), mids[0])
+        accepted[(mid, acc)].append(o["responded_at"])
+
+    signals = sum(len(v) for v in expected.values())
+    latencies = [(min(ts) - snowflake_time(mid)) * 1000.0 for (mid, _), ts in accepted.items()]
+    return {
+        "signals": signals,
+        "expected_orders": signals * accounts,
+        "delivered": len(accepted),
+        "dropped": signals * accounts - len(accepted),
+        "duplicated": sum(len(ts) - 1 for ts in accepted.values()),
+        "unexpected": unexpected,
+        "statuses": dict(statuses),
+        "latency_ms": {f"p{q:g}": percentile(latencies, q) for q in (50, 90, 99, 100)},
+    }
+
+def report(r: dict, discord: FakeDiscord, messages: int, seconds: float) -> str:
+    lat = " | ".join(f"{k} {v:,.0f}" if v is not None else f"{k} –" for k, v in r["latency_ms"].items())
+    return "\n".join([
+        f"🧪 Lasttest: {messages} Messages in {seconds:.1f}s, {r['signals']} Signale, {r['expected_orders']} Orders erwartet",
+        f"   Orders: geliefert {r['delivered']} | fehlend {r['dropped']} | doppelt {r['duplicated']} | unerwartet {r['unexpected']}",
+        f"   E2E-Latenz (ms): {lat}",
+        f"   Altrady-Status: {', '.join(f'{k}×{v}' for k, v in sorted(r['statuses'].items())) or '–'}",
+        f"   Discord: {discord.requests} Requests, {discord.served_429} × 429",
+    ])
+
+def main_cli():
+    ap = argparse.ArgumentParser(description="Lasttest gegen lokale Discord-/Altrady-Stand-ins")
+    ap.add_argument("--rate", type=float, default=5.0, help="Messages pro Sekunde")
+    ap.add_argument("--duration", type=float, default=20.0, help="Dauer des Einspeisens in s")
+    ap.add_argument("--signal-ratio", type=float, default=0.3, help="Anteil Signale an allen Messages")
+    ap.add_argument("--accounts", type=int, default=2)
+    ap.add_argument("--poll", type=int, default=1, help="Poll-Periode des Bots in s")
+    ap.add_argument("--bucket-limit", type=int, default=5, help="Discord: Requests je Bucket-Fenster (0 = unbegrenzt)")
+    ap.add_argument("--bucket-reset", type=float, default=5.0)
+    ap.add_argument("--rate-429", type=float, default=0.0, help="Discord: zusätzliche zufällige 429-Quote")
+    ap.add_argument("--latency-ms", type=float, default=50.0, help="Altrady: Antwortzeit")
+    ap.add_argument("--jitter-ms", type=float, default=20.0)
+    ap.add_argument("--status-mix", default="204:1", help="Altrady: z.B. 204:0.9,429:0.05,500:0.05")
+    ap.add_argument("--drain", type=float, default=30.0, help="max. Wartezeit auf ausstehende Orders nach dem Einspeisen")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--max-dropped", type=int, default=0, help="erlaubte fehlende Orders")
+    ap.add_argument("--max-p99-ms", type=float, default=0.0, help="Exit 1, wenn p99 darüber liegt (0 = aus)")
+    ap.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="zusätzliche ENV für den Bot")
+    ap.add_argument("--json", type=Path, help="Ergebnis zusätzlich als JSON schreiben")
+    args = ap.parse_args()
+
+    discord = FakeDiscord(bucket_limit=args.bucket_limit, bucket_reset=args.bucket_reset,
+                          rate_429=args.rate_429, seed=args.seed).start()
+    altrady = FakeAltrady(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          status_mix=args.status_mix, seed=args.seed).start()
+    discord.push_message(CHANNEL, "start")   # Baseline: der Bot setzt seinen Cursor hierauf
+
+    tmp = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    write_accounts(tmp / "accounts.json", altrady, args.accounts)
+    extra = dict(kv.split("=", 1) for kv in args.env)
+    env = bot_env(tmp, discord, args.poll, extra)
+    process_message = load_pipeline(env)
+    log_path = tmp / "bot.log"
+    with open(log_path, "w", encoding="utf-8") as log:
+        bot = subprocess.Popen([sys.executable, str(HERE / "main.py")], cwd=str(tmp), stdout=log,
+                               stderr=subprocess.STDOUT, env=env)
+        try:
+            # Baseline-Fetch + erster Poll
+            if not wait_for(lambda: discord.requests >= 2 or bot.poll() is not None, 30):
+                print(f"❌ Bot pollt nicht (Log: {log_path})")
+                return 1
+            if bot.poll() is not None:
+                print(f"❌ Bot beendet (Exit {bot.returncode}), Log: {log_path}")
+                return 1
+
+            t0 = time.time()
+            expected = publish(discord, process_message, args.rate, args.duration, args.signal_ratio, args.seed)
+            want = sum(len(v) for v in expected.values()) * args.accounts
+            wait_for(lambda: evaluate(expected, list(altrady.orders), args.accounts)["delivered"] >= want,
+                     args.drain, step=0.25)
+            seconds = time.time() - t0
+        finally:
+            bot.send_signal(signal.SIGINT)
+            try:
+                bot.wait(15)
+            except subprocess.TimeoutExpired:
+                bot.kill()
+            discord.stop()
+            altrady.stop()
+
+    r = evaluate(expected, list(altrady.orders), args.accounts)
+    print(report(r, discord, int(args.rate * args.duration), seconds))
+    print(f"   Bot-Log: {log_path}")
+    if args.json:
+        args.json.write_text(json.dumps(r, indent=2) + "\n", encoding="utf-8")
+
+    p99 = r["latency_ms"]["p99"]
+    failures = []
+    if r["duplicated"] or r["unexpected"]:
+        failures.append(f"{r['duplicated']} doppelte / {r['unexpected']} unerwartete Orders")
+    if r["dropped"] > args.max_dropped:
+        failures.append(f"{r['dropped']} fehlende Orders (erlaubt {args.max_dropped})")
+    if args.max_p99_ms > 0 and (p99 is None or p99 > args.max_p99_ms):
+        failures.append(f"p99 {p99 or 0:,.0f} ms > {args.max_p99_ms:,.0f} ms")
+    if failures:
+        print("❌ " + " | ".join(failures))
+        return 1
+    print("✅ Lasttest bestanden")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Strukturiertes Logging ohne Abhängigkeiten, das den Hot-Path nie auf I/O warten lässt.
+
+Ein Log-Aufruf legt nur einen Eintrag in eine begrenzte Queue (put_nowait); Formatieren
+(JSON-Lines oder Text) und Schreiben übernimmt ein Hintergrund-Thread. Ist die Queue voll
+(Log-Senke hängt), werden Zeilen verworfen und gezählt statt zu blockieren.
+
+    LOG.configure(level="info", fmt="json")
+    LOG.info("Fan-out fertig", ok=2, total=2, ms=41.3)
+    LOG.info("Warte auf Signale...", every=300)    # höchstens alle 300 s, Rest wird gezählt
+    LOG.error("Fehler", channel="123", error=str(e))
+
+JSON-Zeile: {"ts": "...", "level": "info", "msg": "...", <Felder>}
+"""
+
+import sys, json, time, queue, atexit, threading
+from datetime import datetime, timezone
+from typing import Dict, Optional, TextIO, Tuple
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+_STOP = object()
+
+
+class Logger:
+    def __init__(self, level: str = "info", fmt: str = "json", queue_size: int = 10000,
+                 stream: Optional[TextIO] = None):
+        self.level = LEVELS.get(level, 20)
+        self.fmt = fmt
+        self.stream = stream
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._repeat: Dict[str, Tuple[float, int]] = {}   # key -> (zuletzt geschrieben, unterdrückt seitdem)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, level: Optional[str] = None, fmt: Optional[str] = None, queue_size: Optional[int] = None):
+        if level is not None:
+            self.level = LEVELS.get(level.strip().lower(), 20)
+        if fmt is not None:
+            self.fmt = "text" if fmt.strip().lower() == "text" else "json"
+        if queue_size is not None and self._thread is None:
+            self._queue = queue.Queue(maxsize=max(1, queue_size))
+
+    # ---------- Aufrufer (nicht blockierend) ----------
+    def log(self, level: str, msg: str, every: float = 0, key: Optional[str] = None, **fields):
+        """`every` > 0: gleiche Zeile (`key`, sonst `msg`) höchstens alle `every` Sekunden."""
+        if LEVELS.get(level, 20) < self.level:
+            return
+        now = time.time()
+        if every > 0:
+            k = key or msg
+            with self._lock:
+                last, suppressed = self._repeat.get(k, (0.0, 0))
+                if now - last < every:
+                    self._repeat[k] = (last, suppressed + 1)
+                    return
+                self._repeat[k] = (now, 0)
+            if suppressed:
+                fields["suppressed"] = suppressed
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait((now, level, msg, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    def debug(self, msg: str, **fields):
+        self.log("debug", msg, **fields)
+
+    def info(self, msg: str, **fields):
+        self.log("info", msg, **fields)
+
+    def warning(self, msg: str, **fields):
+        self.log("warning", msg, **fields)
+
+    def error(self, msg: str, **fields):
+        self.log("error", msg, **fields)
+
+    # ---------- Writer-Thread ----------
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _format(self, ts: float, level: str, msg: str, fields: dict) -> str:
+        if self.fmt == "text":
+            extra = " ".join(f"{k}={v}" for k, v in fields.items())
+            return msg + (f" [{extra}]" if extra else "")
+        rec = {"ts": datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds"),
+               "level": level, "msg": msg}
+        rec.update(fields)
+        return json.dumps(rec, ensure_ascii=False, default=str)
+
+    def _run(self):
+        reported = 0
+        while True:
+            items = [self._queue.get()]
+            try:
+                while len(items) < 512:
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            stop = any(it is _STOP for it in items)
+            lines = [self._format(*it) for it in items if it is not _STOP]
+            if self.dropped > reported:
+                lines.append(self._format(time.time(), "warning", "Log-Queue voll – Zeilen verworfen",
+                                          {"dropped": self.dropped - reported}))
+                reported = self.dropped
+            try:
+                out = self.stream or sys.stdout
+                out.write("\n".join(lines) + "\n" if lines else "")
+                out.flush()
+            except Exception:
+                pass
+            if stop:
+                return
+
+    def close(self, timeout: float = 5.0):
+        """Restliche Zeilen schreiben (Shutdown/atexit)."""
+        t = self._thread
+        if t is None or not t.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        t.join(timeout)
+        self._thread = None
+
+
+LOG = Logger()
+atexit.register(LOG.close)
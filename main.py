@@ -1,20 +1,40 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, re, sys, time, json, traceback, html, random
-from datetime import datetime
+import os, re, sys, time, json, traceback, html, random, queue, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Iterator
+from urllib.parse import urlsplit
 import requests
-from dotenv import load_dotenv
-
-load_dotenv()
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv, find_dotenv
+try:
+    import orjson   # optional: schnelleres Decoding der Discord-Seiten
+except ImportError:
+    orjson = None
+
+from signal_parser import SignalScanner, casefold_ascii
+from config import TradingConfig, ConfigReloader, config_env
+from journal import Journal
+from metrics import REGISTRY, snowflake_time, time_snowflake, serve as serve_metrics
+from log import LOG
+from profiling import Profiler
+
+_PROCESS_ENV = dict(os.environ)   # vor load_dotenv: echte Prozess-ENV, oberste Ebene für CONFIG (siehe config_env)
+DOTENV_FILE = find_dotenv()
+load_dotenv(DOTENV_FILE)
 
 # =========================
 # ENVs
 # =========================
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN", "").strip()
 CHANNEL_ID    = os.getenv("CHANNEL_ID", "").strip()
+# Mehrere Channels (Komma-getrennt), zusätzlich zu CHANNEL_ID
+CHANNEL_IDS   = list(dict.fromkeys(
+    c.strip() for c in (CHANNEL_ID + "," + os.getenv("CHANNEL_IDS", "")).split(",") if c.strip()
+))
 
 # Webhook #1
 ALTRADY_WEBHOOK_URL   = os.getenv("ALTRADY_WEBHOOK_URL", "").strip()
@@ -22,138 +42,454 @@ ALTRADY_API_KEY       = os.getenv("ALTRADY_API_KEY", "").strip()
 ALTRADY_API_SECRET    = os.getenv("ALTRADY_API_SECRET", "").strip()
 ALTRADY_EXCHANGE      = os.getenv("ALTRADY_EXCHANGE", "BYBI").strip()
 
-# Optionaler Webhook #2 (eigene Creds/Exchange)
-ALTRADY_WEBHOOK_URL_2 = os.getenv("ALTRADY_WEBHOOK_URL_2", "").strip()
-ALTRADY_API_KEY_2     = os.getenv("ALTRADY_API_KEY_2", "").strip()
-ALTRADY_API_SECRET_2  = os.getenv("ALTRADY_API_SECRET_2", "").strip()
-ALTRADY_EXCHANGE_2    = os.getenv("ALTRADY_EXCHANGE_2", "").strip()
-
-QUOTE = os.getenv("QUOTE", "USDT").strip().upper()
-
-# >>> NEU: getrennte Hebel je Webhook
-LEVERAGE_1 = int(os.getenv("LEVERAGE_1", "5"))
-LEVERAGE_2 = int(os.getenv("LEVERAGE_2", "10"))
-
-# TP-Split (30/30/30) + Runner (10% via SL/Trail abgesichert)
-TP1_PCT             = float(os.getenv("TP1_PCT", "30"))
-TP2_PCT             = float(os.getenv("TP2_PCT", "30"))
-TP3_PCT             = float(os.getenv("TP3_PCT", "30"))
-RUNNER_PCT          = float(os.getenv("RUNNER_PCT", "10"))
-
-# Trailing für Runner
-RUNNER_TRAILING_DIST = float(os.getenv("RUNNER_TRAILING_DIST", "1.5"))
-RUNNER_TP_MULTIPLIER = float(os.getenv("RUNNER_TP_MULTIPLIER", "1.5"))
-
-# Stop-Loss Modus
-# DCA1 (Default): SL = Distanz Entry->DCA1 + SL_BUFFER_PCT
-# DCA2:            SL = Distanz Entry->DCA2 + SL_BUFFER_PCT
-# FIXED:           SL = STOP_FIXED_PERCENTAGE (direkt, in %)
-STOP_PROTECTION_TYPE   = os.getenv("STOP_PROTECTION_TYPE", "FOLLOW_TAKE_PROFIT").strip().upper()
-BASE_STOP_MODE         = os.getenv("BASE_STOP_MODE", "DCA1").strip().upper()  # DCA1|DCA2|FIXED
-SL_BUFFER_PCT          = float(os.getenv("SL_BUFFER_PCT", "4.0"))
-STOP_FIXED_PERCENTAGE  = float(os.getenv("STOP_FIXED_PERCENTAGE", "9.0"))
-
-# >>> NEU: expliziter Order-Typ für SL (MARKET vs LIMIT)
-STOP_LOSS_ORDER_TYPE   = os.getenv("STOP_LOSS_ORDER_TYPE", "STOP_LOSS_MARKET").strip().upper()
-
-# DCA Größen (% der Start-Positionsgröße)
-DCA1_QTY_PCT        = float(os.getenv("DCA1_QTY_PCT", "150"))
-DCA2_QTY_PCT        = float(os.getenv("DCA2_QTY_PCT", "0"))    # Default: DCA1-only
-DCA3_QTY_PCT        = float(os.getenv("DCA3_QTY_PCT", "0"))    # Default: DCA1-only
-
-# Fallback DCA-Distanzen (vom Entry, in %)
-DCA1_DIST_PCT       = float(os.getenv("DCA1_DIST_PCT", "5"))
-DCA2_DIST_PCT       = float(os.getenv("DCA2_DIST_PCT", "10"))
-DCA3_DIST_PCT       = float(os.getenv("DCA3_DIST_PCT", "20"))
-
-# Limit-Order Ablauf (Zeit)
-ENTRY_EXPIRATION_MIN= int(os.getenv("ENTRY_EXPIRATION_MIN", "180"))
-
-# Entry-Condition
-ENTRY_WAIT_MINUTES         = int(os.getenv("ENTRY_WAIT_MINUTES", "0"))             # 0 = keine Zeit-Bedingung
-ENTRY_TRIGGER_BUFFER_PCT   = float(os.getenv("ENTRY_TRIGGER_BUFFER_PCT", "0.0"))   # Trigger-Puffer
-ENTRY_EXPIRATION_PRICE_PCT = float(os.getenv("ENTRY_EXPIRATION_PRICE_PCT", "0.0")) # vorzeitiges Expire nach Preis
-
-TEST_MODE           = os.getenv("TEST_MODE", "false").lower() == "true"    # Für Tests
-
-# Poll-Steuerung
-POLL_BASE_SECONDS   = int(os.getenv("POLL_BASE_SECONDS", "60"))
-POLL_OFFSET_SECONDS = int(os.getenv("POLL_OFFSET_SECONDS", "3"))
-POLL_JITTER_MAX     = int(os.getenv("POLL_JITTER_MAX", "7"))
+# Optionale Webhooks #2, #3, ... (eigene Creds/Exchange/Hebel):
+# ALTRADY_WEBHOOK_URL_<n>, ALTRADY_API_KEY_<n>, ALTRADY_API_SECRET_<n>, ALTRADY_EXCHANGE_<n>, LEVERAGE_<n>
+
+# Tuning (Hebel, TP-Split/Runner, Stop, DCA, Entry, Poll-Timing, Cooldown, Alterslimits): siehe config.py.
+# Ebenen: .env < CONFIG_FILE < Prozess-ENV (mit CONFIG_OVERRIDE gehen die Dateien vor);
+# neu geladen per SIGHUP bzw. bei Änderung einer der Dateien.
+CONFIG_FILE     = Path(os.getenv("CONFIG_FILE", "").strip() or DOTENV_FILE or ".env")
+CONFIG_WATCH    = os.getenv("CONFIG_WATCH", "true").lower() == "true"      # Config-Dateien/ACCOUNTS_FILE beobachten
+CONFIG_OVERRIDE = os.getenv("CONFIG_OVERRIDE", "false").lower() == "true"  # Dateien vor Prozess-ENV
+CONFIG_SOURCES  = list(dict.fromkeys(p for p in (Path(DOTENV_FILE) if DOTENV_FILE else None, CONFIG_FILE) if p))
+
+def load_config() -> TradingConfig:
+    return TradingConfig.from_env(config_env(*CONFIG_SOURCES, base=_PROCESS_ENV, override=CONFIG_OVERRIDE))
+
+CONFIG: TradingConfig = load_config()   # Gültigkeit prüft startup_checks()
+
+# Payloads je Account als fertige JSON-Bytes senden (Kopf vorserialisiert)
+PAYLOAD_PRESERIALIZE = os.getenv("PAYLOAD_PRESERIALIZE", "true").lower() == "true"
 
+# Discord: Requests, die im Bucket übrig bleiben, bevor proaktiv gebremst wird
+RATE_LIMIT_RESERVE  = int(os.getenv("RATE_LIMIT_RESERVE", "1"))
+DISCORD_API_BASE    = os.getenv("DISCORD_API_BASE", "https://discord.com/api/v10").strip().rstrip("/")  # z.B. fake_servers.py
 DISCORD_FETCH_LIMIT = int(os.getenv("DISCORD_FETCH_LIMIT", "50"))
+# JSON-Decoder für Discord-Seiten: auto (orjson, falls installiert, sonst json) | orjson | json | stream
+# (stream: elementweise per raw_decode, nur eine Message lebt als Dict – wenig Spitzen-Speicher)
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").strip().lower()
+
+# Signal-Formate (Regeln je Provider-Format, JSON)
+SIGNAL_FORMATS_FILE = Path(os.getenv("SIGNAL_FORMATS_FILE", str(Path(__file__).resolve().with_name("signal_formats.json"))))
+
+# Pre-Filter: Nicht-Signale vor Normalisierung/Parsing verwerfen
+PREFILTER_ENABLED   = os.getenv("PREFILTER_ENABLED", "true").lower() == "true"
+ALLOWED_AUTHOR_IDS  = {x.strip() for x in os.getenv("ALLOWED_AUTHOR_IDS", "").split(",") if x.strip()}   # leer = alle
+ALLOWED_WEBHOOK_IDS = {x.strip() for x in os.getenv("ALLOWED_WEBHOOK_IDS", "").split(",") if x.strip()}  # leer = alle
+
+# Logging: JSON-Lines (oder Text) über einen Hintergrund-Writer, Log-Aufrufe blockieren nie
+LOG_LEVEL          = os.getenv("LOG_LEVEL", "info").strip().lower()   # debug | info | warning | error
+LOG_FORMAT         = os.getenv("LOG_FORMAT", "json").strip().lower()  # json | text
+LOG_QUEUE_SIZE     = int(os.getenv("LOG_QUEUE_SIZE", "10000"))        # voll -> Zeilen werden verworfen und gezählt
+LOG_REPEAT_SECONDS = float(os.getenv("LOG_REPEAT_SECONDS", "300"))    # gleiche Routine-Zeile höchstens so oft
+LOG.configure(LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE)
+
+# Profiling auf Abruf: SIGUSR1 = CPU, SIGUSR2 = tracemalloc, oder Control-Datei ("cpu", "mem", "cycles=N")
+PROFILE_DIR          = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_CYCLES       = int(os.getenv("PROFILE_CYCLES", "5"))
+PROFILE_CONTROL_FILE = os.getenv("PROFILE_CONTROL_FILE", "profile.request").strip()  # leer = nur Signale
+
+# Metriken: Prometheus-Text auf http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_PORT        = int(os.getenv("METRICS_PORT", "0"))  # 0 = aus
+METRICS_HOST        = os.getenv("METRICS_HOST", "127.0.0.1").strip()
+
+# Ingestion: "poll" (REST, Default) oder "gateway" (Websocket, MESSAGE_CREATE)
+INGEST_MODE         = os.getenv("INGEST_MODE", "poll").strip().lower()
+DISCORD_GATEWAY_URL = os.getenv("DISCORD_GATEWAY_URL", "wss://gateway.discord.gg/?v=10&encoding=json").strip()
+GATEWAY_INTENTS     = int(os.getenv("GATEWAY_INTENTS", str((1 << 0) | (1 << 9) | (1 << 15))))  # GUILDS|GUILD_MESSAGES|MESSAGE_CONTENT
 STATE_FILE          = Path(os.getenv("STATE_FILE", "state.json"))
 
-# Cooldown nach Order-Open
-COOLDOWN_SECONDS    = int(os.getenv("COOLDOWN_SECONDS", "0"))  # 0 = aus
+# Journal (SQLite/WAL): verarbeitete Messages + Dispatch je Account, Exactly-once über Restarts
+JOURNAL_FILE            = os.getenv("JOURNAL_FILE", "journal.db").strip()   # leer = aus (nur STATE_FILE)
+JOURNAL_BATCH_SIZE      = int(os.getenv("JOURNAL_BATCH_SIZE", "100"))
+JOURNAL_FLUSH_SECONDS   = float(os.getenv("JOURNAL_FLUSH_SECONDS", "2"))
+JOURNAL_RETENTION_HOURS = float(os.getenv("JOURNAL_RETENTION_HOURS", "168"))
+JOURNAL_COMPACT_SECONDS = int(os.getenv("JOURNAL_COMPACT_SECONDS", "3600"))
+JOURNAL_RESEND_PENDING  = os.getenv("JOURNAL_RESEND_PENDING", "false").lower() == "true"  # unklare Dispatches nach Crash erneut senden
+
+# Dedup: gleiches Signal (Repost/Mirror unter neuer Message-ID) nicht erneut dispatchen
+DEDUP_WINDOW_SECONDS      = int(os.getenv("DEDUP_WINDOW_SECONDS", "3600"))  # 0 = aus
+DEDUP_PRICE_TOLERANCE_PCT = float(os.getenv("DEDUP_PRICE_TOLERANCE_PCT", "0.5"))
+DEDUP_MAX_ENTRIES         = int(os.getenv("DEDUP_MAX_ENTRIES", "1000"))
+
+# Accounts: JSON-Datei (beliebig viele) – sonst ENV-Block #1, #2, #3, ...
+ACCOUNTS_FILE       = Path(os.getenv("ACCOUNTS_FILE", "accounts.json"))
+
+# Fan-out: parallele Webhook-Posts (Worker gesamt / gleichzeitig pro Host)
+FANOUT_MAX_WORKERS  = int(os.getenv("FANOUT_MAX_WORKERS", "8"))
+FANOUT_PER_HOST     = int(os.getenv("FANOUT_PER_HOST", "4"))
+
+# Pipeline: Ingestion (Fetch/Parse) und Dispatch (Posts) über eine begrenzte Queue entkoppelt
+DISPATCH_QUEUE_SIZE    = int(os.getenv("DISPATCH_QUEUE_SIZE", "100"))    # voll -> Ingestion wartet (Backpressure)
+DISPATCH_DRAIN_SECONDS = float(os.getenv("DISPATCH_DRAIN_SECONDS", "30"))  # beim Beenden offene Signale abarbeiten
+DISPATCH_WORKERS       = int(os.getenv("DISPATCH_WORKERS", "4"))          # Signale parallel (gleiches Base/Side: nacheinander)
+
+# HTTP: gepoolte Keep-Alive Sessions je Host, Timeouts getrennt (Connect/Read)
+HTTP_POOL_MAXSIZE       = int(os.getenv("HTTP_POOL_MAXSIZE", str(max(4, FANOUT_PER_HOST))))
+DISCORD_CONNECT_TIMEOUT = float(os.getenv("DISCORD_CONNECT_TIMEOUT", "5"))
+DISCORD_READ_TIMEOUT    = float(os.getenv("DISCORD_READ_TIMEOUT", "15"))
+ALTRADY_CONNECT_TIMEOUT = float(os.getenv("ALTRADY_CONNECT_TIMEOUT", "5"))
+ALTRADY_READ_TIMEOUT    = float(os.getenv("ALTRADY_READ_TIMEOUT", "20"))
+
+# Circuit-Breaker je Webhook-URL: nach N Fehlern in Folge sofort abweisen, Hintergrund-Probe bis er antwortet
+CB_FAILURE_THRESHOLD   = int(os.getenv("CB_FAILURE_THRESHOLD", "3"))    # 0 = aus
+CB_PROBE_SECONDS       = float(os.getenv("CB_PROBE_SECONDS", "15"))
+KEEPWARM_SECONDS        = int(os.getenv("KEEPWARM_SECONDS", "45"))  # 0 = aus
 
 # =========================
-# Startup Checks
+# Accounts
 # =========================
-if not DISCORD_TOKEN or not CHANNEL_ID or not ALTRADY_WEBHOOK_URL:
-    print("❌ ENV fehlt: DISCORD_TOKEN, CHANNEL_ID, ALTRADY_WEBHOOK_URL")
-    sys.exit(1)
-
-if not ALTRADY_API_KEY or not ALTRADY_API_SECRET:
-    print("❌ API Keys fehlen: ALTRADY_API_KEY, ALTRADY_API_SECRET")
-    sys.exit(1)
+ACCOUNT_KEYS = ("webhook_url", "api_key", "api_secret", "exchange")
+
+def _accounts_from_env(cfg: TradingConfig) -> List[dict]:
+    """Aus derselben ENV-Ebene wie `cfg` (config_env) – damit greift ein Reload auch für Webhooks/LEVERAGE_<n>."""
+    env = lambda name, default="": cfg.env.get(name, default).strip()
+    accounts = []
+    url, key, secret = env("ALTRADY_WEBHOOK_URL"), env("ALTRADY_API_KEY"), env("ALTRADY_API_SECRET")
+    if url and key and secret:
+        accounts.append({
+            "name": "#1", "webhook_url": url, "api_key": key,
+            "api_secret": secret, "exchange": env("ALTRADY_EXCHANGE", "BYBI"), "leverage": cfg.LEVERAGE_1,
+        })
+    i = 2
+    while True:
+        url    = env(f"ALTRADY_WEBHOOK_URL_{i}")
+        key    = env(f"ALTRADY_API_KEY_{i}")
+        secret = env(f"ALTRADY_API_SECRET_{i}")
+        exch   = env(f"ALTRADY_EXCHANGE_{i}")
+        if not (url and key and secret and exch):
+            break
+        lev = cfg.LEVERAGE_2 if i == 2 else int(env(f"LEVERAGE_{i}", str(cfg.LEVERAGE_1)))
+        accounts.append({
+            "name": f"#{i}", "webhook_url": url, "api_key": key,
+            "api_secret": secret, "exchange": exch, "leverage": lev,
+        })
+        i += 1
+    return accounts
+
+_ENV_REF = re.compile(r"\$(\w+|\{([^}]*)\})")
+
+def _expand_env(value: str, env) -> str:
+    """Wie os.path.expandvars, aber aus `env` (cfg.env: .env < CONFIG_FILE < Prozess-ENV); Unbekanntes bleibt stehen."""
+    return _ENV_REF.sub(lambda m: env.get(m.group(2) if m.group(2) is not None else m.group(1), m.group(0)), value)
+
+def _accounts_from_file(path: Path, cfg: TradingConfig) -> List[dict]:
+    """
+    Format: {"accounts": [{"name", "webhook_url", "api_key", "api_secret", "exchange", "leverage"}, ...]}
+    Strings dürfen ${ENV_VAR} enthalten (Secrets nicht in die Datei schreiben).
+    """
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    entries = raw.get("accounts", []) if isinstance(raw, dict) else raw
+    accounts = []
+    for i, e in enumerate(entries, 1):
+        if e.get("enabled", True) is False:
+            continue
+        acc = {k: _expand_env(str(e.get(k) or ""), cfg.env).strip() for k in ACCOUNT_KEYS}
+        missing = [k for k in ACCOUNT_KEYS if not acc[k]]
+        if missing:
+            raise ValueError(f"{path}: Account #{i} unvollständig ({', '.join(missing)})")
+        acc["name"] = str(e.get("name") or f"#{i}")
+        acc["leverage"] = int(e.get("leverage", cfg.LEVERAGE_1))
+        accounts.append(acc)
+    return accounts
+
+def load_accounts(cfg: Optional[TradingConfig] = None) -> List[dict]:
+    cfg = cfg or CONFIG
+    if ACCOUNTS_FILE.exists():
+        return _accounts_from_file(ACCOUNTS_FILE, cfg)
+    return _accounts_from_env(cfg)
+
+# Werden in startup_checks() gesetzt – Import (Replay, Checks) braucht keine Live-ENV
+ACCOUNTS: List[dict] = []
 
 HEADERS = {
     "Authorization": DISCORD_TOKEN,
     "User-Agent": "DiscordToAltrady/2.5-multiwebhook"
 }
 
+# =========================
+# HTTP Sessions (Pool, Keep-Alive)
+# =========================
+_sessions = {}
+_sessions_lock = threading.Lock()
+_host_last_used = {}
+
+def _host_of(url: str) -> str:
+    u = urlsplit(url)
+    return f"{u.scheme}://{u.netloc.lower()}"
+
+def session_for(url: str) -> requests.Session:
+    """Eine langlebige Session je Host -> DNS/TCP/TLS nur beim ersten Request bzw. nach Idle-Close."""
+    host = _host_of(url)
+    with _sessions_lock:
+        _host_last_used[host] = time.time()
+        sess = _sessions.get(host)
+        if sess is None:
+            sess = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, HTTP_POOL_MAXSIZE), max_retries=0)
+            sess.mount("https://", adapter)
+            sess.mount("http://", adapter)
+            _sessions[host] = sess
+        return sess
+
+def _warm_host(host: str, connections: int):
+    """Öffnet/erneuert `connections` Verbindungen parallel (HEAD auf Host-Root, Status egal)."""
+    sess = session_for(host)
+    def ping():
+        try:
+            sess.head(host + "/", timeout=(ALTRADY_CONNECT_TIMEOUT, ALTRADY_CONNECT_TIMEOUT), allow_redirects=False)
+        except Exception:
+            pass
+    threads = [threading.Thread(target=ping, daemon=True) for _ in range(max(1, connections))]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+def _altrady_hosts() -> dict:
+    counts = {}
+    for acc in ACCOUNTS:
+        h = _host_of(acc["webhook_url"])
+        counts[h] = counts.get(h, 0) + 1
+    return {h: min(n, FANOUT_PER_HOST, HTTP_POOL_MAXSIZE) for h, n in counts.items()}
+
+def warm_up_connections():
+    for host, n in _altrady_hosts().items():
+        _warm_host(host, n)
+
+def _keepwarm_loop():
+    while True:
+        time.sleep(KEEPWARM_SECONDS)
+        now = time.time()
+        for host, n in _altrady_hosts().items():
+            # Nur idle Hosts auffrischen – frisch genutzte Verbindungen sind warm
+            if now - _host_last_used.get(host, 0.0) >= KEEPWARM_SECONDS:
+                _warm_host(host, n)
+
+def start_keepwarm():
+    warm_up_connections()
+    if KEEPWARM_SECONDS > 0:
+        threading.Thread(target=_keepwarm_loop, name="keepwarm", daemon=True).start()
+
 # =========================
 # Utils
 # =========================
+JOURNAL: Optional[Journal] = None   # in startup_checks() geöffnet
+
+def open_journal() -> Optional[Journal]:
+    if not JOURNAL_FILE:
+        return None
+    return Journal(
+        Path(JOURNAL_FILE), batch_size=JOURNAL_BATCH_SIZE, flush_seconds=JOURNAL_FLUSH_SECONDS,
+        retention_seconds=JOURNAL_RETENTION_HOURS * 3600, compact_seconds=JOURNAL_COMPACT_SECONDS,
+    )
+
 def load_state():
-    if STATE_FILE.exists():
+    st = {"channels": {}, "last_trade_ts": 0.0}
+    stored = JOURNAL.load_state() if JOURNAL else None
+    if stored is not None:
+        st.update(stored)
+    elif STATE_FILE.exists():
         try:
-            return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+            st.update(json.loads(STATE_FILE.read_text(encoding="utf-8")))
         except:
             pass
-    return {"last_id": None, "last_trade_ts": 0.0}
+    # Altes Format: ein einzelnes last_id für CHANNEL_ID
+    legacy_last_id = st.pop("last_id", None)
+    if legacy_last_id and CHANNEL_IDS[0] not in st["channels"]:
+        st["channels"][CHANNEL_IDS[0]] = {"last_id": legacy_last_id}
+    return st
+
+def channel_state(st: dict, channel_id: str) -> dict:
+    return st["channels"].setdefault(str(channel_id), {"last_id": None})
 
 def save_state(st: dict):
+    if JOURNAL:
+        # Gepuffert, geht mit dem nächsten Journal-Commit raus
+        JOURNAL.put_state(st)
+        JOURNAL.maybe_flush()
+        return
     tmp = STATE_FILE.with_suffix(".json.tmp")
     tmp.write_text(json.dumps(st), encoding="utf-8")
     tmp.replace(STATE_FILE)
 
-def sleep_until_next_tick():
-    now = time.time()
-    period_start = (now // POLL_BASE_SECONDS) * POLL_BASE_SECONDS
-    next_tick = period_start + POLL_BASE_SECONDS + POLL_OFFSET_SECONDS
-    if now < period_start + POLL_OFFSET_SECONDS:
-        next_tick = period_start + POLL_OFFSET_SECONDS
-    jitter = random.uniform(0, max(0, POLL_JITTER_MAX))
-    time.sleep(max(0, next_tick - now + jitter))
+# =========================
+# Metriken (Latenz je Stufe, Counter)
+# =========================
+M_POLLS    = REGISTRY.counter("polls_total", "Requests auf den Discord-Messages-Endpoint")
+M_RETRIES  = REGISTRY.counter("webhook_retries_total", "Wiederholte Webhook-Posts (429/Fehler)")
+M_OUTCOMES = REGISTRY.counter("order_outcomes_total", "Order-Posts je Account nach Ergebnis: ok, failed, stale, circuit_open")
+M_STAGE    = REGISTRY.histogram("stage_seconds", "Dauer je Stufe: fetch, extract, parse, payload, webhook")
+M_INGEST   = REGISTRY.histogram("ingest_lag_seconds", "Discord-Post (Snowflake) bis Empfang per REST/Gateway")
+M_E2E      = REGISTRY.histogram("signal_to_order_seconds", "Discord-Post (Snowflake) bis Webhook-Antwort je Account")
+
+def _collect_metrics():
+    """Bestehende Zähler (STATS, Rate-Limits, Dedup, Journal) beim Scrape einsammeln."""
+    pm = poll_metrics()
+    families = [
+        ("messages_total", "counter", "Verarbeitete Messages nach Ergebnis", [
+            ({"result": k}, v) for k, v in STATS.items() if k != "messages"] + [({"result": "all"}, STATS["messages"])]),
+        ("discord_429_total", "counter", "429-Antworten von Discord", [({}, pm["ratelimit_429"])]),
+        ("ratelimit_throttled_total", "counter", "Proaktiv gebremste Discord-Requests", [({}, pm["ratelimit_throttled"])]),
+        ("ratelimit_remaining", "gauge", "Kleinstes Rest-Budget über aktive Discord-Buckets", [({}, pm["ratelimit_remaining"])]),
+        ("poll_interval_seconds", "gauge", "Aktuelle Poll-Periode", [({}, pm["poll_interval_s"])]),
+        ("dedup_hit_ratio", "gauge", "Anteil Duplikate an geprüften Signalen", [({}, DEDUP.hit_rate())]),
+    ]
+    if JOURNAL:
+        c = JOURNAL.counts()
+        families.append(("journal_dispatches", "gauge", "Dispatches im Journal nach Status",
+                         [({"status": k}, v) for k, v in c["dispatches"].items()]))
+    return families
+
+REGISTRY.register_callback(_collect_metrics)
+
+def stage_line(trace: dict, results: List[dict]) -> str:
+    """Kurz-Log der Latenzen eines Signals (ms, Discord-Post -> Empfang in s)."""
+    ms = lambda a, b: (trace[b] - trace[a]) * 1000.0
+    line = (f"⏱ Discord→Empfang {trace['received'] - trace['posted']:.1f}s | Extract {ms('started', 'extracted'):.2f} ms"
+            f" | Parse {ms('extracted', 'parsed'):.2f} ms | Payload {ms('parsed', 'payload'):.2f} ms")
+    for r in results:
+        line += f" | {r['account']} {r['elapsed_ms']:.0f} ms (E2E {r['done_at'] - trace['posted']:.1f}s)"
+    return line
 
-def fetch_messages_after(channel_id: str, after_id: Optional[str], limit: int = 50):
-    collected = []
+# =========================
+# Profiling (auf Abruf)
+# =========================
+PROFILER = Profiler(PROFILE_DIR, PROFILE_CYCLES, Path(PROFILE_CONTROL_FILE) if PROFILE_CONTROL_FILE else None)
+
+def watch_runtime_sizes(state: dict):
+    """Größen von State und Caches, die im tracemalloc-Bericht je Zyklus stehen."""
+    PROFILER.watch("state_bytes", lambda: len(json.dumps(state)))
+    PROFILER.watch("dedup", lambda: len(DEDUP))
+    PROFILER.watch("journal_buffer", lambda: JOURNAL.buffered() if JOURNAL else 0)
+    PROFILER.watch("inflight", lambda: CURSORS.inflight_count() if CURSORS else 0)
+    PROFILER.watch("dispatch_queue", lambda: DISPATCHER.qsize() if DISPATCHER else 0)
+    PROFILER.watch("sessions", lambda: len(_sessions))
+    PROFILER.watch("breakers", lambda: len(_breakers))
+
+# =========================
+# Discord Rate-Limits
+# =========================
+def _retry_after(r) -> float:
+    retry = 5.0
+    try:
+        if r.headers.get("Content-Type","").startswith("application/json"):
+            retry = float(r.json().get("retry_after", 5))
+        elif r.headers.get("Retry-After"):
+            retry = float(r.headers["Retry-After"])
+    except:
+        pass
+    return retry
+
+class RateLimitTracker:
+    """
+    Liest die Bucket-Header (X-RateLimit-*) jeder Discord-Response und bremst VOR dem
+    Request, wenn der Bucket bis auf RATE_LIMIT_RESERVE leer ist – statt erst auf 429
+    zu reagieren. Buckets gelten je Bucket-ID + Major-Parameter (Channel); solange
+    die Bucket-ID einer Route unbekannt ist, zählt der Routen-Key.
+    """
+
+    def __init__(self, reserve: int = 1):
+        self.reserve = max(0, reserve)
+        self._lock = threading.Lock()
+        self._route_bucket: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[str, str], dict] = {}
+        self._global_until = 0.0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+        self.hits_429 = 0
+
+    def _key(self, route: str, major: str) -> Tuple[str, str]:
+        return self._route_bucket.get(route, route), major
+
+    def wait(self, route: str, major: str):
+        """Blockiert, bis der Bucket (bzw. das globale Limit) wieder Budget hat."""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._global_until - now
+            b = self._buckets.get(self._key(route, major))
+            if b and b["remaining"] <= self.reserve and b["reset_at"] > now:
+                delay = max(delay, b["reset_at"] - now + 0.25)
+        if delay > 0:
+            self.throttled += 1
+            self.throttled_seconds += delay
+            time.sleep(delay)
+
+    def update(self, route: str, major: str, r):
+        h = r.headers
+        now = time.monotonic()
+        with self._lock:
+            if h.get("X-RateLimit-Bucket"):
+                self._route_bucket[route] = h["X-RateLimit-Bucket"]
+            key = self._key(route, major)
+            try:
+                if h.get("X-RateLimit-Remaining") is not None and h.get("X-RateLimit-Reset-After") is not None:
+                    self._buckets[key] = {
+                        "limit": int(float(h.get("X-RateLimit-Limit") or 0)),
+                        "remaining": int(float(h["X-RateLimit-Remaining"])),
+                        "reset_at": now + float(h["X-RateLimit-Reset-After"]),
+                    }
+            except ValueError:
+                pass
+            if r.status_code != 429:
+                return
+            self.hits_429 += 1
+            retry = _retry_after(r)
+            if h.get("X-RateLimit-Global") or h.get("X-RateLimit-Scope") == "global":
+                self._global_until = max(self._global_until, now + retry)
+            else:
+                b = self._buckets.setdefault(key, {"limit": 0, "remaining": 0, "reset_at": 0.0})
+                b["remaining"] = 0
+                b["reset_at"] = max(b["reset_at"], now + retry)
+
+    def headroom(self, route: str, major: str) -> Optional[float]:
+        """Rest-Budget des Buckets als Anteil (1.0 = voll), None solange unbekannt/abgelaufen."""
+        with self._lock:
+            b = self._buckets.get(self._key(route, major))
+            if not b or not b["limit"] or b["reset_at"] <= time.monotonic():
+                return None
+            return b["remaining"] / b["limit"]
+
+    def remaining(self) -> Optional[int]:
+        """Kleinstes Rest-Budget über alle aktiven Buckets (None = keine Info)."""
+        with self._lock:
+            now = time.monotonic()
+            live = [b["remaining"] for b in self._buckets.values() if b["reset_at"] > now]
+        return min(live) if live else None
+
+RATE_LIMITS = RateLimitTracker(RATE_LIMIT_RESERVE)
+ROUTE_MESSAGES = "GET /channels/{channel_id}/messages"
+
+def iter_message_pages(channel_id: str, after_id: Optional[str], limit: int = 50):
+    """Seiten nach `after_id`, je Seite aufsteigend nach ID – die nächste Seite wird erst beim Weiterlesen geladen."""
     params = {"limit": max(1, min(limit, 100))}
     if after_id:
         params["after"] = str(after_id)
 
+    url = f"{DISCORD_API_BASE}/channels/{channel_id}/messages"
     while True:
-        r = requests.get(f"https://discord.com/api/v10/channels/{channel_id}/messages",
-                         headers=HEADERS, params=params, timeout=15)
+        RATE_LIMITS.wait(ROUTE_MESSAGES, channel_id)
+        t0 = time.time()
+        r = session_for(url).get(url, headers=HEADERS, params=params,
+                                 timeout=(DISCORD_CONNECT_TIMEOUT, DISCORD_READ_TIMEOUT))
+        M_POLLS.inc(channel=channel_id)
+        M_STAGE.observe(time.time() - t0, stage="fetch")
+        RATE_LIMITS.update(ROUTE_MESSAGES, channel_id, r)
         if r.status_code == 429:
-            retry = 5
-            try:
-                if r.headers.get("Content-Type","").startswith("application/json"):
-                    retry = float(r.json().get("retry_after", 5))
-            except:
-                pass
-            time.sleep(retry + 0.5)
             continue
         r.raise_for_status()
-        page = r.json() or []
-        collected.extend(page)
+        page = decode_messages(r.content)
+        if not page:
+            return
+        page.sort(key=lambda m: m.id)
+        received = time.time()
+        for m in page:
+            m.received_at = received
+        yield page
         if len(page) < params["limit"]:
-            break
-        max_id = max(int(m.get("id","0")) for m in page if "id" in m)
-        params["after"] = str(max_id)
-    return collected
+            return
+        params["after"] = str(page[-1].id)
+
+def fetch_messages_after(channel_id: str, after_id: Optional[str], limit: int = 50):
+    return [m for page in iter_message_pages(channel_id, after_id, limit) for m in page]
 
 # =========================
 # Text Processing
@@ -161,7 +497,6 @@ def fetch_messages_after(channel_id: str, after_id: Optional[str], limit: int =
 MD_LINK   = re.compile(r"\[([^\]]+)\]\((?:[^)]+)\)")
 MD_MARK   = re.compile(r"[*_`~]+")
 MULTI_WS  = re.compile(r"[ \t\u00A0]+")
-NUM       = r"([0-9][0-9,]*\.?[0-9]*)"
 
 def clean_markdown(s: str) -> str:
     if not s: return ""
@@ -176,7 +511,8 @@ def clean_markdown(s: str) -> str:
 def to_price(s: str) -> float:
     return float(s.replace(",", ""))
 
-def message_text(m: dict) -> str:
+def message_parts(m: dict) -> List[str]:
+    """Rohe Textteile (Content + Embeds), noch ohne Markdown-Bereinigung."""
     parts = []
     parts.append(m.get("content") or "")
     embeds = m.get("embeds") or []
@@ -195,64 +531,107 @@ def message_text(m: dict) -> str:
             if v: parts.append(str(v))
         footer = (e.get("footer") or {}).get("text")
         if footer: parts.append(str(footer))
-    return clean_markdown("\n".join([p for p in parts if p]))
+    return [p for p in parts if p]
+
+def message_text(m: dict) -> str:
+    return clean_markdown("\n".join(message_parts(m)))
 
 # =========================
-# Signal Parsing
+# Message-Decoding
 # =========================
-PAIR_LINE_OLD   = re.compile(r"(^|\n)\s*([A-Z0-9]+)\s+(LONG|SHORT)\s+Signal\s*(\n|$)", re.I)
-HDR_SLASH_PAIR  = re.compile(r"([A-Z0-9]+)\s*/\s*[A-Z0-9]+\b.*\b(LONG|SHORT)\b", re.I)
-HDR_COIN_DIR    = re.compile(r"Coin\s*:\s*([A-Z0-9]+).*?Direction\s*:\s*(LONG|SHORT)", re.I | re.S)
-
-ENTER_ON_TRIGGER = re.compile(r"Enter\s+on\s+Trigger\s*:\s*\$?\s*"+NUM, re.I)
-ENTRY_COLON      = re.compile(r"\bEntry\s*:\s*\$?\s*"+NUM, re.I)
-ENTRY_SECTION    = re.compile(r"\bENTRY\b\s*\n\s*\$?\s*"+NUM, re.I)
+class MessageRecord:
+    """Nur die Felder, die die Pipeline liest – Author-Objekte, Attachments, Components,
+    Reactions und Embed-Strukturen werden nach dem Decoding nicht mehr gehalten."""
+    __slots__ = ("id", "channel_id", "author_id", "webhook_id", "parts", "received_at")
+
+    def __init__(self, id: int, channel_id: str, author_id: str, webhook_id: str,
+                 parts: List[str], received_at: Optional[float] = None):
+        self.id = id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.webhook_id = webhook_id
+        self.parts = parts
+        self.received_at = received_at
+
+    @classmethod
+    def from_dict(cls, m: dict) -> "MessageRecord":
+        return cls(int(m.get("id") or 0), str(m.get("channel_id") or ""),
+                   str((m.get("author") or {}).get("id") or ""), str(m.get("webhook_id") or ""),
+                   message_parts(m), m.get("_received_at"))
+
+_ARRAY_SEP = re.compile(r"[\s,]*")
+_DECODER = json.JSONDecoder()
+
+def _iter_json_array(body) -> Iterator[dict]:
+    """Elemente eines JSON-Arrays einzeln decodieren – es lebt immer nur eine Message als Dict."""
+    text = body.decode("utf-8") if isinstance(body, (bytes, bytearray)) else body
+    i = _ARRAY_SEP.match(text, text.index("[") + 1).end()
+    while text[i] != "]":
+        obj, i = _DECODER.raw_decode(text, i)
+        yield obj
+        i = _ARRAY_SEP.match(text, i).end()
+
+def json_backend() -> str:
+    """Aktiver Decoder für JSON_BACKEND; orjson ohne Installation fällt auf json zurück."""
+    if JSON_BACKEND == "stream":
+        return "stream"
+    if JSON_BACKEND in ("auto", "orjson") and orjson is not None:
+        return "orjson"
+    return "json"
+
+def decode_messages(body: bytes, loads=None) -> List[MessageRecord]:
+    """Discord-Seite (JSON-Array) -> MessageRecords; Dicts werden direkt nach dem Umwandeln verworfen."""
+    if loads is None:
+        backend = json_backend()
+        loads = orjson.loads if backend == "orjson" else json.loads if backend == "json" else None
+    items = (loads(body) or []) if loads else _iter_json_array(body)
+    return [MessageRecord.from_dict(m) for m in items if isinstance(m, dict) and "id" in m]
 
-TP1_LINE  = re.compile(r"\bTP\s*1\s*:\s*\$?\s*"+NUM, re.I)
-TP2_LINE  = re.compile(r"\bTP\s*2\s*:\s*\$?\s*"+NUM, re.I)
-TP3_LINE  = re.compile(r"\bTP\s*3\s*:\s*\$?\s*"+NUM, re.I)
-DCA1_LINE = re.compile(r"\bDCA\s*#?\s*1\s*:\s*\$?\s*"+NUM, re.I)
-DCA2_LINE = re.compile(r"\bDCA\s*#?\s*2\s*:\s*\$?\s*"+NUM, re.I)
-DCA3_LINE = re.compile(r"\bDCA\s*#?\s*3\s*:\s*\$?\s*"+NUM, re.I)
+# =========================
+# Signal Parsing
+# =========================
+# Format-Regeln (Header/Entry/TP/DCA) kommen aus SIGNAL_FORMATS_FILE, siehe signal_parser.py.
+# Geladen in startup_checks() bzw. beim ersten Parsen (Replay, Checks) – nicht beim Import.
+SCANNER: Optional[SignalScanner] = None
+
+def load_scanner() -> SignalScanner:
+    global SCANNER, PREFILTER_MARKERS
+    if SCANNER is None:
+        scanner = SignalScanner.from_file(SIGNAL_FORMATS_FILE)
+        PREFILTER_MARKERS = scanner.required_markers(("header", "entry", "tp1", "tp2", "tp3"))
+        SCANNER = scanner
+    return SCANNER
+
+def _base_side(found: dict):
+    m = found.get("header")
+    if not m:
+        return None, None
+    return m.group("base").upper(), ("long" if m.group("side").upper()=="LONG" else "short")
+
+def _price(found: dict, field: str) -> Optional[float]:
+    m = found.get(field)
+    return to_price(m.group("price")) if m else None
 
 def find_base_side(txt: str):
-    mh = HDR_SLASH_PAIR.search(txt)
-    if mh:
-        return mh.group(1).upper(), ("long" if mh.group(2).upper()=="LONG" else "short")
-    mo = PAIR_LINE_OLD.search(txt)
-    if mo:
-        return mo.group(2).upper(), ("long" if mo.group(3).upper()=="LONG" else "short")
-    mc = HDR_COIN_DIR.search(txt)
-    if mc:
-        return mc.group(1).upper(), ("long" if mc.group(2).upper()=="LONG" else "short")
-    return None, None
+    return _base_side((SCANNER or load_scanner()).scan(txt))
 
 def find_entry(txt: str) -> Optional[float]:
-    for rx in (ENTER_ON_TRIGGER, ENTRY_COLON, ENTRY_SECTION):
-        m = rx.search(txt)
-        if m:
-            return to_price(m.group(1))
-    return None
+    return _price((SCANNER or load_scanner()).scan(txt), "entry")
 
 def find_tp_dca(txt: str):
-    tps = []
-    for rx in (TP1_LINE, TP2_LINE, TP3_LINE):
-        m = rx.search(txt)
-        tps.append(to_price(m.group(1)) if m else None)
-    dcas = []
-    for rx in (DCA1_LINE, DCA2_LINE, DCA3_LINE):
-        m = rx.search(txt)
-        dcas.append(to_price(m.group(1)) if m else None)
-    return tps, dcas
-
-def backfill_dcas_if_missing(side: str, entry: float, dcas: list) -> list:
+    found = (SCANNER or load_scanner()).scan(txt)
+    return [_price(found, f) for f in ("tp1", "tp2", "tp3")], [_price(found, f) for f in ("dca1", "dca2", "dca3")]
+
+def backfill_dcas_if_missing(side: str, entry: float, dcas: list, cfg: Optional[TradingConfig] = None) -> list:
+    """`cfg`: Snapshot, mit dem das Signal auch dispatcht wird (Default CONFIG)."""
+    cfg = cfg or CONFIG
     d1, d2, d3 = dcas
     if d1 is None:
-        d1 = entry * (1 + DCA1_DIST_PCT/100.0) if side=="short" else entry * (1 - DCA1_DIST_PCT/100.0)
+        d1 = entry * (1 + cfg.DCA1_DIST_PCT/100.0) if side=="short" else entry * (1 - cfg.DCA1_DIST_PCT/100.0)
     if d2 is None:
-        d2 = entry * (1 + DCA2_DIST_PCT/100.0) if side=="short" else entry * (1 - DCA2_DIST_PCT/100.0)
+        d2 = entry * (1 + cfg.DCA2_DIST_PCT/100.0) if side=="short" else entry * (1 - cfg.DCA2_DIST_PCT/100.0)
     if d3 is None:
-        d3 = entry * (1 + DCA3_DIST_PCT/100.0) if side=="short" else entry * (1 - DCA3_DIST_PCT/100.0)
+        d3 = entry * (1 + cfg.DCA3_DIST_PCT/100.0) if side=="short" else entry * (1 - cfg.DCA3_DIST_PCT/100.0)
     return [d1, d2, d3]
 
 def plausible(side: str, entry: float, tp1: float, tp2: float, tp3: float, d1: float, d2: float, d3: float) -> bool:
@@ -261,25 +640,180 @@ def plausible(side: str, entry: float, tp1: float, tp2: float, tp3: float, d1: f
     else:
         return (tp1<entry and tp2<entry and tp3<entry and d1>entry and d2>entry and d3>entry)
 
-def parse_signal_from_text(txt: str):
-    base, side = find_base_side(txt)
+def parse_signal_with_reason(txt: str, cfg: Optional[TradingConfig] = None) -> Tuple[Optional[dict], Optional[str]]:
+    """(Signal, None) oder (None, Grund): no_header | no_entry | no_tp | implausible."""
+    # Ein Scanner-Durchlauf für alle Felder
+    found = (SCANNER or load_scanner()).scan(txt)
+    base, side = _base_side(found)
     if not base or not side:
-        return None
-    entry = find_entry(txt)
+        return None, "no_header"
+    entry = _price(found, "entry")
     if entry is None:
-        return None
-    (tp1, tp2, tp3), (d1, d2, d3) = find_tp_dca(txt)
+        return None, "no_entry"
+    tp1, tp2, tp3 = (_price(found, f) for f in ("tp1", "tp2", "tp3"))
+    d1, d2, d3 = (_price(found, f) for f in ("dca1", "dca2", "dca3"))
     if None in (tp1, tp2, tp3):
-        return None
-    d1, d2, d3 = backfill_dcas_if_missing(side, entry, [d1, d2, d3])
+        return None, "no_tp"
+    d1, d2, d3 = backfill_dcas_if_missing(side, entry, [d1, d2, d3], cfg)
     if not plausible(side, entry, tp1, tp2, tp3, d1, d2, d3):
-        return None
+        return None, "implausible"
     return {
         "base": base, "side": side, "entry": entry,
         "tp1": tp1, "tp2": tp2, "tp3": tp3,
         "dca1": d1, "dca2": d2, "dca3": d3
+    }, None
+
+def parse_signal_from_text(txt: str, cfg: Optional[TradingConfig] = None):
+    return parse_signal_with_reason(txt, cfg)[0]
+
+# =========================
+# Dedup (Reposts / gespiegelte Signale)
+# =========================
+DEDUP_PRICE_FIELDS = ("entry", "tp1", "tp2", "tp3", "dca1", "dca2", "dca3")
+
+class SignalDedup:
+    """
+    TTL/LRU-Cache der zuletzt dispatchten Signale, Key (base, side). Ein Signal gilt
+    als Duplikat, wenn innerhalb des Fensters eines mit allen Preisen (Entry, TPs, DCAs)
+    innerhalb der Toleranz existiert – robust gegen Rundung/Formatierung beim Mirror.
+    Der Eintrag behält die Zeit des Originals, Reposts verlängern das Fenster nicht.
+    """
+
+    def __init__(self, window: float, tolerance_pct: float, max_entries: int):
+        self.window = window
+        self.tolerance = tolerance_pct / 100.0
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str], List[Tuple[float, tuple]]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()   # mehrere Dispatch-Worker (verschiedene Keys)
+        self.lookups = 0
+        self.hits = 0
+
+    @staticmethod
+    def _prices(sig: dict) -> tuple:
+        return tuple(float(sig[f]) for f in DEDUP_PRICE_FIELDS)
+
+    def _close(self, a: tuple, b: tuple) -> bool:
+        return all(abs(x - y) <= self.tolerance * max(abs(x), abs(y)) for x, y in zip(a, b))
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        for key in list(self._entries):
+            kept = [e for e in self._entries[key] if e[0] >= cutoff]
+            self._size -= len(self._entries[key]) - len(kept)
+            if kept:
+                self._entries[key] = kept
+            else:
+                del self._entries[key]
+
+    def is_duplicate(self, sig: dict, now: Optional[float] = None) -> bool:
+        if self.window <= 0:
+            return False
+        now = time.time() if now is None else now
+        key = (sig["base"], sig["side"])
+        prices = self._prices(sig)
+        with self._lock:
+            self.lookups += 1
+            for ts, other in self._entries.get(key, ()):
+                if now - ts <= self.window and self._close(prices, other):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True
+        return False
+
+    def add(self, sig: dict, ts: Optional[float] = None):
+        if self.window <= 0:
+            return
+        ts = time.time() if ts is None else ts
+        key = (sig["base"], sig["side"])
+        prices = self._prices(sig)
+        with self._lock:
+            self._expire(ts)
+            self._entries.setdefault(key, []).append((ts, prices))
+            self._entries.move_to_end(key)
+            self._size += 1
+            # LRU: älteste Keys raus, bis das Limit passt
+            while self._size > self.max_entries:
+                _, dropped = self._entries.popitem(last=False)
+                self._size -= len(dropped)
+
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+DEDUP = SignalDedup(DEDUP_WINDOW_SECONDS, DEDUP_PRICE_TOLERANCE_PCT, DEDUP_MAX_ENTRIES)
+
+def warm_dedup():
+    """Fenster nach Restart aus dem Journal wiederherstellen (ohne Journal: leerer Start)."""
+    if JOURNAL and DEDUP_WINDOW_SECONDS > 0:
+        for ts, sig in JOURNAL.recent_signals(time.time() - DEDUP_WINDOW_SECONDS):
+            if all(f in sig for f in ("base", "side", *DEDUP_PRICE_FIELDS)):
+                DEDUP.add(sig, ts)
+
+# =========================
+# Pre-Filter
+# =========================
+# Nur Kandidaten zahlen für message_text()/clean_markdown() + Parsing.
+# Marker kommen aus den Format-Regeln (Anchors/Keywords) -> neue Formate werden nicht verworfen.
+PREFILTER_MARKERS: List[tuple] = []   # mit dem Scanner geladen (load_scanner)
+_MD_STRIP = str.maketrans("", "", "*_`~")
+
+STATS = {"messages": 0, "too_old": 0, "rejected_author": 0, "rejected_prefilter": 0, "parsed": 0, "signals": 0, "duplicates": 0}
+
+def prefilter_reason(m: MessageRecord, parts: List[str]) -> Optional[str]:
+    """None = Kandidat, sonst Grund der Ablehnung."""
+    if ALLOWED_AUTHOR_IDS or ALLOWED_WEBHOOK_IDS:
+        if m.author_id not in ALLOWED_AUTHOR_IDS and m.webhook_id not in ALLOWED_WEBHOOK_IDS:
+            return "author"
+    if not PREFILTER_ENABLED:
+        return None
+    if not parts:
+        return "empty"
+    if SCANNER is None:
+        load_scanner()
+    text = "\n".join(parts)
+    if "&" in text:
+        text = html.unescape(text)   # wie clean_markdown: "BTC&#x2F;USDT" muss den "/"-Anchor treffen
+    low = casefold_ascii(text.translate(_MD_STRIP))
+    for field, options in PREFILTER_MARKERS:
+        if not any(a in low and (not kws or any(k in low for k in kws)) for a, kws in options):
+            return f"no_{field}"
+    return None
+
+def stats_line() -> str:
+    m = poll_metrics()
+    n = STATS["messages"] or 1
+    rejected = STATS["rejected_author"] + STATS["rejected_prefilter"]
+    return (f"📈 Messages {STATS['messages']} (zu alt {STATS['too_old']}) | verworfen {rejected} ({rejected / n * 100:.0f}%, "
+            f"Author {STATS['rejected_author']}, Pre-Filter {STATS['rejected_prefilter']}) | "
+            f"geparst {STATS['parsed']} | Signale {STATS['signals']} | "
+            f"Duplikate {STATS['duplicates']} ({DEDUP.hit_rate() * 100:.0f}%) | "
+            f"Intervall {m['poll_interval_s']:.0f}s | Budget {'?' if m['ratelimit_remaining'] is None else m['ratelimit_remaining']} | "
+            f"gebremst {m['ratelimit_throttled']}x | 429 {m['ratelimit_429']} | "
+            f"Orders ok {M_OUTCOMES.total(outcome='ok'):.0f}, failed {M_OUTCOMES.total(outcome='failed'):.0f}, "
+            f"stale {M_OUTCOMES.total(outcome='stale'):.0f}, circuit {M_OUTCOMES.total(outcome='circuit_open'):.0f}")
+
+def poll_metrics() -> dict:
+    """Aktuelles Poll-Intervall und Rate-Limit-Budget (Gauges/Counter)."""
+    remaining = RATE_LIMITS.remaining()
+    return {
+        "poll_interval_s": SCHEDULER.period,
+        "ratelimit_remaining": remaining,
+        "ratelimit_throttled": RATE_LIMITS.throttled,
+        "ratelimit_throttled_s": round(RATE_LIMITS.throttled_seconds, 1),
+        "ratelimit_429": RATE_LIMITS.hits_429,
     }
 
+_last_stats_log = time.time()
+
+def maybe_log_stats():
+    global _last_stats_log
+    if CONFIG.STATS_LOG_SECONDS > 0 and time.time() - _last_stats_log >= CONFIG.STATS_LOG_SECONDS:
+        _last_stats_log = time.time()
+        LOG.info(stats_line())
+
 # =========================
 # Altrady Payload
 # =========================
@@ -287,124 +821,242 @@ def _percent_from_entry(entry: float, target: float) -> float:
     """Preis -> Prozent relativ zum Entry; >0 über Entry, <0 unter Entry."""
     return (target / entry - 1.0) * 100.0
 
-def _compute_stop_percentage(entry: float, d1: float, d2: float) -> float:
-    mode = BASE_STOP_MODE
+def _compute_stop_percentage(entry: float, d1: float, d2: float, cfg: TradingConfig) -> float:
+    mode = cfg.BASE_STOP_MODE
     if mode == "FIXED":
-        return float(STOP_FIXED_PERCENTAGE)
+        return float(cfg.STOP_FIXED_PERCENTAGE)
     anchor_price = None
     if mode == "DCA2" and d2 is not None:
         anchor_price = d2
     else:
         anchor_price = d1  # Default: DCA1
     anchor_dist = abs((anchor_price - entry) / entry) * 100.0
-    return anchor_dist + SL_BUFFER_PCT
-
-def build_altrady_open_payload(sig: dict, exchange: str, api_key: str, api_secret: str, leverage: int) -> dict:
-    base, side, entry = sig["base"], sig["side"], sig["entry"]
+    return anchor_dist + cfg.SL_BUFFER_PCT
+
+# Account-konstanter Kopf (Creds, Exchange, Hebel) wird beim Start einmal kompiliert,
+# pro Signal wird nur der preisabhängige Body berechnet – einmal für alle Accounts.
+_JSON_SEP = (",", ":")
+
+class PayloadTemplate:
+    """Unveränderliches Account-Profil: fester Payload-Kopf + vorserialisierte JSON-Bytes."""
+    __slots__ = ("account", "symbol_prefix", "head", "head_json")
+
+    def __init__(self, account: dict, quote: Optional[str] = None):
+        head = {
+            "api_key": account["api_key"],
+            "api_secret": account["api_secret"],
+            "exchange": account["exchange"],
+            "action": "open",
+            "order_type": "limit",
+            "leverage": account["leverage"],  # <<— je Account
+        }
+        object.__setattr__(self, "account", account)
+        object.__setattr__(self, "symbol_prefix", f"{account['exchange']}_{quote or CONFIG.QUOTE}_")
+        object.__setattr__(self, "head", head)
+        # '{"api_key":...,"leverage":5,"symbol":"BYBI_USDT_' – Base + Body werden pro Signal angehängt
+        object.__setattr__(self, "head_json", (
+            json.dumps(head, separators=_JSON_SEP)[:-1]
+            + ',"symbol":' + json.dumps(self.symbol_prefix)[:-1]
+        ).encode("utf-8"))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PayloadTemplate ist unveränderlich")
+
+    def render(self, base: str, body: dict) -> dict:
+        return {**self.head, "symbol": self.symbol_prefix + base, **body}
+
+    def render_json(self, base_json: bytes, body_json: bytes) -> bytes:
+        return self.head_json + base_json + body_json
+
+def compile_templates(accounts: List[dict], quote: Optional[str] = None) -> List[PayloadTemplate]:
+    return [PayloadTemplate(acc, quote) for acc in accounts]
+
+TEMPLATES: List[PayloadTemplate] = []   # in startup_checks() kompiliert, bei Reload neu
+_config_lock = threading.Lock()
+
+def active_config() -> Tuple[TradingConfig, List[PayloadTemplate]]:
+    """CONFIG + dazu kompilierte TEMPLATES, gemeinsam gelesen (Reload tauscht beide unter dem Lock)."""
+    with _config_lock:
+        return CONFIG, TEMPLATES
+
+def build_signal_body(sig: dict, cfg: Optional[TradingConfig] = None) -> dict:
+    """Preisabhängiger, account-unabhängiger Teil des Open-Payloads (`cfg`: Snapshot, Default CONFIG)."""
+    cfg = cfg or CONFIG
+    side, entry = sig["side"], sig["entry"]
     tp1, tp2, tp3 = sig["tp1"], sig["tp2"], sig["tp3"]
     d1, d2, d3 = sig["dca1"], sig["dca2"], sig["dca3"]
-
-    symbol = f"{exchange}_{QUOTE}_{base}"
+    long = side == "long"
 
     # Stop-Loss (in %)
-    stop_percentage = _compute_stop_percentage(entry, d1, d2)
+    stop_percentage = _compute_stop_percentage(entry, d1, d2, cfg)
 
     # Entry-Trigger bleibt Preis-basiert
-    if side == "long":
-        trigger_price = entry * (1.0 - ENTRY_TRIGGER_BUFFER_PCT/100.0)
-        expire_price  = entry * (1.0 - ENTRY_EXPIRATION_PRICE_PCT/100.0) if ENTRY_EXPIRATION_PRICE_PCT > 0 else None
-    else:
-        trigger_price = entry * (1.0 + ENTRY_TRIGGER_BUFFER_PCT/100.0)
-        expire_price  = entry * (1.0 + ENTRY_EXPIRATION_PRICE_PCT/100.0) if ENTRY_EXPIRATION_PRICE_PCT > 0 else None
+    trigger_price = entry * (1.0 - cfg.ENTRY_TRIGGER_BUFFER_PCT/100.0) if long else entry * (1.0 + cfg.ENTRY_TRIGGER_BUFFER_PCT/100.0)
 
     # Take Profits als Prozent (folgen Avg-Entry nach DCA)
-    tp1_pct = _percent_from_entry(entry, tp1) if tp1 is not None else None
-    tp2_pct = _percent_from_entry(entry, tp2) if tp2 is not None else None
-    tp3_pct = _percent_from_entry(entry, tp3) if tp3 is not None else None
-
     take_profits = []
-    if tp1_pct is not None:
-        take_profits.append({"price_percentage": float(f"{tp1_pct:.6f}"), "position_percentage": TP1_PCT})
-    if tp2_pct is not None:
-        take_profits.append({"price_percentage": float(f"{tp2_pct:.6f}"), "position_percentage": TP2_PCT})
-    if tp3_pct is not None:
-        take_profits.append({"price_percentage": float(f"{tp3_pct:.6f}"), "position_percentage": TP3_PCT})
+    for tp, pos_pct in ((tp1, cfg.TP1_PCT), (tp2, cfg.TP2_PCT), (tp3, cfg.TP3_PCT)):
+        if tp is not None:
+            take_profits.append({"price_percentage": round(_percent_from_entry(entry, tp), 6), "position_percentage": pos_pct})
 
     # Runner prozentual (von TP3 aus weiter)
-    runner_pct = None
-    if RUNNER_PCT > 0 and tp3 is not None:
-        runner_price = tp3 * RUNNER_TP_MULTIPLIER if side == "long" else tp3 / RUNNER_TP_MULTIPLIER
-        runner_pct = _percent_from_entry(entry, runner_price)
+    if cfg.RUNNER_PCT > 0 and tp3 is not None:
+        runner_price = tp3 * cfg.RUNNER_TP_MULTIPLIER if long else tp3 / cfg.RUNNER_TP_MULTIPLIER
         take_profits.append({
-            "price_percentage": float(f"{runner_pct:.6f}"),
-            "position_percentage": RUNNER_PCT,
-            "trailing_distance": RUNNER_TRAILING_DIST
+            "price_percentage": round(_percent_from_entry(entry, runner_price), 6),
+            "position_percentage": cfg.RUNNER_PCT,
+            "trailing_distance": cfg.RUNNER_TRAILING_DIST
         })
 
     # DCAs als fixe Preislevels (so wie Signale kommen)
     dca_orders = []
-    if DCA1_QTY_PCT > 0 and d1 is not None:
-        dca_orders.append({"price": d1, "quantity_percentage": DCA1_QTY_PCT})
-    if DCA2_QTY_PCT > 0 and d2 is not None:
-        dca_orders.append({"price": d2, "quantity_percentage": DCA2_QTY_PCT})
-    if DCA3_QTY_PCT > 0 and d3 is not None:
-        dca_orders.append({"price": d3, "quantity_percentage": DCA3_QTY_PCT})
-
-    payload = {
-        "api_key": api_key,
-        "api_secret": api_secret,
-        "exchange": exchange,
-        "action": "open",
-        "symbol": symbol,
+    for d, qty in ((d1, cfg.DCA1_QTY_PCT), (d2, cfg.DCA2_QTY_PCT), (d3, cfg.DCA3_QTY_PCT)):
+        if qty > 0 and d is not None:
+            dca_orders.append({"price": d, "quantity_percentage": qty})
+
+    body = {
         "side": side,
-        "order_type": "limit",
         "signal_price": entry,
-        "leverage": leverage,  # <<— aus ENV je Webhook
-        "entry_condition": { "price": float(f"{trigger_price:.10f}") },
+        "entry_condition": {"price": round(trigger_price, 10)},
         "take_profit": take_profits,
         "stop_loss": {
-            "order_type": STOP_LOSS_ORDER_TYPE,  # <<— NEU: SL explizit Market/Limit
-            "stop_percentage": float(f"{stop_percentage:.6f}"),
-            "protection_type": STOP_PROTECTION_TYPE
+            "order_type": cfg.STOP_LOSS_ORDER_TYPE,  # <<— SL explizit Market/Limit
+            "stop_percentage": round(stop_percentage, 6),
+            "protection_type": cfg.STOP_PROTECTION_TYPE
         },
         "dca_orders": dca_orders,
-        "entry_expiration": { "time": ENTRY_EXPIRATION_MIN }
+        "entry_expiration": {"time": cfg.ENTRY_EXPIRATION_MIN}
     }
 
-    if expire_price is not None:
-        payload["entry_expiration"]["price"] = float(f"{expire_price:.10f}")
+    if cfg.ENTRY_EXPIRATION_PRICE_PCT > 0:
+        expire_price = entry * (1.0 - cfg.ENTRY_EXPIRATION_PRICE_PCT/100.0) if long else entry * (1.0 + cfg.ENTRY_EXPIRATION_PRICE_PCT/100.0)
+        body["entry_expiration"]["price"] = round(expire_price, 10)
 
-    if ENTRY_WAIT_MINUTES > 0:
-        payload["entry_condition"]["time"] = ENTRY_WAIT_MINUTES
-        payload["entry_condition"]["operator"] = "OR"
+    if cfg.ENTRY_WAIT_MINUTES > 0:
+        body["entry_condition"]["time"] = cfg.ENTRY_WAIT_MINUTES
+        body["entry_condition"]["operator"] = "OR"
 
-    if TEST_MODE:
-        payload["test"] = True
+    if cfg.TEST_MODE:
+        body["test"] = True
+    return body
 
-    # Kurz-Log
-    print(f"\n📊 {base} {side.upper()}  |  {symbol}  |  Entry {entry}")
-    print(
-        f"   Trigger @ {trigger_price:.6f}  |  Expire in {ENTRY_EXPIRATION_MIN} min"
-        + (f" oder Preis {expire_price:.6f}" if expire_price else "")
-    )
-    print(f"   SL-Modus: {BASE_STOP_MODE}  → {stop_percentage:.2f}% unter Entry")
-    print(f"   SL-Order-Typ: {STOP_LOSS_ORDER_TYPE}")
-    if RUNNER_PCT > 0 and runner_pct is not None:
-        print(f"   Runner% ≈ {runner_pct:.6f}  |  Trail {RUNNER_TRAILING_DIST:.2f}%")
-    print(
-        "   DCAs: "
-        + (", ".join([f"{o['quantity_percentage']}%@{o['price']:.6f}" for o in dca_orders]) if dca_orders else "–")
+def render_payloads(sig: dict, templates: List[PayloadTemplate], cfg: Optional[TradingConfig] = None) -> Tuple[dict, list]:
+    """Body einmal berechnen (und serialisieren), dann je Account nur noch zusammensetzen."""
+    body = build_signal_body(sig, cfg)
+    if PAYLOAD_PRESERIALIZE:
+        base_json = json.dumps(sig["base"])[1:].encode("utf-8")                 # 'BTC"'
+        body_json = ("," + json.dumps(body, separators=_JSON_SEP)[1:]).encode("utf-8")
+        return body, [(t.account, t.render_json(base_json, body_json)) for t in templates]
+    return body, [(t.account, t.render(sig["base"], body)) for t in templates]
+
+def build_altrady_open_payload(sig: dict, exchange: str, api_key: str, api_secret: str, leverage: int) -> dict:
+    tpl = PayloadTemplate({"api_key": api_key, "api_secret": api_secret, "exchange": exchange, "leverage": leverage})
+    return tpl.render(sig["base"], build_signal_body(sig))
+
+def signal_summary(sig: dict, body: dict, cfg: Optional[TradingConfig] = None) -> str:
+    """Kurz-Log für ein Signal (nach dem Dispatch ausgeben, nicht davor)."""
+    cfg = cfg or CONFIG
+    tps = body["take_profit"]
+    runner = tps[3] if len(tps) > 3 else None
+    dcas = ", ".join(f"{o['quantity_percentage']}%@{o['price']:.6f}" for o in body["dca_orders"]) or "–"
+    expire = body["entry_expiration"].get("price")
+    return (
+        f"📊 {sig['base']} {sig['side'].upper()} | Entry {sig['entry']} | Trigger @ {body['entry_condition']['price']:.6f}"
+        f" | Expire {cfg.ENTRY_EXPIRATION_MIN} min" + (f" oder Preis {expire:.6f}" if expire else "")
+        + f" | SL {cfg.BASE_STOP_MODE} → {body['stop_loss']['stop_percentage']:.2f}% ({cfg.STOP_LOSS_ORDER_TYPE})"
+        + (f" | Runner% ≈ {runner['price_percentage']:.6f}, Trail {cfg.RUNNER_TRAILING_DIST:.2f}%" if runner else "")
+        + f" | DCAs: {dcas}"
     )
-    return payload
 
 # =========================
 # HTTP (pro Webhook)
 # =========================
-def _post_one(url: str, payload: dict):
-    print(f"   📤 Sende an {url} ...")
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+class DeadlineExceeded(Exception):
+    """Signal ist zu alt für einen (weiteren) Order-Post."""
+
+class CircuitOpen(Exception):
+    """Circuit des Endpoints ist offen – kein (weiterer) Versuch."""
+
+def signal_deadline(posted: float, cfg: Optional[TradingConfig] = None) -> float:
+    """Spätester Post-Zeitpunkt: Discord-Post + min(SIGNAL_MAX_AGE_SECONDS, Entry-Expiry)."""
+    cfg = cfg or CONFIG
+    ttls = [t for t in (cfg.SIGNAL_MAX_AGE_SECONDS, cfg.ENTRY_EXPIRATION_MIN * 60) if t > 0]
+    return posted + min(ttls) if ttls else float("inf")
+
+class CircuitBreaker:
+    """
+    Je Webhook-URL: nach CB_FAILURE_THRESHOLD Verbindungsfehlern/5xx in Folge offen –
+    Posts schlagen dann sofort fehl. Ein Hintergrund-Thread prüft den Endpoint per HEAD
+    alle CB_PROBE_SECONDS und schließt den Breaker, sobald er antwortet (Status < 500).
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.failures = 0
+        self.open = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        return not self.open
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.open or CB_FAILURE_THRESHOLD <= 0 or self.failures < CB_FAILURE_THRESHOLD:
+                return
+            self.open = True
+        LOG.error("🔌 Circuit offen", url=self.url, failures=self.failures, probe_s=CB_PROBE_SECONDS)
+        threading.Thread(target=self._probe_loop, name="cb-probe", daemon=True).start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(CB_PROBE_SECONDS)
+            try:
+                r = session_for(self.url).head(self.url, timeout=(ALTRADY_CONNECT_TIMEOUT, ALTRADY_CONNECT_TIMEOUT),
+                                               allow_redirects=False)
+                if r.status_code < 500:
+                    break
+            except Exception:
+                pass
+        with self._lock:
+            self.open = False
+            self.failures = 0
+        LOG.info("🔌 Circuit geschlossen – Endpoint antwortet wieder", url=self.url)
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def breaker_for(url: str) -> CircuitBreaker:
+    with _breakers_lock:
+        cb = _breakers.get(url)
+        if cb is None:
+            cb = _breakers[url] = CircuitBreaker(url)
+        return cb
+
+def _endpoint_failure(e: Exception) -> bool:
+    """Zählt für den Breaker: Verbindung/Timeout/5xx – nicht 4xx (Payload/Creds)."""
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    return status is None or status >= 500
+
+def _post_one(url: str, payload, deadline: float = float("inf")):
+    """payload: dict oder vorserialisierte JSON-Bytes. Retries nur bis zur Deadline des Signals."""
+    LOG.debug("Sende Order", url=url)
+    kwargs = {"data": payload, "headers": _JSON_HEADERS} if isinstance(payload, bytes) else {"json": payload}
+    breaker = breaker_for(url)
     for attempt in range(3):
+        left = deadline - time.time()
+        if left <= 0:
+            raise DeadlineExceeded(f"Deadline überschritten vor Versuch {attempt + 1}")
+        if not breaker.allow():
+            raise CircuitOpen(f"Circuit offen vor Versuch {attempt + 1}")
         try:
-            r = requests.post(url, json=payload, timeout=20)
+            r = session_for(url).post(url, timeout=(min(ALTRADY_CONNECT_TIMEOUT, left), min(ALTRADY_READ_TIMEOUT, left)), **kwargs)
             if r.status_code == 429:
                 delay = 2.0
                 try:
@@ -412,124 +1064,672 @@ def _post_one(url: str, payload: dict):
                         delay = float(r.json().get("retry_after", 2.0))
                 except:
                     pass
+                if time.time() + delay > deadline:
+                    raise DeadlineExceeded("429 – Retry nach der Deadline")
+                M_RETRIES.inc()
                 time.sleep(delay + 0.25)
                 continue
 
             if r.status_code == 204:
-                print("   ✅ Erfolg! Pending order angelegt (wartet auf Trigger).")
+                breaker.success()
+                LOG.debug("✅ Pending Order angelegt (wartet auf Trigger)", url=url, status=204)
                 return r
 
             r.raise_for_status()
-            print("   ✅ Erfolg!")
+            breaker.success()
+            LOG.debug("✅ Order angenommen", url=url, status=r.status_code)
             return r
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            if attempt == 2:
-                print(f"   ❌ Fehler bei {url}: {e}")
+            if _endpoint_failure(e):
+                breaker.failure()
+            backoff = 1.5 * (attempt + 1)
+            if attempt == 2 or time.time() + backoff >= deadline:
+                LOG.error("❌ Order-Post fehlgeschlagen", url=url, attempt=attempt + 1, error=str(e))
                 raise
-            time.sleep(1.5 * (attempt + 1))
+            if not breaker.allow():
+                LOG.error("❌ Order-Post abgebrochen – Circuit offen", url=url, attempt=attempt + 1, error=str(e))
+                raise CircuitOpen(f"Circuit offen nach Versuch {attempt + 1}: {e}") from e
+            M_RETRIES.inc()
+            time.sleep(backoff)
 
-def post_to_all_webhooks(payloads_and_urls: List[Tuple[str, dict]]):
-    last_resp = None
-    for i, (url, payload) in enumerate(payloads_and_urls, 1):
-        print(f"→ Webhook #{i} von {len(payloads_and_urls)}")
-        try:
-            last_resp = _post_one(url, payload)
-        except Exception as e:
-            print(f"   ⚠️ Weiter mit nächstem Webhook (Fehler: {e})")
-            continue
-    return last_resp
+# =========================
+# Fan-out (N Accounts parallel)
+# =========================
+_fanout_pool: Optional[ThreadPoolExecutor] = None
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+def _get_fanout_pool() -> ThreadPoolExecutor:
+    global _fanout_pool
+    if _fanout_pool is None:
+        _fanout_pool = ThreadPoolExecutor(max_workers=max(1, FANOUT_MAX_WORKERS), thread_name_prefix="fanout")
+    return _fanout_pool
+
+def _host_slot(url: str) -> threading.Semaphore:
+    host = urlsplit(url).netloc.lower()
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(max(1, FANOUT_PER_HOST))
+        return slot
+
+def _dispatch_one(account: dict, payload: dict, deadline: float = float("inf")) -> dict:
+    url = account["webhook_url"]
+    res = {"account": account["name"], "url": url, "ok": False, "outcome": "failed", "status": None,
+           "error": None, "elapsed_ms": 0.0}
+    t0 = time.perf_counter()
+    try:
+        if time.time() >= deadline:
+            raise DeadlineExceeded("Deadline überschritten vor dem Post")
+        if not breaker_for(url).allow():
+            res["outcome"], res["error"] = "circuit_open", "Circuit offen (Endpoint down)"
+        else:
+            with _host_slot(url):
+                r = _post_one(url, payload, deadline)
+            if r is None:
+                res["error"] = "429 (Retries erschöpft)"
+            else:
+                res["ok"], res["outcome"], res["status"] = True, "ok", r.status_code
+    except DeadlineExceeded as e:
+        res["outcome"], res["error"] = "stale", str(e)
+    except CircuitOpen as e:
+        res["outcome"], res["error"] = "circuit_open", str(e)
+    except Exception as e:
+        res["status"] = getattr(getattr(e, "response", None), "status_code", None)
+        res["error"] = str(e)
+    res["elapsed_ms"] = (time.perf_counter() - t0) * 1000.0
+    res["done_at"] = time.time()
+    M_STAGE.observe(res["elapsed_ms"] / 1000.0, stage="webhook", account=res["account"])
+    M_OUTCOMES.inc(outcome=res["outcome"], account=res["account"])
+    return res
+
+def post_to_all_webhooks(jobs: List[Tuple[dict, dict]], deadline: float = float("inf")) -> List[dict]:
+    """Postet alle (account, payload) parallel; Dauer ≈ langsamster Account statt Summe."""
+    if not jobs:
+        return []
+    t0 = time.perf_counter()
+    pool = _get_fanout_pool()
+    futures = [pool.submit(_dispatch_one, acc, payload, deadline) for acc, payload in jobs]
+    results = [f.result() for f in futures]
+    total_ms = (time.perf_counter() - t0) * 1000.0
+
+    ok = sum(1 for r in results if r["ok"])
+    LOG.info(f"→ Fan-out: {ok}/{len(results)} ok", ok=ok, total=len(results), ms=round(total_ms, 1))
+    for r in results:
+        LOG.log("info" if r["ok"] else "warning", f"{'✅' if r['ok'] else '⚠️'} {r['account']}",
+                account=r["account"], outcome=r["outcome"], status=r["status"], error=r["error"],
+                ms=round(r["elapsed_ms"], 1))
+    return results
 
 # =========================
-# Main
+# Poll-Scheduler (mehrere Channels)
 # =========================
-def main():
-    print("="*50)
-    print("🚀 Discord → Altrady Bot v2.6 (Percent TPs, SL@DCA1 default, Runner)")
-    print("="*50)
-    print(f"Exchange #1: {ALTRADY_EXCHANGE} | Leverage: {LEVERAGE_1}x")
-    if ALTRADY_WEBHOOK_URL_2 and ALTRADY_API_KEY_2 and ALTRADY_API_SECRET_2 and ALTRADY_EXCHANGE_2:
-        print(f"Exchange #2: {ALTRADY_EXCHANGE_2} | Leverage: {LEVERAGE_2}x")
-    print(f"TP-Splits: {TP1_PCT}/{TP2_PCT}/{TP3_PCT}% + Runner {RUNNER_PCT}%")
-    print(f"DCAs: D1 {DCA1_QTY_PCT}%, D2 {DCA2_QTY_PCT}%, D3 {DCA3_QTY_PCT}%")
-    print(f"Stop: {BASE_STOP_MODE} + Buffer {SL_BUFFER_PCT}%"
-          + (f" | FIXED={STOP_FIXED_PERCENTAGE}%" if BASE_STOP_MODE=='FIXED' else ""))
-    print(f"SL-Order-Typ (ENV): {STOP_LOSS_ORDER_TYPE}")
-    print(f"Entry: Buffer {ENTRY_TRIGGER_BUFFER_PCT}% | Expire {ENTRY_EXPIRATION_MIN} min"
-          + (f" + Preis±{ENTRY_EXPIRATION_PRICE_PCT}%" if ENTRY_EXPIRATION_PRICE_PCT>0 else ""))
-    if COOLDOWN_SECONDS > 0:
-        print(f"Cooldown: {COOLDOWN_SECONDS}s")
-    if TEST_MODE:
-        print("⚠️ TEST MODE aktiv")
-
-    active_webhooks = 1 + int(bool(ALTRADY_WEBHOOK_URL_2 and ALTRADY_API_KEY_2 and ALTRADY_API_SECRET_2 and ALTRADY_EXCHANGE_2))
-    print(f"Webhooks aktiv: {active_webhooks}")
-    print("-"*50)
+class PollScheduler:
+    """
+    Verteilt die Polls aller Channels gleichmäßig über eine Periode: statt N Requests
+    auf einmal gibt es einen alle period/N Sekunden. Channels mit viel Aktivität
+    (neue Messages, Signale) kommen in der Periode zuerst dran. Die Periode startet
+    bei POLL_BASE_SECONDS und wird per `adapt()` nach jeder Periode angepasst.
+    """
+
+    def __init__(self, channel_ids: List[str], period: float):
+        self.period = max(1.0, float(period))
+        self.activity = {str(c): 0.0 for c in channel_ids}
+
+    def record(self, channel_id: str, new_msgs: int, signals: int):
+        a = self.activity.get(channel_id, 0.0)
+        self.activity[channel_id] = a * CONFIG.POLL_ACTIVITY_DECAY + new_msgs + 5 * signals
+
+    def plan(self, now: Optional[float] = None) -> List[Tuple[float, str]]:
+        """(Zeitpunkt, channel_id) für die nächste Periode, aktivste Channels zuerst."""
+        now = time.time() if now is None else now
+        period_start = (now // self.period) * self.period
+        first = period_start + CONFIG.POLL_OFFSET_SECONDS % self.period
+        if now >= first:
+            first += self.period
+        order = sorted(self.activity, key=lambda c: -self.activity[c])
+        slot = self.period / len(order)
+        jitter_max = max(0.0, min(CONFIG.POLL_JITTER_MAX, slot / 2))
+        return [(first + i * slot + random.uniform(0, jitter_max), c) for i, c in enumerate(order)]
+
+    def adapt(self, active: bool, headroom: Optional[float]):
+        """Aktiv + genug Rest-Budget -> kürzer (bis POLL_MIN_SECONDS), sonst länger (bis POLL_MAX_SECONDS)."""
+        if active and (headroom is None or headroom >= CONFIG.POLL_MIN_HEADROOM):
+            self.period = max(CONFIG.POLL_MIN_SECONDS, self.period * CONFIG.POLL_SHRINK_FACTOR)
+        else:
+            self.period = min(max(CONFIG.POLL_MAX_SECONDS, CONFIG.POLL_MIN_SECONDS), self.period * CONFIG.POLL_BACKOFF_FACTOR)
+
+SCHEDULER = PollScheduler(CHANNEL_IDS, CONFIG.POLL_BASE_SECONDS)
 
-    state = load_state()
-    last_id = state.get("last_id")
-    last_trade_ts = float(state.get("last_trade_ts", 0.0))
+# =========================
+# Konfiguration neu laden (SIGHUP / Datei-Änderung)
+# =========================
+def apply_config(cfg: TradingConfig):
+    """
+    Geprüfte Konfiguration übernehmen (Hauptschleife, zwischen zwei Zyklen). Accounts (Hebel)
+    werden neu geladen und Templates neu kompiliert, bevor CONFIG und TEMPLATES gemeinsam
+    getauscht werden – wirft vorher, wenn etwas fehlt, dann bleibt alles beim Alten.
+    """
+    global CONFIG, ACCOUNTS, TEMPLATES
+    accounts = load_accounts(cfg)
+    if not accounts:
+        raise ValueError(f"keine Accounts ({ACCOUNTS_FILE})")
+    templates = compile_templates(accounts, cfg.QUOTE)
+    old, old_accounts = CONFIG, ACCOUNTS
+    with _config_lock:
+        CONFIG, ACCOUNTS, TEMPLATES = cfg, accounts, templates
+
+    if cfg.POLL_BASE_SECONDS != old.POLL_BASE_SECONDS:
+        SCHEDULER.period = max(1.0, float(cfg.POLL_BASE_SECONDS))
+    SCHEDULER.period = min(max(SCHEDULER.period, cfg.POLL_MIN_SECONDS), max(cfg.POLL_MAX_SECONDS, cfg.POLL_MIN_SECONDS))
+
+    changed = {k: [a, b] for k, (a, b) in cfg.diff(old).items()}
+    leverages = lambda accs: {a["name"]: a["leverage"] for a in accs}
+    if leverages(accounts) != leverages(old_accounts):
+        changed["accounts"] = [leverages(old_accounts), leverages(accounts)]
+    LOG.info("🔧 Konfiguration neu geladen", changed=changed or "keine Änderung")
+
+RELOADER = ConfigReloader(load_config, apply_config, [*CONFIG_SOURCES, ACCOUNTS_FILE] if CONFIG_WATCH else [])
 
-    # Erststart: baseline auf aktuellste Message setzen (nicht rückwirkend)
-    if last_id is None:
+# =========================
+# Message-Verarbeitung
+# =========================
+def journal_message(mid: int, channel_id: str, status: str):
+    if JOURNAL:
+        JOURNAL.record_message(mid, channel_id, status)
+
+def dispatch_signal(mid: int, channel_id: str, sig: dict, jobs: list, deadline: float = float("inf")) -> List[dict]:
+    """Intent ins Journal (fsync), dann Fan-out, dann Ergebnisse je Account (ein Commit)."""
+    if JOURNAL:
+        JOURNAL.record_signal(mid, channel_id, sig, [acc["name"] for acc, _ in jobs])
+    results = post_to_all_webhooks(jobs, deadline)
+    if JOURNAL:
+        for r in results:
+            JOURNAL.record_outcome(mid, r["account"], r["outcome"], r["status"], r["error"])
+        JOURNAL.flush()
+    return results
+
+def recover_journal():
+    """Dispatches, die beim letzten Lauf ohne Ergebnis blieben (Crash während des Fan-outs)."""
+    if not JOURNAL:
+        return
+    for mid, cid, sig, names in JOURNAL.pending():
+        if not JOURNAL_RESEND_PENDING:
+            LOG.warning(f"⚠️ Journal: Message {mid} ({sig.get('base')} {sig.get('side')}) – Ergebnis unklar für "
+                  f"{', '.join(names)}, nicht erneut gesendet (JOURNAL_RESEND_PENDING=false)")
+            for name in names:
+                JOURNAL.record_outcome(mid, name, "unknown")
+            continue
+        LOG.info(f"♻️ Journal: sende Message {mid} ({sig.get('base')} {sig.get('side')}) erneut an {', '.join(names)}")
+        _, jobs = render_payloads(sig, [t for t in TEMPLATES if t.account["name"] in names])
+        for r in post_to_all_webhooks(jobs, signal_deadline(snowflake_time(mid))):
+            JOURNAL.record_outcome(mid, r["account"], r["outcome"], r["status"], r["error"])
+        # Accounts, die es nicht mehr gibt
+        for name in set(names) - {acc["name"] for acc, _ in jobs}:
+            JOURNAL.record_outcome(mid, name, "unknown", error="Account nicht mehr konfiguriert")
+    JOURNAL.flush()
+
+class CursorTracker:
+    """
+    Cursor je Channel, der nur hinter vollständig verarbeitete Messages vorrückt.
+    Die Ingestion liest ab `read_position()` weiter, während Signale noch in der
+    Dispatch-Queue stehen; gespeichert wird höchstens bis vor das älteste offene Signal.
+    """
+
+    def __init__(self, state: dict):
+        self.state = state
+        self._lock = threading.Lock()
+        self._read: Dict[str, int] = {}
+        self._inflight: Dict[str, set] = {}
+
+    def read_position(self, channel_id: str) -> Optional[str]:
+        with self._lock:
+            pos = self._read.get(channel_id)
+            return str(pos) if pos else channel_state(self.state, channel_id).get("last_id")
+
+    def begin(self, channel_id: str, mid: int):
+        with self._lock:
+            self._inflight.setdefault(channel_id, set()).add(mid)
+
+    def inflight_count(self) -> int:
+        """Offene Signale über alle Channels."""
+        with self._lock:
+            return sum(len(v) for v in self._inflight.values())
+
+    def ingested(self, channel_id: str, max_id: int):
+        with self._lock:
+            self._read[channel_id] = max(self._read.get(channel_id, 0), max_id)
+            self._advance(channel_id)
+
+    def done(self, channel_id: str, mid: int):
+        with self._lock:
+            self._inflight.get(channel_id, set()).discard(mid)
+            self._advance(channel_id)
+
+    def _advance(self, channel_id: str):
+        inflight = self._inflight.get(channel_id)
+        target = min(inflight) - 1 if inflight else self._read.get(channel_id, 0)
+        cursor = channel_state(self.state, channel_id)
+        if target > int(cursor.get("last_id") or 0):
+            cursor["last_id"] = str(target)
+            save_state(self.state)
+
+CURSORS: Optional[CursorTracker] = None
+
+def cursor_tracker(state: dict) -> CursorTracker:
+    global CURSORS
+    if CURSORS is None or CURSORS.state is not state:
+        CURSORS = CursorTracker(state)
+    return CURSORS
+
+class SignalJob:
+    """`cfg`/`templates`: Snapshot aus active_config() beim Parsen – gilt bis zum Post."""
+    __slots__ = ("channel_id", "mid", "sig", "trace", "cfg", "templates")
+
+    def __init__(self, channel_id: str, mid: int, sig: dict, trace: dict,
+                 cfg: TradingConfig, templates: List[PayloadTemplate]):
+        self.channel_id = channel_id
+        self.mid = mid
+        self.sig = sig
+        self.trace = trace
+        self.cfg = cfg
+        self.templates = templates
+
+_cooldown_lock = threading.Lock()
+
+def dispatch_job(job: SignalJob, state: dict):
+    """
+    Dispatch-Stufe: Cooldown + Dedup prüfen, Payloads rendern, posten, Cursor freigeben.
+    Mit Cooldown laufen Signale nacheinander – ob das nächste blockiert wird, hängt vom
+    Ergebnis des vorigen ab. Ohne Cooldown parallel (je Worker des Dispatchers).
+    """
+    if job.cfg.COOLDOWN_SECONDS > 0:
+        with _cooldown_lock:
+            _dispatch_job(job, state)
+    else:
+        _dispatch_job(job, state)
+
+def _dispatch_job(job: SignalJob, state: dict):
+    sig, mid, trace = job.sig, job.mid, job.trace
+    # Ein Snapshot je Signal (seit dem Parsen, inkl. DCA-Backfill): ein Reload währenddessen gilt erst für das nächste
+    cfg, templates = job.cfg, job.templates
+    try:
+        # Cooldown: blocke neue Orders kurz nach dem letzten Open (zum Dispatch-Zeitpunkt)
+        if cfg.COOLDOWN_SECONDS > 0 and (time.time() - float(state.get("last_trade_ts", 0.0))) < cfg.COOLDOWN_SECONDS:
+            journal_message(mid, job.channel_id, "cooldown")
+            return
+        if DEDUP.is_duplicate(sig):
+            STATS["duplicates"] += 1
+            journal_message(mid, job.channel_id, "duplicate")
+            LOG.info("🔁 Duplikat übersprungen", base=sig["base"], side=sig["side"], entry=sig["entry"], message_id=mid)
+            return
+
+        trace["dequeued"] = time.time()
+        M_STAGE.observe(trace["dequeued"] - trace["parsed"], stage="queue")
+        deadline = signal_deadline(trace["posted"], cfg)
+        if trace["dequeued"] >= deadline:
+            journal_message(mid, job.channel_id, "stale")
+            for t in templates:
+                M_OUTCOMES.inc(outcome="stale", account=t.account["name"])
+            LOG.warning("⌛ Signal zu alt, verworfen", base=sig["base"], side=sig["side"], message_id=mid,
+                        age_s=round(trace["dequeued"] - trace["posted"], 1))
+            return
+        body, jobs = render_payloads(sig, templates, cfg)
+        trace["payload"] = time.time()
+        M_STAGE.observe(trace["payload"] - trace["dequeued"], stage="payload")
+        results = dispatch_signal(mid, job.channel_id, sig, jobs, deadline)
+        for r in results:
+            if r["ok"]:
+                M_E2E.observe(max(0.0, r["done_at"] - trace["posted"]), account=r["account"])
+        # Nur merken, wenn mindestens ein Account die Order hat – sonst darf ein Repost nochmal
+        if any(r["ok"] for r in results):
+            DEDUP.add(sig)
+        LOG.info(signal_summary(sig, body, cfg), base=sig["base"], side=sig["side"], message_id=mid)
+        LOG.info(stage_line(trace, results), message_id=mid)
+        state["last_trade_ts"] = time.time()
+    finally:
+        cursor_tracker(state).done(job.channel_id, mid)
+
+class Dispatcher:
+    """
+    Worker-Threads mit je einer begrenzten Queue; ein Signal geht nach (Base, Side) immer an
+    denselben Worker. Ein langsames Signal (Retries, Circuit, höchstens bis zu seiner Deadline)
+    hält so nur Signale desselben Keys auf – dort ist die Reihenfolge für Dedup nötig.
+    """
+
+    def __init__(self, state: dict, maxsize: int, workers: int = 1):
+        self.state = state
+        n = max(1, workers)
+        self.queues: "List[queue.Queue[SignalJob]]" = [queue.Queue(maxsize=max(1, maxsize // n)) for _ in range(n)]
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run, args=(q,), name=f"dispatcher-{i}", daemon=True)
+                         for i, q in enumerate(self.queues)]
+
+    def start(self) -> "Dispatcher":
+        for t in self._threads:
+            t.start()
+        return self
+
+    def qsize(self) -> int:
+        return sum(q.qsize() for q in self.queues)
+
+    def submit(self, job: SignalJob):
+        """Blockiert, solange die Queue des Workers voll ist (Backpressure auf die Ingestion)."""
+        q = self.queues[hash((job.sig["base"], job.sig["side"])) % len(self.queues)]
         try:
-            page = fetch_messages_after(CHANNEL_ID, None, limit=1)
-            if page:
-                last_id = str(page[0]["id"])
-                state["last_id"] = last_id
-                save_state(state)
-        except:
-            pass
+            q.put_nowait(job)
+        except queue.Full:
+            LOG.warning("⏳ Dispatch-Queue voll – Ingestion wartet", size=q.maxsize, every=LOG_REPEAT_SECONDS)
+            q.put(job)
 
-    print("👀 Überwache Channel...\n")
+    def _run(self, q: "queue.Queue[SignalJob]"):
+        while not self._stop.is_set():
+            try:
+                job = q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                dispatch_job(job, self.state)
+            except Exception as e:
+                LOG.error("❌ Dispatch-Fehler", message_id=job.mid, error=str(e))
+            finally:
+                q.task_done()
+
+    def stop(self, drain_seconds: float = 0.0):
+        """Offene Signale bis `drain_seconds` abarbeiten, dann anhalten (Rest bleibt hinter dem Cursor)."""
+        deadline = time.time() + drain_seconds
+        while any(q.unfinished_tasks for q in self.queues) and time.time() < deadline:
+            time.sleep(0.1)
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=max(1.0, ALTRADY_READ_TIMEOUT))
+
+DISPATCHER: Optional[Dispatcher] = None
+
+def handle_messages(channel_id: str, msgs: List[MessageRecord], state: dict) -> Tuple[int, int]:
+    """
+    Ingestion-Stufe: Messages eines Channels aufsteigend nach ID extrahieren und parsen.
+    Signale gehen sofort an den Dispatcher (ohne laufenden Dispatcher: direkt hier).
+    Rückgabe: (neue Messages, Signale).
+    """
+    cursors = cursor_tracker(state)
+    max_seen = int(cursors.read_position(channel_id) or 0)
+    new_msgs = signals = 0
+    cfg, templates = active_config()
+
+    for m in sorted(msgs, key=lambda m: m.id):
+        mid = m.id
+        # Gateway + REST-Nachholen können sich überlappen
+        if mid <= max_seen:
+            continue
+        max_seen = mid
+        # Schon im Journal: vor einem Crash verarbeitet, Cursor aber nicht mehr gespeichert
+        if JOURNAL and JOURNAL.seen(mid):
+            continue
+        new_msgs += 1
+        STATS["messages"] += 1
+        # Zeitstempel je Stufe (Unix-Sekunden), Discord-Post aus der Snowflake-ID
+        trace = {"posted": snowflake_time(mid), "received": m.received_at or time.time()}
+        if cfg.MAX_MESSAGE_AGE_SECONDS > 0 and trace["received"] - trace["posted"] > cfg.MAX_MESSAGE_AGE_SECONDS:
+            STATS["too_old"] += 1
+            continue
+        M_INGEST.observe(max(0.0, trace["received"] - trace["posted"]))
+
+        t0 = trace["started"] = time.time()
+        parts = m.parts
+        reason = prefilter_reason(m, parts)
+        if reason:
+            STATS["rejected_author" if reason == "author" else "rejected_prefilter"] += 1
+            journal_message(mid, channel_id, reason)
+            M_STAGE.observe(time.time() - t0, stage="extract")
+            continue
 
+        raw = clean_markdown("\n".join(parts))
+        trace["extracted"] = time.time()
+        M_STAGE.observe(trace["extracted"] - t0, stage="extract")
+        sig = None
+        if raw:
+            STATS["parsed"] += 1
+            sig = parse_signal_from_text(raw, cfg)
+        trace["parsed"] = time.time()
+        M_STAGE.observe(trace["parsed"] - trace["extracted"], stage="parse")
+        if not sig:
+            journal_message(mid, channel_id, "no_signal")
+            continue
+
+        STATS["signals"] += 1
+        signals += 1
+        job = SignalJob(channel_id, mid, sig, trace, cfg, templates)
+        cursors.begin(channel_id, mid)
+        if DISPATCHER:
+            DISPATCHER.submit(job)
+        else:
+            dispatch_job(job, state)
+
+    cursors.ingested(channel_id, max_seen)
+    maybe_log_stats()
+    return new_msgs, signals
+
+_catchup_floor: Dict[str, str] = {}   # channel -> zuletzt als Cursor übernommene Grenze
+
+def catchup_position(channel_id: str, state: dict) -> Optional[str]:
+    """
+    Lese-Cursor; liegt er weiter zurück als MAX_MESSAGE_AGE_SECONDS, direkt ab dieser Grenze
+    laden. Die Grenze wird einmal als Cursor übernommen – leere Seiten rücken ihn in einem
+    ruhigen Channel nicht vor. Steht er danach noch auf dieser Grenze, hat der letzte Poll den
+    Bereich bis zur neuen Grenze schon gelesen (MAX_MESSAGE_AGE_SECONDS > POLL_MAX_SECONDS):
+    kein Log, kein erneutes Speichern.
+    """
+    tracker = cursor_tracker(state)
+    pos = tracker.read_position(channel_id)
+    if CONFIG.MAX_MESSAGE_AGE_SECONDS <= 0 or pos is None:
+        return pos
+    floor = time_snowflake(time.time() - CONFIG.MAX_MESSAGE_AGE_SECONDS)
+    if int(pos) >= floor:
+        return pos
+    if pos != _catchup_floor.get(channel_id):
+        LOG.info(f"⏩ Überspringe Messages älter als {CONFIG.MAX_MESSAGE_AGE_SECONDS}s", channel=channel_id)
+        tracker.ingested(channel_id, floor)
+        _catchup_floor[channel_id] = str(floor)
+    return str(floor)
+
+def poll_channel(channel_id: str, state: dict) -> Tuple[int, int]:
+    """Seite für Seite verarbeiten; Cursor wird nach jeder Seite gespeichert (Nachholen ist fortsetzbar)."""
+    new_msgs = signals = 0
+    for page in iter_message_pages(channel_id, catchup_position(channel_id, state), limit=DISCORD_FETCH_LIMIT):
+        n, s = handle_messages(channel_id, page, state)
+        new_msgs += n
+        signals += s
+        if JOURNAL:
+            JOURNAL.flush()
+    return new_msgs, signals
+
+def run_poll_loop(state: dict):
+    sched = SCHEDULER
     while True:
         try:
-            msgs = fetch_messages_after(CHANNEL_ID, last_id, limit=DISCORD_FETCH_LIMIT)
-            msgs_sorted = sorted(msgs, key=lambda m: int(m.get("id","0")))
-            max_seen = int(last_id or 0)
-
-            if not msgs_sorted:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Warte auf Signale...")
-            else:
-                for m in msgs_sorted:
-                    mid = int(m.get("id","0"))
-                    raw = message_text(m)
-
-                    # Cooldown: blocke neue Orders kurz nach dem letzten Open
-                    if COOLDOWN_SECONDS > 0 and (time.time() - last_trade_ts) < COOLDOWN_SECONDS:
-                        max_seen = max(max_seen, mid)
-                        continue
-
-                    if raw:
-                        sig = parse_signal_from_text(raw)
-                        if sig:
-                            # Payload #1
-                            p1 = build_altrady_open_payload(sig, ALTRADY_EXCHANGE, ALTRADY_API_KEY, ALTRADY_API_SECRET, LEVERAGE_1)
-                            jobs = [(ALTRADY_WEBHOOK_URL, p1)]
+            PROFILER.tick()
+            RELOADER.tick()
+            seen = 0
+            for due, cid in sched.plan():
+                time.sleep(max(0, due - time.time()))
+                try:
+                    new_msgs, signals = poll_channel(cid, state)
+                except Exception as e:
+                    LOG.error("❌ Poll-Fehler", channel=cid, error=str(e), every=LOG_REPEAT_SECONDS, key=f"poll:{cid}:{e}")
+                    continue
+                sched.record(cid, new_msgs, signals)
+                seen += new_msgs
+            budgets = [h for h in (RATE_LIMITS.headroom(ROUTE_MESSAGES, c) for c in CHANNEL_IDS) if h is not None]
+            sched.adapt(seen > 0, min(budgets) if budgets else None)
+            if not seen:
+                LOG.info("Warte auf Signale...", every=LOG_REPEAT_SECONDS)
 
-                            # Payload #2 (optional)
-                            if ALTRADY_WEBHOOK_URL_2 and ALTRADY_API_KEY_2 and ALTRADY_API_SECRET_2 and ALTRADY_EXCHANGE_2:
-                                p2 = build_altrady_open_payload(sig, ALTRADY_EXCHANGE_2, ALTRADY_API_KEY_2, ALTRADY_API_SECRET_2, LEVERAGE_2)
-                                jobs.append((ALTRADY_WEBHOOK_URL_2, p2))
+        except KeyboardInterrupt:
+            LOG.info(stats_line())
+            LOG.info("👋 Beendet")
+            break
+        except Exception as e:
+            LOG.error("❌ Fehler", error=str(e))
+            time.sleep(10)
 
-                            post_to_all_webhooks(jobs)
-                            last_trade_ts = time.time()
-                            state["last_trade_ts"] = last_trade_ts
+def run_gateway_loop(state: dict):
+    """
+    Event-getrieben: MESSAGE_CREATE über das Gateway. Nach jedem (Re)Connect und
+    solange das Gateway getrennt ist, wird per REST ab `last_id` nachgeholt.
+    """
+    from gateway import DiscordGateway
 
-                    max_seen = max(max_seen, mid)
+    gw = DiscordGateway(DISCORD_TOKEN, CHANNEL_IDS, url=DISCORD_GATEWAY_URL, intents=GATEWAY_INTENTS)
+    gw.start()
+    next_poll = time.time() + CONFIG.POLL_BASE_SECONDS
 
-                last_id = str(max_seen)
-                state["last_id"] = last_id
-                save_state(state)
+    while True:
+        try:
+            PROFILER.tick()
+            RELOADER.tick()
+            try:
+                m = gw.events.get(timeout=1.0)
+            except queue.Empty:
+                m = None
+            # Erst nach dem get() prüfen: READY/RESUMED setzt das Flag, bevor Events der neuen
+            # Session in der Queue landen. Ein solches Event darf den Lese-Cursor nicht über
+            # die Lücke schieben – also zuerst per REST nachholen, dann das Event verarbeiten.
+            if gw.consume_resync() or (not gw.connected and time.time() >= next_poll):
+                for cid in CHANNEL_IDS:
+                    poll_channel(cid, state)
+                next_poll = time.time() + CONFIG.POLL_BASE_SECONDS
+            if m is None:
+                continue
+            rec = MessageRecord.from_dict(m)
+            handle_messages(rec.channel_id, [rec], state)
 
         except KeyboardInterrupt:
-            print("\n👋 Beendet")
+            gw.stop()
+            LOG.info(stats_line())
+            LOG.info("👋 Beendet")
             break
         except Exception as e:
-            print(f"❌ Fehler: {e}")
+            LOG.error("❌ Fehler", error=str(e))
             time.sleep(10)
-        finally:
-            sleep_until_next_tick()
+
+# =========================
+# Startup Checks
+# =========================
+def startup_checks():
+    """Live-ENV, Konfiguration, Signal-Formate + Accounts prüfen, Templates kompilieren, Journal öffnen (beendet bei Fehlern)."""
+    global ACCOUNTS, TEMPLATES, JOURNAL
+    if not DISCORD_TOKEN or not CHANNEL_IDS:
+        LOG.error("❌ ENV fehlt: DISCORD_TOKEN, CHANNEL_ID (oder CHANNEL_IDS)")
+        sys.exit(1)
+
+    problems = CONFIG.problems()
+    if problems:
+        LOG.error(f"❌ Konfiguration ungültig ({', '.join(map(str, CONFIG_SOURCES))} + ENV)", problems=problems)
+        sys.exit(1)
+
+    try:
+        load_scanner()
+    except Exception as e:
+        LOG.error(f"❌ Signal-Formate fehlerhaft ({SIGNAL_FORMATS_FILE}): {e}")
+        sys.exit(1)
+
+    try:
+        ACCOUNTS = load_accounts()
+    except Exception as e:
+        LOG.error(f"❌ Accounts-Datei fehlerhaft: {e}")
+        sys.exit(1)
+
+    if not ACCOUNTS:
+        LOG.error(f"❌ Keine Accounts: {ACCOUNTS_FILE} anlegen oder ALTRADY_WEBHOOK_URL, ALTRADY_API_KEY, ALTRADY_API_SECRET setzen")
+        sys.exit(1)
+
+    TEMPLATES = compile_templates(ACCOUNTS, CONFIG.QUOTE)
+    JOURNAL = open_journal()
+
+# =========================
+# Main
+# =========================
+def main():
+    startup_checks()
+    LOG.info("🚀 Discord → Altrady Bot v2.6 (Percent TPs, SL@DCA1 default, Runner)")
+    for acc in ACCOUNTS:
+        LOG.info(f"Account {acc['name']}: {acc['exchange']} | Leverage: {acc['leverage']}x")
+    LOG.info(f"TP-Splits: {CONFIG.TP1_PCT}/{CONFIG.TP2_PCT}/{CONFIG.TP3_PCT}% + Runner {CONFIG.RUNNER_PCT}%")
+    LOG.info(f"DCAs: D1 {CONFIG.DCA1_QTY_PCT}%, D2 {CONFIG.DCA2_QTY_PCT}%, D3 {CONFIG.DCA3_QTY_PCT}%")
+    LOG.info(f"Stop: {CONFIG.BASE_STOP_MODE} + Buffer {CONFIG.SL_BUFFER_PCT}%"
+          + (f" | FIXED={CONFIG.STOP_FIXED_PERCENTAGE}%" if CONFIG.BASE_STOP_MODE=='FIXED' else ""))
+    LOG.info(f"SL-Order-Typ (ENV): {CONFIG.STOP_LOSS_ORDER_TYPE}")
+    LOG.info(f"Entry: Buffer {CONFIG.ENTRY_TRIGGER_BUFFER_PCT}% | Expire {CONFIG.ENTRY_EXPIRATION_MIN} min"
+          + (f" + Preis±{CONFIG.ENTRY_EXPIRATION_PRICE_PCT}%" if CONFIG.ENTRY_EXPIRATION_PRICE_PCT>0 else ""))
+    if CONFIG.COOLDOWN_SECONDS > 0:
+        LOG.info(f"Cooldown: {CONFIG.COOLDOWN_SECONDS}s")
+    if CONFIG.TEST_MODE:
+        LOG.warning("⚠️ TEST MODE aktiv")
+
+    LOG.info(f"Webhooks aktiv: {len(ACCOUNTS)}"
+          + (f" (aus {ACCOUNTS_FILE})" if ACCOUNTS_FILE.exists() else "")
+          + f" | Fan-out: {FANOUT_MAX_WORKERS} Worker, {FANOUT_PER_HOST}/Host")
+    LOG.info("Dedup: " + (f"{DEDUP_WINDOW_SECONDS}s, Toleranz {DEDUP_PRICE_TOLERANCE_PCT}%" if DEDUP_WINDOW_SECONDS > 0 else "aus"))
+    LOG.info(f"Journal: {JOURNAL_FILE or 'aus'}" + (f" ({JOURNAL.counts()['messages']} Messages)" if JOURNAL else ""))
+    backend = json_backend()
+    LOG.info(f"JSON-Decoder: {backend}"
+             + (" (orjson nicht installiert: pip install orjson)" if orjson is None and JSON_BACKEND in ("auto", "orjson") else ""))
+    LOG.info(f"Poll-Intervall: {CONFIG.POLL_BASE_SECONDS}s (adaptiv {CONFIG.POLL_MIN_SECONDS:g}–{max(CONFIG.POLL_MAX_SECONDS, CONFIG.POLL_MIN_SECONDS):g}s)")
+    layers = [str(p) for p in CONFIG_SOURCES if p.exists()]
+    layers = ["ENV"] + layers if CONFIG_OVERRIDE else layers + ["ENV"]
+    LOG.info(f"Konfiguration: {' < '.join(layers)} (Reload per SIGHUP"
+             + (", Datei-Änderung)" if CONFIG_WATCH else ")"))
+
+    state = load_state()
+    recover_journal()
+    warm_dedup()
+
+    # Erststart je Channel: baseline auf aktuellste Message setzen (nicht rückwirkend)
+    for cid in CHANNEL_IDS:
+        cursor = channel_state(state, cid)
+        if cursor.get("last_id") is None:
+            try:
+                page = fetch_messages_after(cid, None, limit=1)
+                if page:
+                    cursor["last_id"] = str(page[-1].id)
+                    save_state(state)
+            except:
+                pass
+
+    if METRICS_PORT > 0:
+        serve_metrics(METRICS_PORT, METRICS_HOST)
+        LOG.info(f"📊 Metriken: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+    # Altrady-Verbindungen vorwärmen + idle Verbindungen zwischen Signalen frisch halten
+    start_keepwarm()
+
+    LOG.info(f"👀 Überwache {len(CHANNEL_IDS)} Channel(s): {', '.join(CHANNEL_IDS)}")
+
+    # Dispatch läuft in eigenen Threads – langsame/wiederholte Posts bremsen keine Polls
+    global DISPATCHER
+    DISPATCHER = Dispatcher(state, DISPATCH_QUEUE_SIZE, DISPATCH_WORKERS).start()
+
+    # Profiling auf Abruf (SIGUSR1/SIGUSR2 oder PROFILE_CONTROL_FILE), sonst nahezu kostenlos
+    PROFILER.install()
+    watch_runtime_sizes(state)
+
+    # Tuning neu laden: SIGHUP oder Änderung an CONFIG_FILE/ACCOUNTS_FILE (CONFIG_WATCH)
+    RELOADER.install()
+
+    try:
+        if INGEST_MODE == "gateway":
+            LOG.info("🔌 Ingestion: Discord Gateway (REST-Fallback aktiv)")
+            run_gateway_loop(state)
+        else:
+            run_poll_loop(state)
+    finally:
+        DISPATCHER.stop(DISPATCH_DRAIN_SECONDS)
+        PROFILER.close()
+        if JOURNAL:
+            JOURNAL.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metriken ohne Abhängigkeiten: Counter, Histogramme (feste Buckets) und Callback-Gauges,
+ausgeliefert im Prometheus-Textformat über einen lokalen HTTP-Endpoint (/metrics).
+
+    REGISTRY.counter("polls_total", "Discord-Polls").inc(channel="123")
+    REGISTRY.histogram("stage_seconds", "Dauer je Stufe").observe(0.012, stage="parse")
+    serve(9108)   # http://127.0.0.1:9108/metrics
+
+Alle Namen bekommen den Präfix `discord_altrady_`. p99-Alerts z.B. mit
+histogram_quantile(0.99, rate(discord_altrady_signal_to_order_seconds_bucket[15m])).
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+PREFIX = "discord_altrady_"
+DISCORD_EPOCH_MS = 1420070400000
+
+# Sekunden: Stufen im ms-Bereich bis Ende-zu-Ende im Minutenbereich (Polling)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def snowflake_time(snowflake) -> float:
+    """Erstellzeit (Unix-Sekunden) aus einer Discord-ID."""
+    return ((int(snowflake) >> 22) + DISCORD_EPOCH_MS) / 1000.0
+
+def time_snowflake(ts: float) -> int:
+    """Kleinste Discord-ID zum Zeitpunkt `ts` – als `after`-Parameter verwendbar."""
+    return max(0, int(ts * 1000) - DISCORD_EPOCH_MS) << 22
+
+
+def _labels(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _fmt_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, help_: str):
+        self.name, self.help = name, help_
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def total(self, **match) -> float:
+        """Summe über alle Serien, deren Labels `match` enthalten."""
+        want = set(_labels(match))
+        with self._lock:
+            return sum(v for k, v in self._values.items() if want <= set(k))
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        out += [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in items]
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, help_: str, buckets=LATENCY_BUCKETS):
+        self.name, self.help = name, help_
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[tuple, list] = {}   # labels -> [counts je Bucket..., sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * len(self.buckets) + [0.0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+                    break
+            s[-1] += value
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Grobe Schätzung (Obergrenze des Buckets) – für Logs, nicht für Alerts."""
+        s = self._series.get(_labels(labels))
+        if not s:
+            return None
+        n = sum(s[:-1])
+        acc = 0
+        for b, c in zip(self.buckets, s[:-1]):
+            acc += c
+            if acc >= q * n:
+                return b
+        return None
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, s in items:
+            acc = 0
+            for b, c in zip(self.buckets, s[:-1]):
+                acc += c
+                out.append(f"{self.name}_bucket{_fmt_labels(key, (('le', _fmt_value(b) if b != float('inf') else '+Inf'),))} {acc}")
+            out.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(s[-1])}")
+            out.append(f"{self.name}_count{_fmt_labels(key)} {acc}")
+        return out
+
+
+class Registry:
+    def __init__(self, prefix: str = PREFIX):
+        self.prefix = prefix
+        self._metrics: Dict[str, object] = {}
+        self._callbacks: List[Callable[[], List[Tuple[str, str, str, List[Tuple[dict, float]]]]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_: str) -> Counter:
+        return self._get(name, lambda n: Counter(n, help_))
+
+    def histogram(self, name: str, help_: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(name, lambda n: Histogram(n, help_, buckets))
+
+    def _get(self, name: str, make):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = make(self.prefix + name)
+            return m
+
+    def register_callback(self, fn: Callable[[], List[Tuple[str, str, str, List[Tuple[dict, float]]]]]):
+        """fn() -> [(name, "gauge"|"counter", help, [(labels, value), ...]), ...] – beim Scrape gelesen."""
+        self._callbacks.append(fn)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            lines += m.render()
+        for fn in self._callbacks:
+            try:
+                families = fn()
+            except Exception as e:
+                lines.append(f"# callback {getattr(fn, '__name__', fn)} fehlgeschlagen: {e}")
+                continue
+            for name, kind, help_, samples in families:
+                full = self.prefix + name
+                lines += [f"# HELP {full} {help_}", f"# TYPE {full} {kind}"]
+                lines += [f"{full}{_fmt_labels(_labels(lbl))} {_fmt_value(v)}" for lbl, v in samples if v is not None]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def serve(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Startet den /metrics-Endpoint in einem Daemon-Thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Regression + Speed-Check für den Signal-Parser.
+
+- Vergleicht `main.parse_signal_from_text` (Scanner + signal_formats.json) gegen den
+  Golden-Corpus `signal_corpus.jsonl` (erzeugt mit dem alten 12-Regex-Parser).
+- Prüft, dass der Pre-Filter kein Signal verwirft (auch HTML-escaped, z.B. "BTC&#x2F;USDT").
+- Misst die Laufzeit gegen den alten Parser (unten als LEGACY eingefroren).
+
+    python parser_check.py               # Regression + Timing
+    python parser_check.py --regenerate  # Golden-Corpus mit LEGACY neu schreiben
+"""
+
+import os, re, sys, json, time, random, argparse
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+CORPUS_FILE = HERE / "signal_corpus.jsonl"
+
+# =========================
+# LEGACY Parser (Stand vor dem Scanner, unverändert)
+# =========================
+NUM = r"([0-9][0-9,]*\.?[0-9]*)"
+
+PAIR_LINE_OLD   = re.compile(r"(^|\n)\s*([A-Z0-9]+)\s+(LONG|SHORT)\s+Signal\s*(\n|$)", re.I)
+HDR_SLASH_PAIR  = re.compile(r"([A-Z0-9]+)\s*/\s*[A-Z0-9]+\b.*\b(LONG|SHORT)\b", re.I)
+HDR_COIN_DIR    = re.compile(r"Coin\s*:\s*([A-Z0-9]+).*?Direction\s*:\s*(LONG|SHORT)", re.I | re.S)
+
+ENTER_ON_TRIGGER = re.compile(r"Enter\s+on\s+Trigger\s*:\s*\$?\s*"+NUM, re.I)
+ENTRY_COLON      = re.compile(r"\bEntry\s*:\s*\$?\s*"+NUM, re.I)
+ENTRY_SECTION    = re.compile(r"\bENTRY\b\s*\n\s*\$?\s*"+NUM, re.I)
+
+TP1_LINE  = re.compile(r"\bTP\s*1\s*:\s*\$?\s*"+NUM, re.I)
+TP2_LINE  = re.compile(r"\bTP\s*2\s*:\s*\$?\s*"+NUM, re.I)
+TP3_LINE  = re.compile(r"\bTP\s*3\s*:\s*\$?\s*"+NUM, re.I)
+DCA1_LINE = re.compile(r"\bDCA\s*#?\s*1\s*:\s*\$?\s*"+NUM, re.I)
+DCA2_LINE = re.compile(r"\bDCA\s*#?\s*2\s*:\s*\$?\s*"+NUM, re.I)
+DCA3_LINE = re.compile(r"\bDCA\s*#?\s*3\s*:\s*\$?\s*"+NUM, re.I)
+
+def _to_price(s: str) -> float:
+    return float(s.replace(",", ""))
+
+def legacy_fields(txt: str) -> dict:
+    base = side = None
+    for rx, gb, gs in ((HDR_SLASH_PAIR, 1, 2), (PAIR_LINE_OLD, 2, 3), (HDR_COIN_DIR, 1, 2)):
+        m = rx.search(txt)
+        if m:
+            base, side = m.group(gb).upper(), ("long" if m.group(gs).upper()=="LONG" else "short")
+            break
+    entry = None
+    for rx in (ENTER_ON_TRIGGER, ENTRY_COLON, ENTRY_SECTION):
+        m = rx.search(txt)
+        if m:
+            entry = _to_price(m.group(1))
+            break
+    tps, dcas = [], []
+    for rx in (TP1_LINE, TP2_LINE, TP3_LINE):
+        m = rx.search(txt)
+        tps.append(_to_price(m.group(1)) if m else None)
+    for rx in (DCA1_LINE, DCA2_LINE, DCA3_LINE):
+        m = rx.search(txt)
+        dcas.append(_to_price(m.group(1)) if m else None)
+    return {"base": base, "side": side, "entry": entry, "tps": tps, "dcas": dcas}
+
+# =========================
+# Corpus-Generator (deterministisch)
+# =========================
+BASES = ["BTC", "ETH", "SOL", "1000PEPE", "XRP", "ARB", "wif", "Doge"]
+CHATTER = [
+    "gm everyone, market looks choppy today",
+    "**Market update**: BTC dominance rising, alts bleeding",
+    "Check https://example.com/charts/btc/usdt for the chart",
+    "> quoted: entry to the vip group is free this week",
+    "Remember: TPS reports are due, no signal today",
+    "Coin flip whether we go long or short here lol",
+    "Risk management > everything. Use 1-2% per trade.",
+    "price 1,234.56 | vol 12,000 | 24h +3.2%",
+    "🚀🚀🚀 LFG 🚀🚀🚀",
+    "DCA strategy explained: buy more when price drops",
+]
+
+def _fmt(x: float, rnd: random.Random) -> str:
+    style = rnd.choice(["plain", "comma", "dollar", "dollar_space"])
+    s = f"{x:.6f}".rstrip("0").rstrip(".")
+    if style == "comma" and x >= 1000:
+        s = f"{x:,.2f}"
+    elif style == "dollar":
+        s = "$" + s
+    elif style == "dollar_space":
+        s = "$ " + s
+    return s
+
+def gen_signal_text(rnd: random.Random, fmt: str = None, plausible: bool = True, drop=()) -> str:
+    base = rnd.choice(BASES)
+    side = rnd.choice(["LONG", "SHORT", "long", "Short"])
+    is_long = side.upper() == "LONG"
+    entry = round(rnd.uniform(0.0001, 70000), rnd.choice([2, 4, 6]))
+    step = entry * rnd.uniform(0.01, 0.05)
+    sgn = 1 if is_long else -1
+    if not plausible:
+        sgn = -sgn
+    tps = [entry + sgn * step * i for i in (1, 2, 3)]
+    dcas = [entry - (1 if is_long else -1) * step * i for i in (1, 2, 3)]
+    fmt = fmt or rnd.choice(["slash", "old", "coin"])
+
+    lines = []
+    if fmt == "slash":
+        lines.append(rnd.choice([f"📈 {base}/USDT {side} 🚀", f"#{base} / USDT - {side}", f"{base}/USDT Perp | Direction {side}"]))
+    elif fmt == "old":
+        lines.append(f"{base} {side} Signal")
+    else:
+        lines.append(f"Coin: {base}")
+        if rnd.random() < 0.3:
+            lines.append("Leverage: 10x")
+        lines.append(f"Direction: {side}")
+
+    if "entry" not in drop:
+        e = rnd.choice(["colon", "trigger", "section"])
+        if e == "colon":
+            lines.append(f"Entry: {_fmt(entry, rnd)}")
+        elif e == "trigger":
+            lines.append(f"Enter on Trigger: {_fmt(entry, rnd)}")
+        else:
+            lines.append("ENTRY")
+            lines.append(_fmt(entry, rnd))
+    for i, tp in enumerate(tps, 1):
+        if f"tp{i}" in drop:
+            continue
+        lines.append(rnd.choice([f"TP{i}: {_fmt(tp, rnd)}", f"TP {i} : {_fmt(tp, rnd)}", f"tp{i}:{_fmt(tp, rnd)}"]))
+    for i, d in enumerate(dcas, 1):
+        if f"dca{i}" in drop or rnd.random() < 0.3:
+            continue
+        lines.append(rnd.choice([f"DCA{i}: {_fmt(d, rnd)}", f"DCA #{i}: {_fmt(d, rnd)}"]))
+    if rnd.random() < 0.3:
+        lines.append(rnd.choice(CHATTER))
+    return "\n".join(lines)
+
+def gen_chatter(rnd: random.Random, n_lines: int) -> str:
+    return "\n".join(rnd.choice(CHATTER) for _ in range(n_lines))
+
+def gen_corpus(seed: int = 42):
+    """Liefert (kind, text) – alle bekannten Formate, Lücken, Chat, große Embeds, Unicode-Randfälle."""
+    rnd = random.Random(seed)
+    for fmt in ("slash", "old", "coin"):
+        for _ in range(40):
+            yield f"signal_{fmt}", gen_signal_text(rnd, fmt)
+        for _ in range(8):
+            yield f"implausible_{fmt}", gen_signal_text(rnd, fmt, plausible=False)
+        for field in ("entry", "tp1", "tp3", "dca1"):
+            for _ in range(3):
+                yield f"missing_{field}_{fmt}", gen_signal_text(rnd, fmt, drop=(field,))
+    for _ in range(40):
+        yield "chat", gen_chatter(rnd, rnd.randint(1, 4))
+    for _ in range(4):
+        yield "large_embed", gen_chatter(rnd, 300)
+        yield "large_embed_signal", gen_chatter(rnd, 150) + "\n" + gen_signal_text(rnd) + "\n" + gen_chatter(rnd, 150)
+    for _ in range(5):
+        yield "two_signals", gen_signal_text(rnd) + "\n\n" + gen_signal_text(rnd)
+    yield "unicode", "ſOL/USDT LONG\nEntry: 10\nTP1: 11\nTP2: 12\nTP3: 13"
+    yield "unicode", "İNJ/USDT ſHORT\nEntry: 10\nTP1: 9\nTP2: 8\nTP3: 7\nDCA1: 11"
+    yield "unicode", "BTC/USDT LONG\nEntry: 100\ntp1: 110\nTP2: 120\nTP3: 130\nDCA1: 90\nKelvin"
+    yield "edge", "BTC\n/USDT LONG\nEntry: 1\nTP1: 2\nTP2: 3\nTP3: 4"
+    yield "edge", "hello world\n\n  ETH SHORT Signal\nEntry: 10\nTP1: 9\nTP2: 8\nTP3: 7"
+    yield "edge", "Coin: BTC\nEntry: 1\nTP1: 2\nTP2: 3\nTP3: 4\nDirection: LONG"
+    yield "edge", "Reenter on Trigger: 5\nBTC/USDT LONG\nTP1: 6\nTP2: 7\nTP3: 8"
+    yield "edge", ""
+
+# =========================
+# Check
+# =========================
+def _import_main():
+    for k, v in (("DISCORD_TOKEN", "x"), ("CHANNEL_ID", "1"), ("ALTRADY_WEBHOOK_URL", "http://127.0.0.1/"),
+                 ("ALTRADY_API_KEY", "k"), ("ALTRADY_API_SECRET", "s")):
+        os.environ.setdefault(k, v)
+    sys.path.insert(0, str(HERE))
+    import main
+    return main
+
+def regenerate():
+    n = 0
+    with CORPUS_FILE.open("w", encoding="utf-8") as f:
+        for kind, txt in gen_corpus():
+            fields = legacy_fields(txt)
+            f.write(json.dumps({"kind": kind, "text": txt, "fields": fields}, ensure_ascii=False) + "\n")
+            n += 1
+    print(f"✅ {n} Fälle nach {CORPUS_FILE} geschrieben")
+
+def _new_fields(main, txt: str) -> dict:
+    base, side = main.find_base_side(txt)
+    tps, dcas = main.find_tp_dca(txt)
+    return {"base": base, "side": side, "entry": main.find_entry(txt), "tps": tps, "dcas": dcas}
+
+def _legacy_parse(main, txt: str):
+    f = legacy_fields(txt)
+    if not f["base"] or f["entry"] is None or None in f["tps"]:
+        return None
+    d1, d2, d3 = main.backfill_dcas_if_missing(f["side"], f["entry"], f["dcas"])
+    if not main.plausible(f["side"], f["entry"], *f["tps"], d1, d2, d3):
+        return None
+    return True
+
+def _html_escaped(txt: str) -> str:
+    """Wie Discord-Bridges/Mirrors Text liefern: "/" und "&" als HTML-Entity."""
+    return txt.replace("&", "&amp;").replace("/", "&#x2F;")
+
+def check_prefilter(main, texts) -> int:
+    """Pre-Filter darf nichts verwerfen, woraus der Parser (nach clean_markdown) ein Signal macht."""
+    bad = n = 0
+    for txt in texts:
+        for variant in (txt, _html_escaped(txt)):
+            if main.parse_signal_from_text(main.clean_markdown(variant)) is None:
+                continue
+            n += 1
+            rec = main.MessageRecord(1, "1", "1", "", [variant])
+            reason = main.prefilter_reason(rec, rec.parts)
+            if reason:
+                bad += 1
+                print(f"❌ Pre-Filter verwirft Signal ({reason})\n   {variant[:120]!r}")
+    print(f"Pre-Filter: {n - bad}/{n} Signale durchgelassen")
+    return bad
+
+def check() -> int:
+    main = _import_main()
+    scanner = main.load_scanner()
+    cases = [json.loads(l) for l in CORPUS_FILE.read_text(encoding="utf-8").splitlines() if l.strip()]
+    bad = 0
+    for c in cases:
+        got = _new_fields(main, c["text"])
+        if got != c["fields"]:
+            bad += 1
+            print(f"❌ {c['kind']}: erwartet {c['fields']} | neu {got}\n   {c['text'][:120]!r}")
+        legacy_ok = _legacy_parse(main, c["text"]) is not None
+        if legacy_ok != (main.parse_signal_from_text(c["text"]) is not None):
+            bad += 1
+            print(f"❌ {c['kind']}: parse_signal_from_text weicht ab\n   {c['text'][:120]!r}")
+    print(f"Regression: {len(cases) - bad}/{len(cases)} identisch")
+    bad += check_prefilter(main, [c["text"] for c in cases])
+
+    by_kind = {}
+    for c in cases:
+        by_kind.setdefault(c["kind"].split("_")[0] if not c["kind"].startswith("large") else c["kind"], []).append(c["text"])
+    print(f"\n{'Corpus':22s} {'legacy µs':>10s} {'scanner µs':>11s} {'Faktor':>7s}")
+    for kind, texts in sorted(by_kind.items()):
+        reps = max(1, 2000 // (len(texts) * max(1, sum(map(len, texts)) // len(texts) // 200)))
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            for t in texts:
+                legacy_fields(t)
+        t_old = (time.perf_counter() - t0) / (reps * len(texts)) * 1e6
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            for t in texts:
+                scanner.scan(t)
+        t_new = (time.perf_counter() - t0) / (reps * len(texts)) * 1e6
+        print(f"{kind:22s} {t_old:10.1f} {t_new:11.1f} {t_old / t_new:6.1f}x")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Signal-Parser Regression + Timing")
+    ap.add_argument("--regenerate", action="store_true", help="Golden-Corpus mit dem LEGACY-Parser neu schreiben")
+    args = ap.parse_args()
+    if args.regenerate:
+        regenerate()
+    else:
+        sys.exit(check())
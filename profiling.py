@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiling auf Abruf für den laufenden Worker – ohne Neustart, ohne Debugger.
+
+Auslöser (jeweils für die nächsten N Zyklen der Hauptschleife):
+  SIGUSR1                 CPU-Profil (cProfile) des Haupt-Threads (Ingestion/Poll)
+  SIGUSR2                 tracemalloc: Snapshot je Zyklus, Diff zum vorherigen und zum ersten
+  Control-Datei           Inhalt z.B. "cpu", "mem", "cpu mem cycles=10"; wird beim Lesen gelöscht
+
+    kill -USR1 <pid>                          # 5 Zyklen CPU-Profil
+    echo "mem cycles=20" > profile.request     # 20 Zyklen Allokations-Diffs
+
+Ausgabe mit Zeitstempel im Profil-Verzeichnis:
+  cpu-YYYYmmdd-HHMMSS.prof / .txt   (pstats-Datei + Top-Funktionen nach kumulierter Zeit)
+  mem-YYYYmmdd-HHMMSS.txt           (größtes Wachstum je Zyklus, beobachtete Größen wie State/Caches)
+
+Ausgeschaltet kostet `tick()` einen Flag-Test plus höchstens einen stat() pro Sekunde.
+"""
+
+import io, time, signal, pstats, cProfile, tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from log import LOG
+
+
+class Profiler:
+    def __init__(self, out_dir: Path, cycles: int = 5, control_file: Optional[Path] = None,
+                 top: int = 30, frames: int = 1):
+        self.out_dir = Path(out_dir)
+        self.cycles = max(1, cycles)
+        self.control_file = control_file
+        self.top = top
+        self.frames = frames
+        self._requested: Dict[str, int] = {}   # "cpu" / "mem" -> Zyklen, von Signal-Handler oder Control-Datei
+        self._next_check = 0.0
+        self._watches: Dict[str, Callable[[], float]] = {}
+        # CPU
+        self._cpu: Optional[cProfile.Profile] = None
+        self._cpu_left = 0
+        self._cpu_stamp = ""
+        # Speicher
+        self._mem_left = 0
+        self._mem_cycles = 0
+        self._mem_first: Optional[tracemalloc.Snapshot] = None
+        self._mem_prev: Optional[tracemalloc.Snapshot] = None
+        self._mem_lines: List[str] = []
+        self._mem_stamp = ""
+        self._mem_started = False
+
+    @property
+    def active(self) -> bool:
+        return self._cpu is not None or self._mem_left > 0
+
+    def watch(self, name: str, fn: Callable[[], float]):
+        """Größe, die im Speicher-Bericht je Zyklus mitgeschrieben wird (z.B. Einträge im Dedup-Cache)."""
+        self._watches[name] = fn
+
+    def install(self):
+        """Signal-Handler registrieren (nur im Haupt-Thread, nur wo es SIGUSR1/2 gibt)."""
+        for name, kind in (("SIGUSR1", "cpu"), ("SIGUSR2", "mem")):
+            sig = getattr(signal, name, None)
+            if sig is not None:
+                signal.signal(sig, lambda *_ , k=kind: self.request(k))
+
+    def request(self, kind: str, cycles: Optional[int] = None):
+        self._requested[kind] = max(1, cycles or self.cycles)
+
+    # ---------- Hauptschleife ----------
+    def tick(self):
+        """An jeder Zyklusgrenze aufrufen: beendet den laufenden Zyklus, startet ggf. den nächsten."""
+        if self.control_file is not None:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + 1.0
+                self._read_control_file()
+        if not self._requested and not self.active:
+            return
+        if self._cpu is not None:
+            self._cpu_left -= 1
+            if self._cpu_left <= 0:
+                self._finish_cpu()
+        if self._mem_left > 0:
+            self._mem_cycle()
+        if self._requested:
+            kinds, self._requested = self._requested, {}
+            if "cpu" in kinds and self._cpu is None:
+                self._start_cpu(kinds["cpu"])
+            if "mem" in kinds and self._mem_left <= 0:
+                self._start_mem(kinds["mem"])
+
+    def close(self):
+        """Laufende Aufzeichnung beim Beenden mit den bisherigen Zyklen schreiben."""
+        if self._cpu is not None:
+            self._finish_cpu()
+        if self._mem_left > 0:
+            self._mem_left = 1
+            self._mem_cycle()
+
+    def _read_control_file(self):
+        try:
+            text = self.control_file.read_text(encoding="utf-8")
+            self.control_file.unlink()
+        except (FileNotFoundError, OSError):
+            return
+        words = text.lower().split()
+        cycles = next((int(w[7:]) for w in words if w.startswith("cycles=") and w[7:].isdigit()), None)
+        kinds = [w for w in words if w in ("cpu", "mem")] or ["cpu", "mem"]
+        for k in kinds:
+            self.request(k, cycles)
+
+    def _path(self, prefix: str, stamp: str, suffix: str) -> Path:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        return self.out_dir / f"{prefix}-{stamp}{suffix}"
+
+    # ---------- CPU ----------
+    def _start_cpu(self, cycles: int):
+        self._cpu_stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self._cpu_left = cycles
+        self._cpu = cProfile.Profile()
+        self._cpu.enable()
+        LOG.info("🔬 CPU-Profil gestartet", cycles=cycles)
+
+    def _finish_cpu(self):
+        prof, self._cpu = self._cpu, None
+        prof.disable()
+        path = self._path("cpu", self._cpu_stamp, ".prof")
+        prof.dump_stats(str(path))
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(self.top)
+        path.with_suffix(".txt").write_text(buf.getvalue(), encoding="utf-8")
+        LOG.info("🔬 CPU-Profil geschrieben", file=str(path))
+
+    # ---------- Speicher ----------
+    def _start_mem(self, cycles: int):
+        self._mem_stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self._mem_started = not tracemalloc.is_tracing()
+        if self._mem_started:
+            tracemalloc.start(self.frames)
+        self._mem_left = self._mem_cycles = cycles
+        self._mem_first = self._mem_prev = tracemalloc.take_snapshot()
+        self._mem_lines = [f"tracemalloc – {cycles} Zyklen ab {datetime.now().isoformat(timespec='seconds')}",
+                           self._sizes_line(0)]
+        LOG.info("🔬 Allokations-Tracing gestartet", cycles=cycles)
+
+    def _sizes_line(self, cycle: int) -> str:
+        current, peak = tracemalloc.get_traced_memory()
+        vals = []
+        for name, fn in self._watches.items():
+            try:
+                vals.append(f"{name}={fn()}")
+            except Exception as e:
+                vals.append(f"{name}=<{e}>")
+        return f"[Zyklus {cycle}] traced {current / 1024:.0f} KiB (Peak {peak / 1024:.0f} KiB) | " + " ".join(vals)
+
+    def _diff(self, title: str, new: tracemalloc.Snapshot, old: tracemalloc.Snapshot):
+        own = (tracemalloc.__file__, __file__)
+        stats = [s for s in new.compare_to(old, "lineno")
+                 if s.size_diff > 0 and s.traceback[0].filename not in own][:self.top]
+        self._mem_lines.append(title)
+        self._mem_lines += [f"  {s}" for s in stats] or ["  (kein Wachstum)"]
+
+    def _mem_cycle(self):
+        snap = tracemalloc.take_snapshot()
+        cycle = self._mem_cycles - self._mem_left + 1
+        self._mem_lines.append(self._sizes_line(cycle))
+        self._diff(f"Wachstum gegenüber Zyklus {cycle - 1}:", snap, self._mem_prev)
+        self._mem_prev = snap
+        self._mem_left -= 1
+        if self._mem_left > 0:
+            return
+        self._diff("Wachstum gesamt (letzter gegenüber erstem Snapshot):", snap, self._mem_first)
+        path = self._path("mem", self._mem_stamp, ".txt")
+        path.write_text("\n".join(self._mem_lines) + "\n", encoding="utf-8")
+        self._mem_first = self._mem_prev = None
+        self._mem_lines = []
+        if self._mem_started:
+            tracemalloc.stop()
+        LOG.info("🔬 Allokations-Diffs geschrieben", file=str(path))
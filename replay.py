@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline-Replay: archivierte Discord-Messages (JSONL, ein Message-Objekt pro Zeile,
+auch .gz) durch dieselbe Pipeline wie live – Pre-Filter, message_parts/clean_markdown,
+parse_signal_with_reason, Payload – ohne Discord, Webhooks, Journal oder Live-ENV.
+
+    python replay.py archive.jsonl [mehr.jsonl.gz ...] --out signals.jsonl
+    python replay.py archive.jsonl --workers 8 --include-rejects --out all.jsonl
+
+Ausgabe (JSONL): je Signal {"id", "channel_id", "timestamp", "signal", "payload"},
+mit --include-rejects auch {"id", ..., "reason"} für verworfene Messages.
+Payloads nutzen Platzhalter statt echter API-Keys (ENV-Account #1: Exchange/Hebel).
+Am Ende: Durchsatz (Messages/s), Parse-Hit-Rate, Gründe der Ablehnung.
+"""
+
+import sys, json, gzip, time, argparse
+from collections import Counter
+from itertools import islice
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import main
+
+REPLAY_ACCOUNT = {
+    "name": "replay", "api_key": "<api_key>", "api_secret": "<api_secret>",
+    "exchange": main.ALTRADY_EXCHANGE, "leverage": main.CONFIG.LEVERAGE_1,
+}
+_TEMPLATE = main.PayloadTemplate(REPLAY_ACCOUNT)
+
+# =========================
+# Pipeline (Generatoren)
+# =========================
+def read_lines(paths: Iterable[Path]) -> Iterator[str]:
+    for p in paths:
+        opener = gzip.open if p.suffix == ".gz" else open
+        with opener(p, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield line
+
+def chunks(lines: Iterator[str], size: int) -> Iterator[List[str]]:
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+def process_message(m: dict) -> Tuple[Optional[dict], Optional[str]]:
+    """Gleiche Schritte wie handle_messages(), ohne Cooldown/Dedup/Dispatch."""
+    rec = main.MessageRecord.from_dict(m)
+    parts = rec.parts
+    reason = main.prefilter_reason(rec, parts)
+    if reason:
+        return None, reason
+    raw = main.clean_markdown("\n".join(parts))
+    if not raw:
+        return None, "empty"
+    return main.parse_signal_with_reason(raw)
+
+def process_lines(lines: List[str], include_rejects: bool = False) -> Tuple[List[str], Counter]:
+    """Ein Shard: rohe JSONL-Zeilen -> (Ausgabezeilen, Zähler). Läuft auch im Worker-Prozess."""
+    out, counts = [], Counter()
+    for line in lines:
+        try:
+            m = json.loads(line)
+        except ValueError:
+            counts["bad_json"] += 1
+            continue
+        counts["messages"] += 1
+        sig, reason = process_message(m)
+        rec = {"id": m.get("id"), "channel_id": m.get("channel_id"), "timestamp": m.get("timestamp")}
+        if sig is None:
+            counts[f"reject:{reason}"] += 1
+            if include_rejects:
+                rec["reason"] = reason
+                out.append(json.dumps(rec, ensure_ascii=False))
+            continue
+        counts["signals"] += 1
+        rec["signal"] = sig
+        rec["payload"] = _TEMPLATE.render(sig["base"], main.build_signal_body(sig))
+        out.append(json.dumps(rec, ensure_ascii=False))
+    return out, counts
+
+def _process_shard(args) -> Tuple[List[str], Counter]:
+    return process_lines(*args)
+
+def replay(paths: List[Path], out_path: Optional[Path], workers: int = 1, chunk_size: int = 2000,
+           include_rejects: bool = False) -> Counter:
+    shards = ((c, include_rejects) for c in chunks(read_lines(paths), chunk_size))
+    total = Counter()
+    out = open(out_path, "w", encoding="utf-8") if out_path else None
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        # imap: Reihenfolge der Ausgabe = Reihenfolge im Archiv, Shards werden gestreamt
+        results = pool.imap(_process_shard, shards) if pool else map(_process_shard, shards)
+        for lines, counts in results:
+            total.update(counts)
+            if out and lines:
+                out.write("\n".join(lines) + "\n")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        if out:
+            out.close()
+    return total
+
+def report(counts: Counter, seconds: float) -> str:
+    n = counts["messages"]
+    lines = [
+        f"📼 Replay: {n} Messages in {seconds:.2f}s ({n / seconds if seconds > 0 else 0:,.0f} Messages/s)",
+        f"   Signale: {counts['signals']} | Hit-Rate {counts['signals'] / n * 100 if n else 0:.2f}%"
+        + (f" | ungültiges JSON: {counts['bad_json']}" if counts["bad_json"] else ""),
+    ]
+    rejects = sorted(((k[7:], v) for k, v in counts.items() if k.startswith("reject:")), key=lambda kv: -kv[1])
+    if rejects:
+        lines.append("   Verworfen:")
+        lines += [f"     {reason:14s} {v:8d} ({v / n * 100:.1f}%)" for reason, v in rejects]
+    return "\n".join(lines)
+
+def main_cli():
+    ap = argparse.ArgumentParser(description="Discord-Archiv offline durch Parser + Payload-Pipeline schicken")
+    ap.add_argument("archives", nargs="+", type=Path, help="JSONL-Dateien mit Discord-Message-Objekten (.gz ok)")
+    ap.add_argument("--out", type=Path, help="Ausgabe-JSONL (Signale + Payloads)")
+    ap.add_argument("--workers", type=int, default=1, help="Prozesse für Sharding (Default 1)")
+    ap.add_argument("--chunk-size", type=int, default=2000, help="Messages pro Shard")
+    ap.add_argument("--include-rejects", action="store_true", help="auch verworfene Messages mit Grund ausgeben")
+    args = ap.parse_args()
+
+    missing = [str(p) for p in args.archives if not p.exists()]
+    if missing:
+        print(f"❌ Archiv fehlt: {', '.join(missing)}")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    counts = replay(args.archives, args.out, max(1, args.workers), max(1, args.chunk_size), args.include_rejects)
+    print(report(counts, time.perf_counter() - t0))
+    if args.out:
+        print(f"   Ausgabe: {args.out}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-Pass Signal-Scanner mit Format-Regeln aus einer Config-Datei.
+
+Jede Regel hat ein Feld (header, entry, tp1..3, dca1..3), ein Regex-Pattern und
+einen `anchor` – ein Stichwort, das in jedem Treffer vorkommt. Alle Anchors
+werden zu EINEM Scanner kompiliert, der den Text einmal durchläuft; die
+eigentlichen Regeln werden nur an Anchor-Treffern per `match()` probiert.
+
+Semantik wie `rx.search()` je Regel: pro Feld gewinnt die erste Regel (Reihenfolge
+in der Datei) mit Treffer, und davon der früheste Treffer im Text.
+
+Regel-Keys:
+  name      Bezeichner (Logs/Debug)
+  field     header | entry | tp1 | tp2 | tp3 | dca1 | dca2 | dca3
+  pattern   Regex (immer re.I); header braucht (?P<base>) + (?P<side>), sonst (?P<price>)
+            {NUM} wird durch das Preis-Pattern ersetzt
+  flags     optional, z.B. "s" für re.S
+  anchor    Stichwort (case-insensitive), an dem der Treffer beginnt
+  lookback  optional: Zeichenklasse, die zwischen Treffer-Beginn und Anchor stehen darf
+            (z.B. "[A-Z0-9\\s]" für "BTC/USDT" mit Anchor "/")
+  keywords  optional: Stichworte, von denen mindestens eines in jedem Treffer vorkommt
+            (nur für den Pre-Filter, z.B. ["long", "short"])
+"""
+
+import re, json
+from pathlib import Path
+from typing import Optional, List, Dict
+
+FIELDS = ("header", "entry", "tp1", "tp2", "tp3", "dca1", "dca2", "dca3")
+FIELD_GROUPS = {"header": ("base", "side")}
+PRICE_GROUP = ("price",)
+
+NUM = r"(?P<price>[0-9][0-9,]*\.?[0-9]*)"
+
+# Zeichen, die re.I auf ASCII-Buchstaben faltet, die str.lower() aber nicht (gleich lang) abbildet
+_CASEFOLD_FIXES = {0x130: "i", 0x131: "i", 0x17F: "s", 0x212A: "k"}
+_CASEFOLD_CHARS = tuple(chr(c) for c in _CASEFOLD_FIXES)
+
+
+class FormatRule:
+    __slots__ = ("name", "field", "index", "rx", "anchor", "keywords", "lookback", "back")
+
+    def __init__(self, name: str, field: str, index: int, rx, anchor: str, keywords=(), lookback=None, back=None):
+        self.name = name
+        self.field = field
+        self.index = index
+        self.rx = rx
+        self.anchor = anchor
+        self.keywords = keywords
+        self.lookback = lookback   # Pattern mit lazy Lookback-Präfix (oder None)
+        self.back = back           # Lookback-Lauf rückwärts (auf dem umgedrehten Text)
+
+
+def casefold_ascii(txt: str) -> str:
+    """Lowercase inkl. der Sonderfälle, die re.I auf ASCII faltet (Länge kann abweichen)."""
+    for ch in _CASEFOLD_CHARS:
+        if ch in txt:
+            return txt.translate(_CASEFOLD_FIXES).lower()
+    return txt.lower()
+
+def _fold(txt: str) -> Optional[str]:
+    """Lowercase mit gleicher Länge wie `txt` (Positionen bleiben gültig) – sonst None."""
+    for ch in _CASEFOLD_CHARS:
+        if ch in txt:
+            txt = txt.translate(_CASEFOLD_FIXES)
+            break
+    low = txt.lower()
+    return low if len(low) == len(txt) else None
+
+
+class SignalScanner:
+    def __init__(self, rules: List[dict]):
+        self.rules: List[FormatRule] = []
+        by_anchor: Dict[str, List[FormatRule]] = {}
+        for i, spec in enumerate(rules):
+            rule = self._compile_rule(i, spec)
+            self.rules.append(rule)
+            by_anchor.setdefault(rule.anchor, []).append(rule)
+
+        # Priorität je Feld = Reihenfolge in der Datei
+        self.field_rules: Dict[str, List[FormatRule]] = {}
+        for r in self.rules:
+            self.field_rules.setdefault(r.field, []).append(r)
+        self.by_anchor = by_anchor
+
+        # Anchors, die Präfix eines anderen sind, können an derselben Position starten
+        self._shadowed = {
+            a: [b for b in by_anchor if b != a and (b.startswith(a) or a.startswith(b))] for a in by_anchor
+        }
+
+        anchors = sorted(by_anchor, key=len, reverse=True)
+        firsts = "".join(sorted({re.escape(a[0]) for a in anchors}))
+        self._scanner = re.compile(f"(?=[{firsts}])(?:" + "|".join(re.escape(a) for a in anchors) + ")")
+
+    @staticmethod
+    def _compile_rule(index: int, spec: dict) -> FormatRule:
+        name = spec.get("name") or f"rule{index}"
+        field = spec.get("field")
+        if field not in FIELDS:
+            raise ValueError(f"Regel {name}: unbekanntes Feld {field!r}")
+        pattern = str(spec.get("pattern") or "").replace("{NUM}", NUM)
+        flags = re.I
+        for f in str(spec.get("flags") or ""):
+            flags |= {"s": re.S, "m": re.M, "x": re.X}[f]
+        rx = re.compile(pattern, flags)
+        for g in FIELD_GROUPS.get(field, PRICE_GROUP):
+            if g not in rx.groupindex:
+                raise ValueError(f"Regel {name}: Gruppe (?P<{g}>...) fehlt")
+        anchor = str(spec.get("anchor") or "").lower()
+        if not anchor:
+            raise ValueError(f"Regel {name}: anchor fehlt")
+        keywords = tuple(str(k).lower() for k in spec.get("keywords") or ())
+        lb = spec.get("lookback")
+        if not lb:
+            return FormatRule(name, field, index, rx, anchor, keywords)
+        # Lookback: Startpositionen im Fenster vor dem Anchor in EINEM match() probieren –
+        # der lazy Präfix überspringt 0, 1, 2, ... Lookback-Zeichen, wie search() ab Fensterbeginn
+        lookback = re.compile(f"(?:{lb})*?(?:{pattern})", flags)
+        back = re.compile(f"(?:{lb})*", re.I)
+        return FormatRule(name, field, index, rx, anchor, keywords, lookback, back)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "SignalScanner":
+        raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(raw["rules"] if isinstance(raw, dict) else raw)
+
+    def required_markers(self, fields) -> List[tuple]:
+        """
+        Je Pflichtfeld: (feld, [(anchor, keywords), ...]). Ein Text kann das Feld nur
+        liefern, wenn für mindestens eine Regel der Anchor (und ein Keyword) vorkommt.
+        """
+        out = []
+        for field in fields:
+            rules = self.field_rules.get(field, [])
+            out.append((field, [(r.anchor, r.keywords) for r in rules]))
+        return out
+
+    def scan(self, txt: str) -> Dict[str, re.Match]:
+        """Feld -> Match der gewinnenden Regel (fehlende Felder fehlen im Dict)."""
+        low = _fold(txt)
+        if low is None:
+            return self._scan_slow(txt)
+
+        first: Dict[int, re.Match] = {}   # Regel-Index -> erster Treffer
+        tried: Dict[int, int] = {}        # Regel-Index -> nächste noch nicht probierte Startposition
+        final = {}                        # Feld -> Match, sobald die Top-Regel getroffen hat
+        open_fields = len(self.field_rules)
+        rev = None
+        n = len(txt)
+        search = self._scanner.search
+        pos = 0
+
+        while open_fields:
+            hit = search(low, pos)
+            if hit is None:
+                break
+            q = hit.start()
+            pos = q + 1
+            anchor = hit.group()
+            anchors = (anchor, *[a for a in self._shadowed[anchor] if low.startswith(a, q)]) \
+                if self._shadowed[anchor] else (anchor,)
+            for a in anchors:
+                for rule in self.by_anchor[a]:
+                    if rule.index in first or rule.field in final:
+                        continue
+                    if rule.lookback is None:
+                        m = rule.rx.match(txt, q)
+                    else:
+                        if rev is None:
+                            rev = txt[::-1]
+                        # Fensterbeginn: so weit zurück, wie Lookback-Zeichen vor dem Anchor stehen
+                        start = rule.back.match(rev, n - q).end()
+                        m = rule.lookback.match(txt, max(n - start, tried.get(rule.index, 0)))
+                        tried[rule.index] = q + 1
+                    if m:
+                        first[rule.index] = m
+                        if self.field_rules[rule.field][0] is rule:
+                            final[rule.field] = m
+                            open_fields -= 1
+
+        out = {}
+        for field, rules in self.field_rules.items():
+            for rule in rules:
+                m = first.get(rule.index)
+                if m:
+                    out[field] = m
+                    break
+        return out
+
+    def _scan_slow(self, txt: str) -> Dict[str, re.Match]:
+        out = {}
+        for field, rules in self.field_rules.items():
+            for rule in rules:
+                m = rule.rx.search(txt)
+                if m:
+                    out[field] = m
+                    break
+        return out
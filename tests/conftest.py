@@ -0,0 +1,26 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from log import LOG  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def quiet_log(monkeypatch):
+    """LOG schreibt asynchron aus einem eigenen Thread – in einen Puffer statt in die Testausgabe."""
+    monkeypatch.setattr(LOG, "stream", io.StringIO())
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """Frischer State ohne Journal/Datei; Cursor-Tracker und Catch-up-Grenzen zurückgesetzt."""
+    monkeypatch.setattr(main, "JOURNAL", None)
+    monkeypatch.setattr(main, "CURSORS", None)
+    monkeypatch.setattr(main, "save_state", lambda st: None)
+    monkeypatch.setattr(main, "_catchup_floor", {})
+    return {"channels": {}}
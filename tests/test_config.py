@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from config import TradingConfig, ConfigReloader, config_env
+
+
+def test_defaults_are_valid():
+    cfg = TradingConfig.from_env({})
+    assert cfg.problems() == []
+    assert (cfg.POLL_MIN_SECONDS, cfg.POLL_BASE_SECONDS, cfg.POLL_MAX_SECONDS) == (15, 60, 60)
+    assert cfg.MAX_MESSAGE_AGE_SECONDS == 300
+
+
+@pytest.mark.parametrize("base", ["300", "600"])
+def test_slow_poll_without_max_message_age_still_starts(base):
+    # Regression: der Default von MAX_MESSAGE_AGE_SECONDS darf eine bisher gültige Konfiguration nicht brechen
+    cfg = TradingConfig.from_env({"POLL_BASE_SECONDS": base})
+    assert cfg.problems() == []
+    assert cfg.MAX_MESSAGE_AGE_SECONDS > cfg.POLL_MAX_SECONDS
+
+
+def test_explicit_max_message_age_below_poll_ceiling_is_rejected():
+    cfg = TradingConfig.from_env({"POLL_BASE_SECONDS": "300", "MAX_MESSAGE_AGE_SECONDS": "200"})
+    assert any("MAX_MESSAGE_AGE_SECONDS" in p for p in cfg.problems())
+    assert TradingConfig.from_env({"POLL_BASE_SECONDS": "300", "MAX_MESSAGE_AGE_SECONDS": "0"}).problems() == []
+
+
+def test_signal_max_age_off_keeps_message_age_off():
+    assert TradingConfig.from_env({"SIGNAL_MAX_AGE_SECONDS": "0"}).MAX_MESSAGE_AGE_SECONDS == 0
+
+
+def test_poll_bounds():
+    cfg = TradingConfig.from_env({"POLL_BASE_SECONDS": "10"})
+    assert (cfg.POLL_MIN_SECONDS, cfg.POLL_MAX_SECONDS) == (10, 10)
+    assert TradingConfig.from_env({"POLL_BASE_SECONDS": "10", "POLL_MIN_SECONDS": "15"}).problems()
+
+
+def test_unparsable_value_falls_back_and_is_reported():
+    cfg = TradingConfig.from_env({"TP1_PCT": "abc"})
+    assert cfg.TP1_PCT == 30.0
+    assert any("TP1_PCT" in p for p in cfg.problems())
+
+
+def test_tp_split_over_100_is_rejected():
+    assert TradingConfig.from_env({"TP1_PCT": "60"}).problems()
+
+
+def test_immutable():
+    cfg = TradingConfig.from_env({})
+    with pytest.raises(AttributeError):
+        cfg.TP1_PCT = 1
+
+
+def test_diff():
+    old, new = TradingConfig.from_env({}), TradingConfig.from_env({"TP1_PCT": "25", "RUNNER_PCT": "15"})
+    assert new.diff(old) == {"TP1_PCT": (30.0, 25.0), "RUNNER_PCT": (10.0, 15.0)}
+
+
+def test_config_env_layers(tmp_path):
+    dotenv, custom = tmp_path / ".env", tmp_path / "custom.env"
+    dotenv.write_text("TP1_PCT=20\nTP2_PCT=20\nCOOLDOWN_SECONDS=111\n")
+    custom.write_text("TP1_PCT=25\n")
+    env = config_env(dotenv, custom, tmp_path / "missing.env", base={"COOLDOWN_SECONDS": "5"})
+    # .env < CONFIG_FILE < Prozess-ENV
+    assert (env["TP1_PCT"], env["TP2_PCT"], env["COOLDOWN_SECONDS"]) == ("25", "20", "5")
+    assert config_env(dotenv, custom, base={"COOLDOWN_SECONDS": "5"}, override=True)["COOLDOWN_SECONDS"] == "111"
+
+
+def test_config_env_defaults_to_process_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("TP3_PCT", "7")
+    assert config_env(tmp_path / "missing.env")["TP3_PCT"] == os.environ["TP3_PCT"]
+
+
+def test_reloader_applies_valid_and_keeps_invalid(tmp_path):
+    path = tmp_path / "bot.env"
+    path.write_text("TP1_PCT=25\n")
+    applied = []
+    reloader = ConfigReloader(lambda: TradingConfig.from_env(config_env(path, base={})), applied.append, [])
+
+    reloader.request()
+    assert reloader.tick() is True
+    assert applied[-1].TP1_PCT == 25.0
+
+    path.write_text("TP1_PCT=95\n")   # Split > 100 %
+    reloader.request()
+    assert reloader.tick() is False
+    assert len(applied) == 1
+
+    assert reloader.tick() is False   # ohne Anlass kein Reload
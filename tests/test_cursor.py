@@ -0,0 +1,64 @@
+import time
+
+import main
+from main import CursorTracker, channel_state
+from metrics import time_snowflake
+
+
+def test_cursor_held_back_behind_open_signal(state):
+    t = CursorTracker(state)
+    t.begin("c", 105)
+    t.ingested("c", 110)
+    assert channel_state(state, "c")["last_id"] == "104"
+    assert t.read_position("c") == "110"
+    assert t.inflight_count() == 1
+
+    t.done("c", 105)
+    assert channel_state(state, "c")["last_id"] == "110"
+    assert t.inflight_count() == 0
+
+
+def test_cursor_advances_to_oldest_open_signal(state):
+    t = CursorTracker(state)
+    for mid in (101, 103):
+        t.begin("c", mid)
+    t.ingested("c", 104)
+    t.done("c", 103)
+    assert channel_state(state, "c")["last_id"] == "100"
+    t.done("c", 101)
+    assert channel_state(state, "c")["last_id"] == "104"
+
+
+def test_cursor_never_moves_backwards(state):
+    channel_state(state, "c")["last_id"] = "200"
+    t = CursorTracker(state)
+    t.begin("c", 150)
+    t.ingested("c", 160)
+    assert channel_state(state, "c")["last_id"] == "200"
+
+
+def test_catchup_skips_once_in_idle_channel(state, monkeypatch):
+    # Regression: leerer Channel – Grenze wird einmal übernommen, nicht bei jedem Poll erneut geloggt
+    logged = []
+    monkeypatch.setattr(main.LOG, "info", lambda msg, **kw: logged.append(msg))
+    clock = [time.time()]
+    stale = str(time_snowflake(clock[0] - 3600))
+    channel_state(state, "c")["last_id"] = stale
+    monkeypatch.setattr(main.time, "time", lambda: clock[0])
+
+    positions = []
+    for _ in range(3):   # ein Poll je Minute, die Grenze wandert mit
+        positions.append(main.catchup_position("c", state))
+        clock[0] += 60
+
+    assert sum("Überspringe" in m for m in logged) == 1
+    assert int(positions[0]) < int(positions[1]) < int(positions[2])
+    stored = channel_state(state, "c")["last_id"]
+    assert int(stored) > int(stale)
+    assert stored == positions[0]
+
+
+def test_catchup_keeps_recent_cursor(state):
+    recent = str(time_snowflake(time.time() - 10))
+    channel_state(state, "c")["last_id"] = recent
+    assert main.catchup_position("c", state) == recent
@@ -0,0 +1,61 @@
+import main
+from main import SignalDedup
+
+SIG = {"base": "ETH", "side": "long", "entry": 100.0, "tp1": 101.0, "tp2": 102.0, "tp3": 103.0,
+       "dca1": 99.0, "dca2": 98.0, "dca3": 97.0}
+
+
+def test_duplicate_within_tolerance():
+    d = SignalDedup(window=60, tolerance_pct=0.5, max_entries=100)
+    d.add(SIG, ts=1000)
+    assert d.is_duplicate(dict(SIG, entry=100.3), now=1010)
+    assert not d.is_duplicate(dict(SIG, entry=101.0), now=1010)
+    assert not d.is_duplicate(dict(SIG, side="short"), now=1010)
+    assert (d.lookups, d.hits) == (3, 1)
+
+
+def test_window_counts_from_original():
+    d = SignalDedup(window=60, tolerance_pct=0, max_entries=100)
+    d.add(SIG, ts=1000)
+    assert d.is_duplicate(SIG, now=1060)
+    assert not d.is_duplicate(SIG, now=1061)
+
+
+def test_expired_entries_are_dropped_on_add():
+    d = SignalDedup(window=60, tolerance_pct=0, max_entries=100)
+    d.add(SIG, ts=1000)
+    d.add(dict(SIG, base="BTC"), ts=1100)
+    assert len(d) == 1
+
+
+def test_lru_limit():
+    d = SignalDedup(window=600, tolerance_pct=0, max_entries=2)
+    for i, base in enumerate(("A", "B", "C")):
+        d.add(dict(SIG, base=base), ts=1000 + i)
+    assert len(d) == 2
+    assert not d.is_duplicate(dict(SIG, base="A"), now=1005)
+    assert d.is_duplicate(dict(SIG, base="C"), now=1005)
+
+
+def test_disabled_window():
+    d = SignalDedup(window=0, tolerance_pct=0, max_entries=10)
+    d.add(SIG)
+    assert len(d) == 0 and not d.is_duplicate(SIG)
+
+
+def test_warm_dedup_restores_only_ok_signals(tmp_path, monkeypatch):
+    from journal import Journal
+    j = Journal(tmp_path / "journal.db")
+    j.record_signal(1, "c", SIG, ["a"])
+    j.record_signal(2, "c", dict(SIG, base="BTC"), ["a"])
+    j.record_outcome(1, "a", "ok")
+    j.record_outcome(2, "a", "failed")
+    j.flush()
+    dedup = SignalDedup(window=600, tolerance_pct=0, max_entries=100)
+    monkeypatch.setattr(main, "JOURNAL", j)
+    monkeypatch.setattr(main, "DEDUP", dedup)
+    monkeypatch.setattr(main, "DEDUP_WINDOW_SECONDS", 600)
+    main.warm_dedup()
+    assert dedup.is_duplicate(SIG)
+    assert not dedup.is_duplicate(dict(SIG, base="BTC"))
+    j.close()
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+import requests
+
+import main
+from main import CircuitBreaker
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+
+class FakeSession:
+    """Antwortet der Reihe nach mit `script` (Statuscode oder Exception)."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.posts = 0
+
+    def post(self, url, **kwargs):
+        self.posts += 1
+        step = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(step, Exception):
+            raise step
+        return FakeResponse(step)
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """Eigene Breaker-Tabelle, kein Warten zwischen Retries, kein Probe-Thread."""
+    monkeypatch.setattr(main, "_breakers", {})
+    monkeypatch.setattr(main.time, "sleep", lambda s: None)
+    monkeypatch.setattr(CircuitBreaker, "_probe_loop", lambda self: None)
+    monkeypatch.setattr(main, "CB_FAILURE_THRESHOLD", 2)
+
+    def install(*script):
+        session = FakeSession(*script)
+        monkeypatch.setattr(main, "session_for", lambda url: session)
+        return session
+    return install
+
+
+ACCOUNT = {"name": "a", "webhook_url": "http://127.0.0.1:9/hook"}
+
+
+def test_ok(webhook):
+    webhook(204)
+    r = main._dispatch_one(ACCOUNT, {"x": 1})
+    assert (r["ok"], r["outcome"], r["status"]) == (True, "ok", 204)
+
+
+def test_retry_then_ok(webhook):
+    s = webhook(requests.ConnectionError("reset"), 204)
+    r = main._dispatch_one(ACCOUNT, {"x": 1})
+    assert r["outcome"] == "ok" and s.posts == 2
+    assert main.breaker_for(ACCOUNT["webhook_url"]).failures == 0
+
+
+def test_client_error_does_not_trip_breaker(webhook):
+    webhook(400)
+    r = main._dispatch_one(ACCOUNT, {"x": 1})
+    assert (r["outcome"], r["status"]) == ("failed", 400)
+    assert not main.breaker_for(ACCOUNT["webhook_url"]).open
+
+
+def test_breaker_opening_between_retries_is_circuit_open(webhook):
+    s = webhook(requests.ConnectionError("down"))
+    r = main._dispatch_one(ACCOUNT, {"x": 1})
+    assert r["outcome"] == "circuit_open"
+    assert s.posts == 2
+    assert main.breaker_for(ACCOUNT["webhook_url"]).open
+
+
+def test_open_breaker_skips_post(webhook):
+    s = webhook(204)
+    b = main.breaker_for(ACCOUNT["webhook_url"])
+    b.failure()
+    b.failure()
+    r = main._dispatch_one(ACCOUNT, {"x": 1})
+    assert r["outcome"] == "circuit_open" and s.posts == 0
+
+
+def test_success_resets_failures(webhook):
+    b = main.breaker_for(ACCOUNT["webhook_url"])
+    b.failure()
+    b.success()
+    b.failure()
+    assert not b.open
+
+
+def test_deadline_passed_is_stale(webhook):
+    s = webhook(204)
+    r = main._dispatch_one(ACCOUNT, {"x": 1}, deadline=time.time() - 1)
+    assert r["outcome"] == "stale" and s.posts == 0
+
+
+def test_no_retry_after_deadline(webhook, monkeypatch):
+    s = webhook(requests.ConnectionError("down"))
+    monkeypatch.setattr(main, "CB_FAILURE_THRESHOLD", 0)
+    r = main._dispatch_one(ACCOUNT, {"x": 1}, deadline=time.time() + 1.0)
+    # Backoff (1,5 s) läge hinter der Deadline: ein Versuch, dann aufgeben
+    assert r["outcome"] == "failed" and s.posts == 1
+
+
+def test_signal_deadline_uses_shorter_ttl():
+    cfg = main.TradingConfig.from_env({"SIGNAL_MAX_AGE_SECONDS": "300", "ENTRY_EXPIRATION_MIN": "2"})
+    assert main.signal_deadline(1000.0, cfg) == 1120.0
+
+
+def test_dispatcher_routes_same_key_to_same_worker(monkeypatch):
+    order = []
+    monkeypatch.setattr(main, "dispatch_job", lambda job, state: order.append(job.mid))
+    d = main.Dispatcher({}, 100, 4).start()
+    cfg = main.TradingConfig.from_env({})
+    for mid in range(1, 6):
+        d.submit(main.SignalJob("c", mid, {"base": "ETH", "side": "long"}, {}, cfg, []))
+    d.stop(5)
+    assert order == [1, 2, 3, 4, 5]
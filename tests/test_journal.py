@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+import main
+from journal import Journal
+from metrics import time_snowflake
+
+SIG = {"base": "ETH", "side": "long", "entry": 100.0, "tp1": 101.0, "tp2": 102.0, "tp3": 103.0,
+       "dca1": 99.0, "dca2": 98.0, "dca3": 97.0}
+
+
+@pytest.fixture
+def journal(tmp_path):
+    j = Journal(tmp_path / "journal.db")
+    yield j
+    j.close()
+
+
+def reopen(j: Journal) -> Journal:
+    """Neuer Prozess nach einem Crash: sieht nur Committetes, der Puffer von `j` ist verloren."""
+    return Journal(j.path)
+
+
+def test_signal_is_committed_before_dispatch(journal):
+    journal.record_signal(1, "c", SIG, ["a", "b"])
+    after_crash = reopen(journal)
+    assert after_crash.seen(1)
+    assert after_crash.pending() == [(1, "c", SIG, ["a", "b"])]
+    after_crash.close()
+
+
+def test_buffered_outcomes_lost_on_crash_stay_pending(journal):
+    journal.record_signal(1, "c", SIG, ["a", "b"])
+    journal.record_outcome(1, "a", "ok")
+    assert journal.buffered() == 1
+    after_crash = reopen(journal)
+    assert after_crash.pending() == [(1, "c", SIG, ["a", "b"])]
+    after_crash.close()
+
+
+def test_flushed_ok_is_never_pending_again(journal):
+    journal.record_signal(1, "c", SIG, ["a", "b"])
+    journal.record_outcome(1, "a", "ok")
+    journal.flush()
+    assert journal.buffered() == 0
+    after_crash = reopen(journal)
+    assert after_crash.pending() == [(1, "c", SIG, ["b"])]
+    after_crash.close()
+
+
+def test_recent_signals_only_with_ok_dispatch(journal):
+    journal.record_signal(1, "c", SIG, ["a", "b"])
+    journal.record_signal(2, "c", dict(SIG, base="BTC"), ["a"])
+    journal.record_signal(3, "c", dict(SIG, base="SOL"), ["a"])
+    journal.record_outcome(1, "a", "failed")
+    journal.record_outcome(1, "b", "ok")
+    journal.record_outcome(2, "a", "circuit_open")
+    journal.flush()
+    assert [s["base"] for _, s in journal.recent_signals(0)] == ["ETH"]
+
+
+def test_compact_keeps_pending(journal):
+    journal.retention_seconds = 0
+    journal.record_signal(1, "c", SIG, ["a"])
+    journal.record_signal(2, "c", SIG, ["a"])
+    journal.record_outcome(2, "a", "ok")
+    time.sleep(0.01)
+    journal.compact()
+    assert journal.seen(1) and not journal.seen(2)
+    assert [p[0] for p in journal.pending()] == [1]
+
+
+def test_recover_journal_resends_each_account_once(journal, monkeypatch):
+    accounts = [{"name": n, "webhook_url": f"http://127.0.0.1/{n}", "api_key": n, "api_secret": "s",
+                 "exchange": "BYBI", "leverage": 5} for n in ("a", "b")]
+    sent = []
+
+    def fake_post(jobs, deadline=float("inf")):
+        sent.extend(acc["name"] for acc, _ in jobs)
+        return [{"account": acc["name"], "outcome": "ok", "status": 204, "error": None, "ok": True} for acc, _ in jobs]
+
+    monkeypatch.setattr(main, "TEMPLATES", main.compile_templates(accounts, "USDT"))
+    monkeypatch.setattr(main, "post_to_all_webhooks", fake_post)
+    monkeypatch.setattr(main, "JOURNAL_RESEND_PENDING", True)
+
+    mid = time_snowflake(time.time())
+    journal.record_signal(mid, "c", SIG, ["a", "b"])
+    journal.record_outcome(mid, "a", "ok")
+    journal.flush()
+
+    monkeypatch.setattr(main, "JOURNAL", reopen(journal))
+    main.recover_journal()
+    assert sent == ["b"]
+
+    # zweiter Neustart: nichts mehr offen, nichts doppelt
+    monkeypatch.setattr(main, "JOURNAL", reopen(main.JOURNAL))
+    main.recover_journal()
+    assert sent == ["b"]
+    assert main.JOURNAL.pending() == []
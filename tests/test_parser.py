@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import main
+
+CORPUS = [json.loads(line) for line in
+          (Path(__file__).resolve().parent.parent / "signal_corpus.jsonl").read_text(encoding="utf-8").splitlines()
+          if line.strip()]
+SIGNALS = [c for c in CORPUS if c["kind"].startswith("signal_")]
+IMPLAUSIBLE = [c for c in CORPUS if c["kind"].startswith("implausible_")]
+CHAT = [c for c in CORPUS if c["kind"] == "chat"]
+
+
+def record(text: str) -> main.MessageRecord:
+    return main.MessageRecord(1, "1", "1", "", [text])
+
+
+def parse(text: str, cfg=None):
+    return main.parse_signal_from_text(main.clean_markdown(text), cfg)
+
+
+@pytest.mark.parametrize("case", SIGNALS, ids=lambda c: c["kind"])
+def test_corpus_signal_fields(case):
+    sig, f = parse(case["text"]), case["fields"]
+    assert sig is not None
+    assert (sig["base"], sig["side"]) == (f["base"], f["side"])
+    assert sig["entry"] == pytest.approx(f["entry"])
+    assert [sig["tp1"], sig["tp2"], sig["tp3"]] == pytest.approx(f["tps"])
+    for got, want in zip((sig["dca1"], sig["dca2"], sig["dca3"]), f["dcas"]):
+        if want is not None:
+            assert got == pytest.approx(want)
+
+
+@pytest.mark.parametrize("case", IMPLAUSIBLE, ids=lambda c: c["kind"])
+def test_implausible_rejected(case):
+    assert main.parse_signal_with_reason(main.clean_markdown(case["text"]))[1] in ("implausible", "no_tp", "no_entry")
+
+
+def test_chat_is_not_a_signal():
+    for case in CHAT:
+        rec = record(case["text"])
+        assert main.prefilter_reason(rec, rec.parts) or parse(case["text"]) is None
+
+
+@pytest.mark.parametrize("case", SIGNALS, ids=lambda c: c["kind"])
+def test_prefilter_passes_signals_plain_and_html_escaped(case):
+    for text in (case["text"], case["text"].replace("&", "&amp;").replace("/", "&#x2F;")):
+        rec = record(text)
+        assert main.prefilter_reason(rec, rec.parts) is None
+
+
+def test_dca_backfill_uses_given_snapshot():
+    sig = {"side": "long", "entry": 100.0}
+    cfg = main.TradingConfig.from_env({"DCA1_DIST_PCT": "10", "DCA2_DIST_PCT": "20", "DCA3_DIST_PCT": "30"})
+    assert main.backfill_dcas_if_missing(sig["side"], sig["entry"], [None, 85.0, None], cfg) == \
+        pytest.approx([90.0, 85.0, 70.0])
+    assert main.backfill_dcas_if_missing("short", 100.0, [None, None, None], cfg) == pytest.approx([110.0, 120.0, 130.0])
+
+
+@pytest.mark.parametrize("backend", ["auto", "json", "stream"])
+def test_decode_backends_agree(backend, monkeypatch):
+    monkeypatch.setattr(main, "JSON_BACKEND", backend)
+    body = json.dumps([{"id": "5", "channel_id": "1", "content": "hi", "author": {"id": "7"}},
+                       {"id": "6", "channel_id": "1", "content": "ho"}, {"no_id": True}]).encode()
+    recs = main.decode_messages(body)
+    assert [(r.id, r.author_id, r.parts) for r in recs] == [(5, "7", ["hi"]), (6, "", ["ho"])]